@@ -0,0 +1,128 @@
+import asyncio
+import json
+import os
+import time
+
+from agent.loop import AgentLoop
+from agent.scheduler import CallBudget, ModelScheduler
+
+DEFAULT_CONCURRENCY = 4  # Tasks running at the same time
+DEFAULT_REQUESTS_PER_MINUTE = 60  # Model calls across all tasks
+
+
+def read_tasks(tasks_path):
+    """
+    Reads one task per JSONL line: {"prompt": ..., "working_dir": ...(optional),
+    "id": ...(optional)}. Blank lines are skipped; broken lines become tasks
+    that fail with a parse error.
+    """
+    tasks = []
+    with open(tasks_path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                task = json.loads(line)
+                if not isinstance(task, dict) or not task.get("prompt"):
+                    raise ValueError('each task needs a "prompt"')
+            except ValueError as e:
+                task = {"error": f"line {line_number}: {e}"}
+            task.setdefault("id", line_number)
+            tasks.append(task)
+    return tasks
+
+
+async def run_task(
+    client, task, model, system_instruction, scheduler, working_dir, tracer=None
+):
+    """
+    Runs one task through a quiet AgentLoop (the same step loop as the
+    interactive CLI) and returns its result record. Model calls go through
+    `scheduler` (a ModelScheduler shared by all tasks); spans are tagged
+    with the task id.
+    """
+    working_dir = task.get("working_dir") or working_dir
+    record = {
+        "id": task["id"],
+        "prompt": task.get("prompt"),
+        "working_dir": working_dir,
+        "final_text": None,
+        "steps": 0,
+        "usage": {"prompt_tokens": 0, "response_tokens": 0, "total_tokens": 0},
+        "error": task.get("error"),
+    }
+    if record["error"]:
+        return record
+
+    agent = AgentLoop(
+        client,
+        model,
+        system_instruction,
+        working_dir,
+        os.path.join(working_dir, "project_description.json"),
+        agent_name=f"Task {task['id']}",
+        context_cache=False,  # One short conversation per task: send the prefix inline
+        tracer=tracer,
+        scheduler=scheduler,
+        quiet=True,
+        trace_tags={"task": task["id"]},
+    )
+    try:
+        record.update(await agent.arun_turn(task["prompt"]))
+    finally:
+        agent.prefix_cache.close()  # The scheduler is shared, so not agent.close()
+    return record
+
+
+async def run_batch(
+    client,
+    tasks_path,
+    output_path,
+    model,
+    system_instruction,
+    working_dir,
+    concurrency=DEFAULT_CONCURRENCY,
+    requests_per_minute=DEFAULT_REQUESTS_PER_MINUTE,
+    tracer=None,
+    scheduler=None,
+):
+    """
+    Runs every task in tasks_path concurrently (at most `concurrency` at once)
+    and writes one JSONL result per task to output_path as soon as it
+    finishes. Model calls go through `scheduler`, by default one that paces
+    them to `requests_per_minute` and retries quota and server errors.
+    Spans go to `tracer` (tagged with the task id) if given.
+    Returns (succeeded, failed) counts.
+    """
+    tasks = read_tasks(tasks_path)
+    semaphore = asyncio.Semaphore(concurrency)
+    scheduler = scheduler or ModelScheduler(CallBudget(requests_per_minute))
+    counts = {"succeeded": 0, "failed": 0}
+
+    with open(output_path, "w", encoding="utf-8") as output:
+
+        async def run_one(task):
+            async with semaphore:
+                started = time.monotonic()
+                try:
+                    record = await run_task(
+                        client,
+                        task,
+                        model,
+                        system_instruction,
+                        scheduler,
+                        working_dir,
+                        tracer,
+                    )
+                except Exception as e:
+                    record = {"id": task["id"], "error": f"Error generating content: {e}"}
+                record["elapsed_seconds"] = round(time.monotonic() - started, 3)
+
+            counts["failed" if record.get("error") else "succeeded"] += 1
+            # Lines are written from the event loop thread only, so they never interleave
+            output.write(json.dumps(record) + "\n")
+            output.flush()
+
+        await asyncio.gather(*(run_one(task) for task in tasks))
+
+    return counts["succeeded"], counts["failed"]
@@ -0,0 +1,140 @@
+import time
+
+from google.genai import types
+
+from agent.history import estimate_tokens
+from functions.cache import file_signature
+
+CACHE_TTL_SECONDS = 3600  # Lifetime of the cached prefix on the backend
+MIN_CACHED_TOKENS = 1024  # The API rejects cached contents smaller than this
+
+
+class GeminiCacheBackend:
+    """Registers cached contents with the Gemini API (client.caches)."""
+
+    def __init__(self, client):
+        self.client = client
+
+    def create(self, model, contents, system_instruction, tools, ttl_seconds):
+        cached = self.client.caches.create(
+            model=model,
+            config=types.CreateCachedContentConfig(
+                contents=contents,
+                system_instruction=system_instruction,
+                tools=tools,
+                ttl=f"{ttl_seconds}s",
+                display_name="codecrafter-static-prefix",
+            ),
+        )
+        return cached.name
+
+    def delete(self, name):
+        self.client.caches.delete(name=name)
+
+
+class PrefixCache:
+    """
+    The static part of every request: system prompt, tool declarations and the
+    project metadata message. It is built once per session and, when large
+    enough, registered as cached content so later steps only reference it.
+    The prefix is rebuilt (and re-registered) when the watched metadata file
+    changes or the cache is about to expire. Without a cache (backend is None,
+    too small, or registration failed) the prefix is sent inline as before.
+    """
+
+    def __init__(
+        self,
+        backend,
+        model,
+        system_instruction,
+        tools,
+        build_prefix,
+        watch_path=None,
+        ttl_seconds=CACHE_TTL_SECONDS,
+        min_tokens=MIN_CACHED_TOKENS,
+        verbose=False,
+    ):
+        self.backend = backend
+        self.model = model
+        self.system_instruction = system_instruction
+        self.tools = tools
+        self.build_prefix = build_prefix  # Returns the list of prefix Contents
+        self.watch_path = watch_path
+        self.ttl_seconds = ttl_seconds
+        self.min_tokens = min_tokens
+        self.verbose = verbose
+
+        self.cache_name = None
+        self.prefix = []
+        self._config = None
+        self._signature = None
+        self._expires_at = 0
+        self._build()
+
+    def _build(self):
+        self.close()
+        self._signature = file_signature(self.watch_path) if self.watch_path else None
+        self.prefix = self.build_prefix()
+
+        prefix_tokens = estimate_tokens(
+            types.Content(role="user", parts=[types.Part(text=self.system_instruction)])
+        ) + sum(estimate_tokens(content) for content in self.prefix)
+
+        if self.backend and prefix_tokens >= self.min_tokens:
+            try:
+                self.cache_name = self.backend.create(
+                    self.model,
+                    self.prefix,
+                    self.system_instruction,
+                    self.tools,
+                    self.ttl_seconds,
+                )
+                # Refresh a minute early so a request never references an expired cache
+                self._expires_at = time.monotonic() + self.ttl_seconds - 60
+                if self.verbose:
+                    print(f"Registered static prompt prefix as {self.cache_name}")
+            except Exception as e:
+                if self.verbose:
+                    print(f"Context caching unavailable, sending prefix inline: {e}")
+
+        # Built once per prefix instead of on every step
+        if self.cache_name:
+            self._config = types.GenerateContentConfig(cached_content=self.cache_name)
+        else:
+            self._config = types.GenerateContentConfig(
+                tools=self.tools, system_instruction=self.system_instruction
+            )
+
+    def refresh_if_changed(self):
+        """Rebuilds the prefix if the watched file changed or the cache expired."""
+        changed = (
+            self.watch_path is not None
+            and file_signature(self.watch_path) != self._signature
+        )
+        expired = self.cache_name is not None and time.monotonic() >= self._expires_at
+        if changed or expired:
+            if self.verbose:
+                print("Static prompt prefix changed, rebuilding it.")
+            self._build()
+            return True
+        return False
+
+    def config(self):
+        """The GenerateContentConfig to use for every step."""
+        return self._config
+
+    def contents(self, messages):
+        """The request contents: messages, preceded by the prefix if it is not cached."""
+        if self.cache_name:
+            return list(messages)
+        return self.prefix + list(messages)
+
+    def close(self):
+        """Deletes the registered cache, if any."""
+        if self.cache_name and self.backend:
+            try:
+                self.backend.delete(self.cache_name)
+            except Exception as e:
+                if self.verbose:
+                    print(f"Error deleting cached prefix {self.cache_name}: {e}")
+        self.cache_name = None
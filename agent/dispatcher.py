@@ -0,0 +1,107 @@
+import posixpath
+from concurrent.futures import ThreadPoolExecutor
+
+MAX_PARALLEL_CALLS = 8  # Max tool calls executing at the same time
+
+# Tools that never change the working directory and can safely overlap
+READ_ONLY_FUNCTIONS = {
+    "get_file_content",
+    "get_files_info",
+    "get_project_description",
+    "search_code",
+    "get_symbols",
+}
+
+# Tools whose effect is not limited to the path they are given
+# (a script can read/write any file, a listing or search sees every file under it)
+WIDE_FUNCTIONS = {
+    "run_python_file",
+    "get_files_info",
+    "search_code",
+}
+
+
+def call_target(func_name, func_args):
+    """
+    Returns the path a tool call operates on, normalized for comparison.
+    """
+    if func_name in ("get_files_info", "search_code"):
+        target = func_args.get("directory", ".")
+    elif func_name == "get_project_description":
+        target = func_args.get("file_path", "project_description.json")
+    else:
+        target = func_args.get("file_path") or func_args.get("path") or ""
+    return posixpath.normpath(target.replace("\\", "/").strip("/") or ".")
+
+
+def calls_conflict(first, second):
+    """
+    Two calls conflict when at least one of them mutates the working directory
+    and they may touch the same file. Conflicting calls keep their original order.
+    """
+    (first_name, first_args), (second_name, second_args) = first, second
+
+    if first_name in READ_ONLY_FUNCTIONS and second_name in READ_ONLY_FUNCTIONS:
+        return False
+    if first_name in WIDE_FUNCTIONS or second_name in WIDE_FUNCTIONS:
+        return True
+    return call_target(first_name, first_args) == call_target(second_name, second_args)
+
+
+class ToolDispatcher:
+    """
+    Starts tool calls as soon as they are submitted (e.g. while a response is
+    still streaming in). Each call waits for every earlier call it conflicts
+    with, so the outcome matches running the calls one by one in order.
+    """
+
+    def __init__(self, execute, max_workers=MAX_PARALLEL_CALLS):
+        self.execute = execute
+        self._pool = ThreadPoolExecutor(max_workers=max_workers)
+        self._submitted = []  # (call, future) in submission order
+
+    def submit(self, func_name, func_args):
+        """Schedules a tool call and returns a future for its result."""
+        call = (func_name, func_args)
+        dependencies = [
+            future
+            for earlier, future in self._submitted
+            if calls_conflict(earlier, call)
+        ]
+        # Calls are submitted in order, so every dependency is already running
+        # or done by the time a worker picks up a call that waits on it.
+        future = self._pool.submit(_run_after, dependencies, self.execute, *call)
+        self._submitted.append((call, future))
+        return future
+
+    def shutdown(self):
+        self._pool.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+
+
+def dispatch_function_calls(calls, execute, max_workers=MAX_PARALLEL_CALLS):
+    """
+    Executes a list of (func_name, func_args) tool calls concurrently.
+    Read-only calls run in parallel; each call waits for every earlier call it
+    conflicts with. Returns the results in the original call order.
+    """
+    if not calls:
+        return []
+    if len(calls) == 1:
+        func_name, func_args = calls[0]
+        return [execute(func_name, func_args)]
+
+    with ToolDispatcher(execute, min(max_workers, len(calls))) as dispatcher:
+        futures = [dispatcher.submit(*call) for call in calls]
+    return [future.result() for future in futures]
+
+
+def _run_after(dependencies, execute, func_name, func_args):
+    for dependency in dependencies:
+        dependency.exception()  # Wait, but let each call report its own errors
+    return execute(func_name, func_args)
@@ -0,0 +1,226 @@
+import json
+from dataclasses import dataclass
+from typing import Optional
+
+from google.genai import types
+
+from agent.result_encoding import encode_result
+from functions.config import MAX_CHARS
+
+DEFAULT_TOKEN_BUDGET = 100_000  # Estimated prompt tokens the history may use
+KEEP_RECENT_TURNS = 2  # Most recent user turns that are never compacted
+CHARS_PER_TOKEN = 4  # Rough estimate, good enough for budgeting
+SUMMARY_CHARS = 200  # Chars of an old tool result kept in its summary
+MIN_RESULT_CHARS = 1000  # A new tool result always gets at least this much
+RESULT_BUDGET_SHARE = 0.5  # Max share of the free budget one new result may take
+
+RESULT_PREFIX = "Function call result: "
+
+
+def estimate_tokens(content):
+    """Estimates the prompt tokens of a Content from its text and call arguments."""
+    chars = 0
+    for part in content.parts or []:
+        if part.text:
+            chars += len(part.text)
+        if part.function_call:
+            chars += len(part.function_call.name or "")
+            chars += len(json.dumps(part.function_call.args or {}, default=str))
+    return chars // CHARS_PER_TOKEN + 1
+
+
+def _result_message(text):
+    return types.Content(role="user", parts=[types.Part(text=RESULT_PREFIX + text)])
+
+
+@dataclass
+class HistoryEntry:
+    content: types.Content
+    kind: str  # "prompt", "model" or "tool_result"
+    turn: int
+    tool_name: Optional[str] = None
+    target: Optional[str] = None  # File path a tool result is about
+    tokens: int = 0
+    compacted: bool = False
+
+
+class ConversationHistory:
+    """
+    Replaces the raw messages list. Keeps pinned context (e.g. the project
+    metadata) and the most recent turns intact, and compacts older tool results
+    once the estimated prompt size goes over the token budget:
+    repeated reads of the same file keep only the newest copy, old results are
+    reduced to a short summary, and as a last resort whole old turns are dropped.
+    An optional journal (a session.SessionLog) gets every added or removed
+    message, so the conversation can be restored later.
+    """
+
+    def __init__(
+        self,
+        pinned=None,
+        token_budget=DEFAULT_TOKEN_BUDGET,
+        keep_recent_turns=KEEP_RECENT_TURNS,
+        journal=None,
+    ):
+        self.pinned = list(pinned or [])
+        self.token_budget = token_budget
+        self.keep_recent_turns = keep_recent_turns
+        self.journal = journal
+        self.entries = []
+        self.turn = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    # --- Adding messages ---
+
+    def _log(self, kind, payload=None):
+        if self.journal is not None:
+            self.journal.append(kind, payload)
+
+    def add_user_prompt(self, text):
+        self._log("prompt", {"text": text})
+        self.turn += 1
+        self._add(
+            types.Content(role="user", parts=[types.Part(text=text)]), "prompt"
+        )
+
+    def add_model_content(self, content):
+        self._log("model", {"content": content.model_dump(mode="json", exclude_none=True)})
+        self._add(content, "model")
+
+    def add_tool_result(self, func_name, func_args, result):
+        # Serialized compactly and cut to what the prompt budget can still take
+        result = encode_result(func_name, func_args, result, self.result_limit())
+        self._log("tool_result", {"name": func_name, "args": func_args, "result": result})
+        target = None
+        if func_name == "get_file_content":
+            target = func_args.get("file_path")
+            # Different ranges of one file are different results
+            ranges = [
+                f"{name}={func_args[name]}"
+                for name in ("start_line", "end_line", "offset", "length")
+                if func_args.get(name) is not None
+            ]
+            if target and ranges:
+                target = f"{target} [{', '.join(ranges)}]"
+
+        # A newer read of the same file makes the older copies redundant
+        if target:
+            for entry in self.entries:
+                if (
+                    entry.kind == "tool_result"
+                    and entry.tool_name == func_name
+                    and entry.target == target
+                    and not entry.compacted
+                ):
+                    self._replace(
+                        entry,
+                        f"[Earlier read of '{target}' removed; a newer read follows.]",
+                    )
+
+        self._add(_result_message(result), "tool_result", func_name, target)
+
+    def _add(self, content, kind, tool_name=None, target=None):
+        self.entries.append(
+            HistoryEntry(
+                content=content,
+                kind=kind,
+                turn=self.turn,
+                tool_name=tool_name,
+                target=target,
+                tokens=estimate_tokens(content),
+            )
+        )
+
+    def _replace(self, entry, text):
+        entry.content = _result_message(text)
+        entry.tokens = estimate_tokens(entry.content)
+        entry.compacted = True
+
+    # --- Removing messages ---
+
+    def pop(self):
+        """Removes and returns the last message."""
+        self._log("pop")
+        entry = self.entries.pop()
+        if entry.kind == "prompt":
+            self.turn -= 1
+        return entry.content
+
+    def clear(self):
+        self._log("clear")
+        self.entries = []
+        self.turn = 0
+
+    # --- Budgeting ---
+
+    def estimated_tokens(self):
+        pinned = sum(estimate_tokens(content) for content in self.pinned)
+        return pinned + sum(entry.tokens for entry in self.entries)
+
+    def protected_tokens(self):
+        """Estimated tokens compaction can't reclaim: pinned context and recent turns."""
+        protected_turn = self.turn - self.keep_recent_turns + 1
+        pinned = sum(estimate_tokens(content) for content in self.pinned)
+        return pinned + sum(
+            entry.tokens for entry in self.entries if entry.turn >= protected_turn
+        )
+
+    def result_limit(self):
+        """
+        Max characters for the next tool result: a share of the budget not yet
+        taken by protected messages, between MIN_RESULT_CHARS and MAX_CHARS.
+        """
+        free_chars = (self.token_budget - self.protected_tokens()) * CHARS_PER_TOKEN
+        return int(min(MAX_CHARS, max(MIN_RESULT_CHARS, free_chars * RESULT_BUDGET_SHARE)))
+
+    def compact(self):
+        """
+        Shrinks old turns until the history fits the token budget.
+        Returns the number of estimated tokens saved.
+        """
+        before = self.estimated_tokens()
+        if before <= self.token_budget:
+            return 0
+
+        protected_turn = self.turn - self.keep_recent_turns + 1
+        over = before - self.token_budget
+
+        # 1. Summarize old tool results, oldest first
+        for entry in self.entries:
+            if over <= 0:
+                break
+            if (
+                entry.turn >= protected_turn
+                or entry.kind != "tool_result"
+                or entry.compacted
+            ):
+                continue
+            old_tokens = entry.tokens
+            self._replace(entry, self._summarize(entry))
+            over -= old_tokens - entry.tokens
+
+        # 2. Drop whole old turns, oldest first
+        while over > 0 and self.entries and self.entries[0].turn < protected_turn:
+            oldest_turn = self.entries[0].turn
+            while self.entries and self.entries[0].turn == oldest_turn:
+                over -= self.entries.pop(0).tokens
+
+        return before - self.estimated_tokens()
+
+    def _summarize(self, entry):
+        text = entry.content.parts[0].text[len(RESULT_PREFIX) :]
+        if len(text) <= SUMMARY_CHARS:
+            return text
+        subject = f"{entry.tool_name}('{entry.target}')" if entry.target else entry.tool_name
+        return (
+            f"{text[:SUMMARY_CHARS]}\n[...Old result of {subject} compacted: "
+            f"{len(text) - SUMMARY_CHARS} more characters omitted. Call the tool again if needed.]"
+        )
+
+    # --- Output ---
+
+    def contents(self):
+        """The list of Content to send to generate_content."""
+        return self.pinned + [entry.content for entry in self.entries]
@@ -0,0 +1,363 @@
+import asyncio
+import json
+from concurrent.futures import Future
+from functools import partial
+
+from google.genai import types
+
+from agent.context_cache import GeminiCacheBackend, PrefixCache
+from agent.dispatcher import ToolDispatcher
+from agent.history import DEFAULT_TOKEN_BUDGET, ConversationHistory
+from agent.scheduler import ModelScheduler
+from agent.streaming import stream_generate_content
+from agent.tools import call_function, check_file_access, get_available_functions
+from agent.tracing import Tracer, record_usage, traced_execute
+from functions.cache import tool_cache
+
+MAX_STEPS = 20  # Model calls per user prompt
+
+
+def load_project_metadata(project_description_path, working_dir, echo=print):
+    """Loads project_description.json, falling back to empty metadata on errors."""
+    try:
+        with open(project_description_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        echo(
+            f"Error: project_description.json not found in {working_dir}. File access control may be incomplete."
+        )
+    except Exception as e:
+        echo(f"Error loading project_description.json: {e}")
+    return {"key_files": {}}
+
+
+def _silent(*args, **kwargs):
+    pass
+
+
+def _add_usage(totals, response):
+    """Adds a response's token counts to a turn's usage totals."""
+    usage = getattr(response, "usage_metadata", None)
+    if not usage:
+        return
+    prompt_tokens = usage.prompt_token_count or 0
+    response_tokens = usage.candidates_token_count or 0
+    totals["prompt_tokens"] += prompt_tokens
+    totals["response_tokens"] += response_tokens
+    totals["total_tokens"] += usage.total_token_count or prompt_tokens + response_tokens
+
+
+class AgentLoop:
+    """
+    The agent: conversation history, cached prompt prefix and the step loop
+    that calls the model and dispatches its tool calls. The interactive CLI
+    creates one on the first prompt (so starting it does not import the SDK);
+    batch mode creates a quiet one per task and awaits arun_turn.
+    """
+
+    def __init__(
+        self,
+        client,
+        model,
+        system_instruction,
+        working_dir,
+        project_description_path,
+        agent_name,
+        history_budget=DEFAULT_TOKEN_BUDGET,
+        context_cache=True,
+        stream=False,
+        verbose=False,
+        tracer=None,
+        scheduler=None,
+        session=None,
+        quiet=False,
+        trace_tags=None,
+    ):
+        self.client = client
+        self.model = model
+        self.working_dir = working_dir
+        self.project_description_path = project_description_path
+        self.agent_name = agent_name
+        self.stream = stream
+        self.verbose = verbose and not quiet
+        # Progress and final text go to the terminal unless quiet (batch mode)
+        self.echo = _silent if quiet else print
+        self.tracer = tracer or Tracer()
+        self.trace_tags = trace_tags or {}  # Added to every span (e.g. the batch task id)
+        # Paces model calls and retries quota/server errors with backoff
+        self.scheduler = scheduler or ModelScheduler(notify=self.echo)
+        self.key_files = []
+        self._streamed_text_started = False
+
+        # System prompt, tool declarations and project metadata are the same on every
+        # step: build them once and register them as cached content with the backend.
+        self.prefix_cache = PrefixCache(
+            backend=GeminiCacheBackend(client) if context_cache else None,
+            model=model,
+            system_instruction=system_instruction,
+            tools=[get_available_functions()],
+            build_prefix=self.build_project_prefix,
+            watch_path=project_description_path,
+            verbose=self.verbose,
+        )
+
+        # Initialize chat history once to maintain context across prompts.
+        # Old tool results are compacted once the history goes over its token budget;
+        # every change is appended to the session log (if any) for --resume.
+        self.session = session
+        self.history = ConversationHistory(token_budget=history_budget, journal=session)
+
+    def build_project_prefix(self):
+        """
+        (Re)loads the project metadata and returns the messages that start every
+        conversation. Called at startup and whenever project_description.json changes.
+        """
+        metadata = load_project_metadata(
+            self.project_description_path, self.working_dir, self.echo
+        )
+        self.key_files = list(metadata["key_files"].keys())
+
+        # Define the content to inject into the start of the conversation
+        return [
+            types.Content(
+                role="user",
+                parts=[types.Part(text=f"Project Metadata: {json.dumps(metadata, indent=2)}")],
+            )
+        ]
+
+    def submit_function_call(self, dispatcher, fc):
+        """
+        Applies file access control to a model function call and hands it to the
+        dispatcher. Returns the future result, or the error result if rejected.
+        """
+        func_name = fc.name
+        func_args = dict(fc.args)
+
+        # --- File Access Control Logic ---
+        result = check_file_access(func_name, func_args, self.key_files)
+        if result:
+            # Only show security error result in verbose mode, or if a security error occurs
+            self.echo(f"SECURITY VIOLATION on {func_name}({func_args.get('file_path')})")
+            if self.verbose:
+                print(f" - Function result: {result}")
+
+            return result
+        # --- End File Access Control Logic ---
+
+        # Show a glance of the action for the end user
+        self.echo(
+            f"Calling {func_name} for {func_args.get('file_path', 'context').replace('file_path=', '')}"
+        )
+
+        # Show full arguments only in verbose mode
+        if self.verbose:
+            print(f" - Full Function Call: {func_name}({func_args})")
+
+        # Independent calls run concurrently; conflicting ones keep their order
+        return dispatcher.submit(func_name, func_args)
+
+    def record_tool_results(self, outcomes):
+        """Waits for each dispatched call and adds its result to the history, in call order."""
+        for fc, outcome in outcomes:
+            if isinstance(outcome, Future):
+                tool_result = outcome.result()
+                # Print result to the user only in verbose mode
+                if self.verbose:
+                    print(f" - Function result: {tool_result}")
+            else:
+                tool_result = outcome
+            self.history.add_tool_result(fc.name, dict(fc.args), tool_result)
+
+    def print_streamed_text(self, text):
+        """Prints model text as it streams in, with the agent name header once per reply."""
+        if not self._streamed_text_started:
+            print(f"\n{self.agent_name}:")
+            self._streamed_text_started = True
+        print(text, end="", flush=True)
+
+    def end_streamed_text(self):
+        """Finishes the line of streamed text (if any) before other output is printed."""
+        if self._streamed_text_started:
+            print()
+            self._streamed_text_started = False
+
+    def run_turn(self, user_prompt):
+        """
+        Runs the agentic loop (max MAX_STEPS model calls) for one user prompt.
+        Returns the outcome: {"final_text", "steps", "usage", "error"}.
+        """
+        history = self.history
+        tracer = self.tracer
+        tags = self.trace_tags
+        result = {
+            "final_text": None,
+            "steps": 0,
+            "usage": {"prompt_tokens": 0, "response_tokens": 0, "total_tokens": 0},
+            "error": None,
+        }
+
+        # Append the new user message to the existing history
+        history.add_user_prompt(user_prompt)
+
+        for step in range(MAX_STEPS):
+            step_span = tracer.span("step", turn=history.turn, step=step + 1, **tags)
+            if self.verbose:
+                print(f"\n[Agentic Step {step + 1}] Calling model...")
+
+            # Keep the prompt within the token budget before every model call
+            saved_tokens = history.compact()
+            if self.verbose and saved_tokens:
+                print(f"Compacted history: ~{saved_tokens} tokens saved")
+            # Picks up edits to project_description.json made since the last step
+            self.prefix_cache.refresh_if_changed()
+            messages = self.prefix_cache.contents(history.contents())
+            step_span.set(
+                history_tokens=history.estimated_tokens(), compacted_tokens=saved_tokens
+            )
+
+            # (function call, result or future) in the order the model asked for them
+            outcomes = []
+
+            execute = traced_execute(
+                tracer, partial(call_function, self.working_dir), step_span, **tags
+            )
+            with ToolDispatcher(execute) as dispatcher:
+                try:
+                    with tracer.span(
+                        "model", self.model, step_span, streamed=self.stream, **tags
+                    ) as model_span:
+                        if self.stream:
+
+                            def queue_function_call(fc):
+                                self.end_streamed_text()
+                                outcomes.append(
+                                    (fc, self.submit_function_call(dispatcher, fc))
+                                )
+
+                            # Tool calls start while the rest of the response is still streaming
+                            request = partial(
+                                stream_generate_content,
+                                self.client,
+                                on_text=self.print_streamed_text,
+                                on_function_call=queue_function_call,
+                                model=self.model,
+                                contents=messages,
+                                config=self.prefix_cache.config(),
+                            )
+                        else:
+                            request = partial(
+                                self.client.models.generate_content,
+                                model=self.model,
+                                contents=messages,
+                                config=self.prefix_cache.config(),
+                            )
+
+                        response = self.scheduler.call(
+                            request,
+                            estimated_tokens=history.estimated_tokens(),
+                            span=model_span,
+                            # Streams are never hedged, and only retried before they
+                            # printed text or dispatched a tool call
+                            hedge=not self.stream,
+                            retryable=lambda: not outcomes
+                            and not self._streamed_text_started,
+                        )
+                        if not self.stream:
+                            for fc in response.function_calls or []:
+                                outcomes.append(
+                                    (fc, self.submit_function_call(dispatcher, fc))
+                                )
+                        record_usage(model_span, response)
+                except Exception as e:
+                    self.end_streamed_text()
+                    result["error"] = f"Error generating content: {e}"
+                    self.echo(result["error"])
+                    if step == 0 and not outcomes:
+                        # Nothing happened yet: drop the prompt so it can simply be retried
+                        history.pop()
+                    else:
+                        if outcomes:
+                            # Calls dispatched mid-stream already ran: record them and
+                            # their results so they are not repeated on the next prompt
+                            history.add_model_content(
+                                types.Content(
+                                    role="model",
+                                    parts=[types.Part(function_call=fc) for fc, _ in outcomes],
+                                )
+                            )
+                            self.record_tool_results(outcomes)
+                        # Keep the tool results gathered so far; a follow-up prompt continues
+                        self.echo(
+                            f"[{self.agent_name} stopped at step {step + 1}; the progress so far is kept. "
+                            "Send another prompt (e.g. 'continue') to resume.]"
+                        )
+                    step_span.finish(e)
+                    return result
+
+            result["steps"] = step + 1
+            _add_usage(result["usage"], response)
+
+            # 1. Add model's reasoning/thoughts (content) to history
+            if response.candidates and response.candidates[0].content:
+                history.add_model_content(response.candidates[0].content)
+
+            # 2. Handle tool calls
+            if response.function_calls:
+                # 3. Feedback to agent (so it knows tool outcome) - ALWAYS send the result to the model
+                self.record_tool_results(outcomes)
+
+            # 4. If final text output exists, finish loop
+            elif response.text:
+                result["final_text"] = response.text
+                if self.stream:
+                    self.end_streamed_text()  # The text was already printed while streaming
+                else:
+                    self.echo(f"\n{self.agent_name}:\n", response.text)
+                step_span.set(tool_calls=len(outcomes), final=True)
+                step_span.finish()
+                return result
+
+            # 5. Check for max steps
+            if step == MAX_STEPS - 1:
+                result["error"] = f"reached max steps ({MAX_STEPS}) without a final response"
+                self.echo(
+                    f"\n[{self.agent_name} reached max steps ({step + 1}) without providing a final response. "
+                    "The progress so far is kept; send another prompt to continue.]"
+                )
+                step_span.set(tool_calls=len(outcomes))
+                step_span.finish()
+                return result
+
+            # 6. Usage info each iteration if in verbose mode
+            if self.verbose and getattr(response, "usage_metadata", None):
+                # Counts the API left out print as 0 instead of failing the turn
+                counts = {"prompt_tokens": 0, "response_tokens": 0, "total_tokens": 0}
+                _add_usage(counts, response)
+                print("--- Usage Metadata ---")
+                print(f"Prompt Tokens: {counts['prompt_tokens']}")
+                print(f"Response Tokens: {counts['response_tokens']}")
+                print(f"Total Tokens: {counts['total_tokens']}")
+                print(
+                    f"Cached Prefix Tokens: {response.usage_metadata.cached_content_token_count or 0}"
+                )
+                print(f"Tool Cache: {tool_cache.stats()}")
+                print(f"Model Calls: {self.scheduler.stats}")
+
+            step_span.set(tool_calls=len(outcomes))
+            step_span.finish()
+        return result
+
+    async def arun_turn(self, user_prompt):
+        """
+        run_turn for asyncio callers (batch mode): the turn runs in a worker
+        thread, so other tasks' turns proceed while it waits on the model or
+        its tools.
+        """
+        return await asyncio.to_thread(self.run_turn, user_prompt)
+
+    def close(self):
+        # Release the cached prefix instead of waiting for its TTL
+        self.prefix_cache.close()
+        self.scheduler.close()
+        if self.session:
+            self.session.close()
@@ -0,0 +1,154 @@
+"""
+Model backends for the agent loop.
+
+A backend is anything with the parts of the genai.Client surface the agent
+uses: models.generate_content and models.generate_content_stream (plus
+caches.* for the context cache, which only the real client supports). Besides genai.Client itself:
+
+- RecordingBackend wraps a real client and appends every response to a
+  "cassette" JSONL file.
+- ReplayBackend serves the responses of a cassette without network access
+  or an API key, so the agent loop can be run (and benchmarked) offline.
+
+Recorded responses are keyed on (user prompt, step): the text of the latest
+user prompt and the number of model replies after it. Replay therefore does
+not depend on tool results (timestamps, sizes), and concurrent batch tasks
+get their own responses.
+"""
+
+import json
+import threading
+from collections import deque
+from types import SimpleNamespace
+
+from google.genai import types
+
+from agent.history import RESULT_PREFIX
+
+
+class ReplayMissError(LookupError):
+    """The cassette has no (more) recorded responses for a request."""
+
+
+def request_key(contents):
+    """(prompt text, step) of a generate_content request's contents."""
+    prompt = None
+    step = 0
+    for content in contents:
+        text = content.parts[0].text if content.parts else None
+        if content.role == "user" and text and not text.startswith(RESULT_PREFIX):
+            prompt = text
+            step = 0
+        elif content.role == "model":
+            step += 1
+    return prompt, step
+
+
+def _dump(response):
+    return response.model_dump(mode="json", exclude_none=True)
+
+
+class RecordingBackend:
+    """Passes calls to a real client and records each response to a cassette file."""
+
+    def __init__(self, client, path):
+        self.client = client
+        self.path = path
+        self._lock = threading.Lock()
+        self.models = SimpleNamespace(
+            generate_content=self._generate_content,
+            generate_content_stream=self._generate_content_stream,
+        )
+
+    def __getattr__(self, name):
+        # caches, files... go straight to the real client
+        return getattr(self.client, name)
+
+    def _record(self, contents, chunks):
+        prompt, step = request_key(contents)
+        line = json.dumps(
+            {"prompt": prompt, "step": step, "chunks": [_dump(c) for c in chunks]}
+        )
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+    def _generate_content(self, *, model, contents, config=None):
+        response = self.client.models.generate_content(
+            model=model, contents=contents, config=config
+        )
+        self._record(contents, [response])
+        return response
+
+    def _generate_content_stream(self, *, model, contents, config=None):
+        chunks = []
+        for chunk in self.client.models.generate_content_stream(
+            model=model, contents=contents, config=config
+        ):
+            chunks.append(chunk)
+            yield chunk
+        self._record(contents, chunks)
+
+
+class ReplayBackend:
+    """
+    Serves recorded responses from a cassette file. Each (prompt, step) key
+    holds a queue, so a prompt recorded several times replays in order.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._responses = {}  # (prompt, step) -> deque of chunk lists
+        self.calls = 0
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                chunks = [
+                    types.GenerateContentResponse.model_validate(chunk)
+                    for chunk in record["chunks"]
+                ]
+                key = (record["prompt"], record["step"])
+                self._responses.setdefault(key, deque()).append(chunks)
+        self.models = SimpleNamespace(
+            generate_content=self._generate_content,
+            generate_content_stream=self._generate_content_stream,
+        )
+
+    def prompts(self):
+        """The recorded prompts, in file order (each prompt's first step)."""
+        return [prompt for prompt, step in self._responses if step == 0]
+
+    def _next(self, contents):
+        key = request_key(contents)
+        with self._lock:
+            queue = self._responses.get(key)
+            if not queue:
+                raise ReplayMissError(
+                    f"no recorded response for prompt {key[0]!r} at step {key[1]} in {self.path}"
+                )
+            self.calls += 1
+            # The last recording of a key keeps serving repeated requests
+            return queue.popleft() if len(queue) > 1 else queue[0]
+
+    def _generate_content(self, *, model, contents, config=None):
+        chunks = self._next(contents)
+        return chunks[-1] if len(chunks) == 1 else _merge_chunks(chunks)
+
+    def _generate_content_stream(self, *, model, contents, config=None):
+        yield from self._next(contents)
+
+
+def _merge_chunks(chunks):
+    """A blocking-style response from recorded stream chunks."""
+    parts = []
+    for chunk in chunks:
+        if chunk.candidates and chunk.candidates[0].content:
+            parts.extend(chunk.candidates[0].content.parts or [])
+    usage = next((c.usage_metadata for c in reversed(chunks) if c.usage_metadata), None)
+    return types.GenerateContentResponse(
+        candidates=[types.Candidate(content=types.Content(role="model", parts=parts))],
+        usage_metadata=usage,
+    )
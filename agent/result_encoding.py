@@ -0,0 +1,106 @@
+"""
+Encodes tool results into the text sent back to the model.
+
+Each result is serialized compactly and cut to a size limit chosen by the
+history from the remaining prompt budget (ConversationHistory.result_limit):
+- get_files_info listings become a tab-separated table;
+- other dicts/lists become compact JSON;
+- run_python_file output keeps its head and tail (the end of a log holds
+  the traceback or the test summary);
+- other text keeps whole lines from the start.
+Whatever is cut is reported together with how to get it. Listings carry
+their true total, so "N more files" is exact; text only says "at least N
+more lines", because the tool may already have cut its output (file reads
+stop at MAX_CHARS) and the size of the rest is not known here.
+"""
+
+import json
+
+from functions.config import MAX_CHARS
+
+TAIL_SHARE = 0.7  # Of a cut log, the share of the limit given to its end
+LISTING_COLUMNS = ("path", "size_kb", "modified")
+
+
+def encode_result(func_name, func_args, result, max_chars=MAX_CHARS):
+    """The text of a tool result, at most about max_chars long."""
+    if func_name == "get_files_info" and isinstance(result, dict) and "files" in result:
+        return encode_listing(result, max_chars)
+    if isinstance(result, (dict, list)):
+        text = json.dumps(result, separators=(",", ":"), ensure_ascii=False, default=str)
+        return encode_text(text, max_chars)
+    text = str(result)
+    if func_name == "run_python_file":
+        return encode_log(text, max_chars)
+    return encode_text(text, max_chars, _continuation_hint(func_name, func_args))
+
+
+def encode_listing(listing, max_chars):
+    """A get_files_info page as a table, with the exact number of files left."""
+    files = listing["files"]
+    total = listing.get("total", len(files))
+    offset = listing.get("offset", 0) or 0
+    lines = ["\t".join(LISTING_COLUMNS)]
+    used = len(lines[0]) + 1
+    shown = 0
+    for entry in files:
+        row = "\t".join(str(entry.get(column, "")) for column in LISTING_COLUMNS)
+        if used + len(row) + 1 > max_chars and shown:
+            break
+        lines.append(row)
+        used += len(row) + 1
+        shown += 1
+
+    summary = f"{total} files" if total else "No files found."
+    if shown:
+        summary += f" (showing {offset + 1}-{offset + shown})"
+    lines.insert(0, summary)
+    remaining = total - offset - shown
+    if remaining > 0:
+        lines.append(
+            f"[{remaining} more files available: call get_files_info again with offset={offset + shown}]"
+        )
+    return "\n".join(lines if shown else lines[:1])
+
+
+def encode_text(text, max_chars, hint=None):
+    """Whole lines from the start of text, then what was left out."""
+    if len(text) <= max_chars:
+        return text
+    cut = text.rfind("\n", 0, max_chars) + 1 or max_chars
+    shown, rest = text[:cut], text[cut:]
+    rest_lines = rest.count("\n") + (0 if rest.endswith("\n") else 1)
+    note = f"[... truncated; at least {rest_lines} more lines not shown"
+    if hint:
+        note += f"; {hint(shown)}"
+    return shown.rstrip("\n") + "\n" + note + " ...]"
+
+
+def encode_log(text, max_chars):
+    """The head and the tail of process output, with a lower bound on the gap."""
+    if len(text) <= max_chars:
+        return text
+    tail_chars = int(max_chars * TAIL_SHARE)
+    head_chars = max_chars - tail_chars
+    head_end = text.rfind("\n", 0, head_chars) + 1 or head_chars
+    tail_start = text.find("\n", len(text) - tail_chars) + 1 or len(text) - tail_chars
+    omitted_lines = text.count("\n", head_end, tail_start)
+    return f"{text[:head_end]}[... at least {omitted_lines} lines omitted ...]\n{text[tail_start:]}"
+
+
+def _continuation_hint(func_name, func_args):
+    """For cut file reads: a function giving the start_line to continue from."""
+    if func_name != "get_file_content" or func_args.get("offset") is not None:
+        return None
+    start_line = int(func_args.get("start_line") or 1)
+    ranged = func_args.get("start_line") is not None or func_args.get("end_line") is not None
+
+    def hint(shown):
+        lines = shown.split("\n")[:-1]
+        if ranged:  # Skip the [File ...] and [Lines ...] header lines
+            lines = lines[2:]
+        if not lines:  # Not even line start_line fit
+            return f"line {start_line} is too long; read it with offset/length"
+        return f"continue with start_line={start_line + len(lines)}"
+
+    return hint
@@ -0,0 +1,308 @@
+"""
+Model-call scheduler shared by the interactive loop and batch mode.
+
+- A client-side CallBudget paces calls to stay under a requests-per-minute
+  and tokens-per-minute quota instead of running into it.
+- Failed calls are classified (classify_error) and retried with exponential
+  backoff and full jitter:
+    "rate_limit"  429 / RESOURCE_EXHAUSTED. Waits for the server's retryDelay
+                  when it sends one, and pauses every caller sharing the
+                  budget, so concurrent sessions back off together.
+    "transient"   500/502/503/504 and connection errors or timeouts.
+    "fatal"       anything else (bad request, auth, replay miss): raised at once.
+- Optional hedging: when a call is slower than the 95th percentile of recent
+  calls (or a fixed delay), a second identical request is sent and the first
+  response wins. Hedged calls cost extra tokens, so hedging is off by default.
+"""
+
+import random
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
+
+from agent.tracing import percentile
+
+DEFAULT_MAX_RETRIES = 5
+BACKOFF_BASE_SECONDS = 1.0
+BACKOFF_CAP_SECONDS = 60.0
+BUDGET_WINDOW_SECONDS = 60.0
+HEDGE_MIN_SAMPLES = 8  # Latencies to observe before adaptive hedging starts
+HEDGE_PERCENTILE = 0.95
+LATENCY_SAMPLES = 100  # Recent call latencies kept for the hedge delay
+
+RATE_LIMIT_CODES = {429}
+TRANSIENT_CODES = {500, 502, 503, 504}
+RATE_LIMIT_STATUSES = {"RESOURCE_EXHAUSTED"}
+TRANSIENT_STATUSES = {"UNAVAILABLE", "INTERNAL", "DEADLINE_EXCEEDED"}
+# httpx errors, matched by name so the SDK's HTTP library is not imported here
+TRANSIENT_ERROR_NAMES = {"TransportError", "TimeoutException"}
+
+
+def classify_error(error):
+    """"rate_limit", "transient" or "fatal" for an exception raised by a model call."""
+    code = getattr(error, "code", None)
+    status = getattr(error, "status", None)
+    if code in RATE_LIMIT_CODES or status in RATE_LIMIT_STATUSES:
+        return "rate_limit"
+    if code in TRANSIENT_CODES or status in TRANSIENT_STATUSES:
+        return "transient"
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return "transient"
+    if any(cls.__name__ in TRANSIENT_ERROR_NAMES for cls in type(error).__mro__):
+        return "transient"
+    return "fatal"
+
+
+def retry_after(error):
+    """Seconds the server asked to wait (google.rpc.RetryInfo "retryDelay"), or None."""
+    details = getattr(error, "details", None)
+    try:
+        items = details["error"]["details"]
+    except (KeyError, TypeError):
+        return None
+    for item in items:
+        match = re.fullmatch(r"(\d+(?:\.\d+)?)s", str(item.get("retryDelay", "")))
+        if match:
+            return float(match.group(1))
+    return None
+
+
+def backoff_delay(attempt, base=BACKOFF_BASE_SECONDS, cap=BACKOFF_CAP_SECONDS, rng=random):
+    """Exponential backoff with full jitter: uniform in [0, min(cap, base * 2**attempt)]."""
+    return rng.uniform(0, min(cap, base * 2**attempt))
+
+
+class CallBudget:
+    """
+    Client-side quota over a sliding window: at most requests_per_minute
+    calls and tokens_per_minute tokens (estimated when reserved, corrected
+    with the actual usage afterwards). None disables a limit. Thread-safe,
+    so concurrent turns (e.g. batch tasks) can share one budget.
+    """
+
+    def __init__(self, requests_per_minute=None, tokens_per_minute=None, window=BUDGET_WINDOW_SECONDS):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.window = window
+        self.paused_until = 0.0
+        self._calls = deque()  # [start, tokens, active] in start order
+        self._tokens = 0
+        self._lock = threading.Lock()
+
+    def _expire(self, now):
+        while self._calls and self._calls[0][0] <= now - self.window:
+            entry = self._calls.popleft()
+            entry[2] = False
+            self._tokens -= entry[1]
+
+    def _wait_time(self, tokens, now):
+        wait_seconds = self.paused_until - now
+        calls = self._calls
+        limit = max(1, int(self.requests_per_minute or 0))
+        if self.requests_per_minute and len(calls) >= limit:
+            oldest = calls[len(calls) - limit]
+            wait_seconds = max(wait_seconds, oldest[0] + self.window - now)
+        if self.tokens_per_minute and calls and self._tokens + tokens > self.tokens_per_minute:
+            # Wait until enough of the window's tokens expire (all of them for huge calls)
+            needed = self._tokens + tokens - self.tokens_per_minute
+            freed = 0
+            for start, used, _ in calls:
+                freed += used
+                if freed >= needed:
+                    break
+            wait_seconds = max(wait_seconds, start + self.window - now)
+        return wait_seconds
+
+    def try_reserve(self, tokens=0):
+        """Reserves a call of ~tokens. Returns (entry, 0.0) or (None, seconds to wait)."""
+        with self._lock:
+            now = time.monotonic()
+            self._expire(now)
+            wait_seconds = self._wait_time(tokens, now)
+            if wait_seconds > 0:
+                return None, wait_seconds
+            entry = [now, tokens, True]
+            self._calls.append(entry)
+            self._tokens += tokens
+            return entry, 0.0
+
+    def settle(self, entry, tokens):
+        """Replaces a reservation's estimate with the tokens the call really used."""
+        with self._lock:
+            if entry[2]:
+                self._tokens += tokens - entry[1]
+            entry[1] = tokens
+
+    def pause(self, seconds):
+        """Holds back every caller for the next `seconds` (after a 429)."""
+        with self._lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+
+def _used_tokens(response, estimate):
+    usage = getattr(response, "usage_metadata", None)
+    return (usage and usage.total_token_count) or estimate
+
+
+def _settle_hedge(budget, entry, future):
+    """Settles a hedge's reservation with its request's usage (none if it failed or was cancelled)."""
+    if future.done() and not future.cancelled() and future.exception() is None:
+        budget.settle(entry, _used_tokens(future.result(), entry[1]))
+    else:
+        budget.settle(entry, 0)
+
+
+class ModelScheduler:
+    """
+    Runs model calls under a CallBudget with classified retries and optional
+    hedging. `request` is a zero-argument function making one blocking model
+    call; it is called again for every retry or hedge.
+    `notify(message)` is told about each retry, e.g. print for the CLI.
+    """
+
+    def __init__(
+        self,
+        budget=None,
+        max_retries=DEFAULT_MAX_RETRIES,
+        hedge=False,
+        hedge_after=None,
+        backoff_base=BACKOFF_BASE_SECONDS,
+        backoff_cap=BACKOFF_CAP_SECONDS,
+        notify=None,
+    ):
+        self.budget = budget or CallBudget()
+        self.max_retries = max_retries
+        self.hedge = hedge
+        self.hedge_after = hedge_after  # Fixed hedge delay in seconds; None = adaptive
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.notify = notify
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)
+        self.stats = {"calls": 0, "retries": 0, "rate_limited": 0, "hedged": 0, "hedge_wins": 0}
+        self._lock = threading.Lock()
+        self._hedge_executor = None
+
+    # --- Policy ---
+
+    def hedge_delay(self):
+        """Seconds after which a call is hedged, or None when not hedging (yet)."""
+        if not self.hedge:
+            return None
+        if self.hedge_after is not None:
+            return self.hedge_after
+        with self._lock:
+            if len(self.latencies) < HEDGE_MIN_SAMPLES:
+                return None
+            return percentile(sorted(self.latencies), HEDGE_PERCENTILE)
+
+    def _retry_delay(self, error, attempt, retryable):
+        """Seconds to wait before retrying, or None if the error must be raised."""
+        kind = classify_error(error)
+        if kind == "fatal" or attempt >= self.max_retries or (retryable and not retryable()):
+            return None
+        delay = backoff_delay(attempt, self.backoff_base, self.backoff_cap)
+        with self._lock:
+            self.stats["retries"] += 1
+            if kind == "rate_limit":
+                self.stats["rate_limited"] += 1
+        if kind == "rate_limit":
+            delay = max(delay, retry_after(error) or 0.0)
+            self.budget.pause(delay)
+        if self.notify:
+            self.notify(
+                f"Model call failed ({kind}: {getattr(error, 'message', None) or error}); "
+                f"retrying in {delay:.1f}s (attempt {attempt + 2}/{self.max_retries + 1})"
+            )
+        return delay
+
+    def _finished(self, started, response, entry):
+        with self._lock:
+            self.stats["calls"] += 1
+            self.latencies.append(time.monotonic() - started)
+        self.budget.settle(entry, _used_tokens(response, entry[1]))
+
+    @staticmethod
+    def _trace(span, attempts, budget_wait, retry_wait, hedged):
+        if span is not None:
+            span.set(
+                attempts=attempts,
+                rate_limit_wait_ms=round(budget_wait * 1000, 3),
+                retry_wait_ms=round(retry_wait * 1000, 3),
+                hedged=hedged,
+            )
+
+    # --- Blocking calls ---
+
+    def _reserve(self, tokens):
+        while True:
+            entry, wait_seconds = self.budget.try_reserve(tokens)
+            if entry:
+                return entry
+            time.sleep(wait_seconds)
+
+    def call(self, request, estimated_tokens=0, span=None, hedge=True, retryable=None):
+        """
+        Makes a blocking model call. `retryable()` (optional) is checked
+        before each retry, e.g. to stop retrying a stream that already
+        produced output. hedge=False disables hedging for this call.
+        """
+        budget_wait = retry_wait = 0.0
+        hedged = False
+        attempt = 0
+        while True:
+            waited = time.monotonic()
+            entry = self._reserve(estimated_tokens)
+            budget_wait += time.monotonic() - waited
+            started = time.monotonic()
+            try:
+                delay = self.hedge_delay() if hedge else None
+                if delay is None:
+                    response = request()
+                else:
+                    response, hedged = self._hedged_call(request, delay, estimated_tokens)
+            except Exception as error:
+                self.budget.settle(entry, 0)
+                delay = self._retry_delay(error, attempt, retryable)
+                if delay is None:
+                    self._trace(span, attempt + 1, budget_wait, retry_wait, hedged)
+                    raise
+                time.sleep(delay)
+                retry_wait += delay
+                attempt += 1
+                continue
+            self._finished(started, response, entry)
+            self._trace(span, attempt + 1, budget_wait, retry_wait, hedged)
+            return response
+
+    def _hedged_call(self, request, delay, tokens):
+        """Returns (response, hedged). The losing request runs to completion unused."""
+        with self._lock:
+            if self._hedge_executor is None:
+                self._hedge_executor = ThreadPoolExecutor(thread_name_prefix="hedge")
+            executor = self._hedge_executor
+        first = executor.submit(request)
+        done, _ = wait([first], timeout=delay)
+        entry, _ = (None, 0) if done else self.budget.try_reserve(tokens)
+        if entry is None:  # Fast enough, or no budget left for a second request
+            return first.result(), False
+
+        second = executor.submit(request)
+        # Settled whenever the second request ends, also when it loses and is not awaited
+        second.add_done_callback(lambda future: _settle_hedge(self.budget, entry, future))
+        with self._lock:
+            self.stats["hedged"] += 1
+        error = None
+        for future in as_completed([first, second]):
+            if future.exception() is None:
+                if future is second:
+                    with self._lock:
+                        self.stats["hedge_wins"] += 1
+                return future.result(), True
+            error = future.exception()
+        raise error
+
+    def close(self):
+        if self._hedge_executor:
+            self._hedge_executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,192 @@
+"""
+Session persistence: every change to the conversation history is appended to
+<working_directory>/.codecrafter/sessions/<id>.log as it happens, so a
+session survives exits and crashes and can be resumed with --resume=<id>.
+
+The log is a sequence of length-prefixed records: a 5-byte header (payload
+length, record type) followed by compact JSON. Tool results of
+BLOB_MIN_BYTES or more are stored once under .codecrafter/blobs/, named by
+their sha256, and referenced by hash; rereading the same file in many turns
+or sessions costs one copy. A record cut short by a crash is ignored, and
+cut off before the log is appended to again.
+
+Resuming replays the records into a fresh ConversationHistory; compaction
+is not logged, it is simply redone on the next step.
+"""
+
+import hashlib
+import json
+import os
+import struct
+import threading
+import time
+import uuid
+
+SESSION_DIR = os.path.join(".codecrafter", "sessions")
+BLOB_DIR = os.path.join(".codecrafter", "blobs")
+SESSION_SUFFIX = ".log"
+SESSION_VERSION = 1
+BLOB_MIN_BYTES = 2048  # Tool results this big are stored by content hash
+
+HEADER = struct.Struct(">IB")  # Payload length, record type
+RECORD_TYPES = {"meta": 1, "prompt": 2, "model": 3, "tool_result": 4, "pop": 5, "clear": 6}
+RECORD_KINDS = {code: kind for kind, code in RECORD_TYPES.items()}
+
+
+def new_session_id():
+    return time.strftime("%Y%m%d-%H%M%S") + "-" + uuid.uuid4().hex[:6]
+
+
+def session_path(working_directory, session_id):
+    return os.path.join(working_directory, SESSION_DIR, session_id + SESSION_SUFFIX)
+
+
+def list_sessions(working_directory):
+    """Session ids of working_directory, oldest first (by last write)."""
+    directory = os.path.join(working_directory, SESSION_DIR)
+    try:
+        names = [name for name in os.listdir(directory) if name.endswith(SESSION_SUFFIX)]
+    except FileNotFoundError:
+        return []
+    names.sort(key=lambda name: os.path.getmtime(os.path.join(directory, name)))
+    return [name[: -len(SESSION_SUFFIX)] for name in names]
+
+
+class SessionLog:
+    """
+    Append-only log of one session. Used as the journal of a
+    ConversationHistory: append(kind, payload) is called for every change.
+    The file is created on the first record, so sessions with no prompt leave
+    nothing behind.
+    """
+
+    def __init__(self, working_directory, session_id=None, metadata=None):
+        self.working_directory = working_directory
+        self.session_id = session_id or new_session_id()
+        self.path = session_path(working_directory, self.session_id)
+        self.metadata = metadata or {}
+        self.records = 0
+        self._file = None
+        self._lock = threading.Lock()
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        end = 0
+        try:
+            with open(self.path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            data = b""
+        for _, _, end in _complete_records(data):
+            pass
+        if end < len(data):
+            # Records appended after a torn one could never be read back
+            with open(self.path, "r+b") as f:
+                f.truncate(end)
+        self._file = open(self.path, "ab")
+        if not end:
+            self._write("meta", {"version": SESSION_VERSION, "created": time.time(), **self.metadata})
+
+    def _write(self, kind, payload):
+        data = json.dumps(payload, separators=(",", ":"), default=str).encode("utf-8")
+        self._file.write(HEADER.pack(len(data), RECORD_TYPES[kind]) + data)
+        self._file.flush()
+        self.records += 1
+
+    def append(self, kind, payload=None):
+        payload = dict(payload or {})
+        result = payload.get("result")
+        if isinstance(result, str) and len(result) >= BLOB_MIN_BYTES:
+            payload["result"] = {"blob": store_blob(self.working_directory, result)}
+        with self._lock:
+            if self._file is None:
+                self._open()
+            self._write(kind, payload)
+
+    def close(self):
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+
+
+def store_blob(working_directory, text):
+    """Writes text to the blob store (once) and returns its sha256."""
+    data = text.encode("utf-8")
+    digest = hashlib.sha256(data).hexdigest()
+    path = os.path.join(working_directory, BLOB_DIR, digest[:2], digest)
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, path)
+    return digest
+
+
+def load_blob(working_directory, digest):
+    path = os.path.join(working_directory, BLOB_DIR, digest[:2], digest)
+    with open(path, "rb") as f:
+        return f.read().decode("utf-8")
+
+
+def read_session(working_directory, session_id):
+    """
+    Returns the (kind, payload) records of a session with blob references
+    resolved. Raises FileNotFoundError for unknown sessions.
+    """
+    with open(session_path(working_directory, session_id), "rb") as f:
+        data = f.read()
+
+    records = []
+    for code, payload, _ in _complete_records(data):
+        result = payload.get("result")
+        if isinstance(result, dict) and "blob" in result:
+            try:
+                payload["result"] = load_blob(working_directory, result["blob"])
+            except FileNotFoundError:
+                payload["result"] = "[Result no longer available in the session store.]"
+        records.append((RECORD_KINDS[code], payload))
+    return records
+
+
+def _complete_records(data):
+    """
+    Yields (record type, payload, end offset) for each record of a log,
+    stopping at the first torn or unreadable one (a crash mid-write).
+    """
+    offset = 0
+    while offset + HEADER.size <= len(data):
+        length, code = HEADER.unpack_from(data, offset)
+        start = offset + HEADER.size
+        if start + length > len(data) or code not in RECORD_KINDS:
+            return
+        try:
+            payload = json.loads(data[start : start + length])
+        except ValueError:
+            return
+        if not isinstance(payload, dict):
+            return
+        offset = start + length
+        yield code, payload, offset
+
+
+def restore_history(history, records):
+    """Replays session records into a ConversationHistory (without journaling them)."""
+    from google.genai import types
+
+    journal, history.journal = history.journal, None
+    try:
+        for kind, payload in records:
+            if kind == "prompt":
+                history.add_user_prompt(payload["text"])
+            elif kind == "model":
+                history.add_model_content(types.Content.model_validate(payload["content"]))
+            elif kind == "tool_result":
+                history.add_tool_result(payload["name"], payload["args"], payload["result"])
+            elif kind == "pop":
+                history.pop()
+            elif kind == "clear":
+                history.clear()
+    finally:
+        history.journal = journal
@@ -0,0 +1,54 @@
+from google.genai import types
+
+
+def stream_generate_content(client, on_text=None, on_function_call=None, **kwargs):
+    """
+    Calls generate_content_stream and reports output while it arrives:
+    on_text(chunk_text) for each piece of text, on_function_call(function_call)
+    for each complete function call. Returns a GenerateContentResponse
+    assembled from all chunks, so it can be used like a blocking response.
+    """
+    parts = []
+    finish_reason = None
+    usage_metadata = None
+
+    for chunk in client.models.generate_content_stream(**kwargs):
+        if chunk.usage_metadata:
+            usage_metadata = chunk.usage_metadata
+
+        if not chunk.candidates:
+            continue
+        candidate = chunk.candidates[0]
+        if candidate.finish_reason:
+            finish_reason = candidate.finish_reason
+        if not candidate.content or not candidate.content.parts:
+            continue
+
+        for part in candidate.content.parts:
+            if part.function_call:
+                # The API never splits a function call across chunks
+                if on_function_call:
+                    on_function_call(part.function_call)
+                parts.append(part)
+            elif part.text is not None and not part.thought:
+                if on_text:
+                    on_text(part.text)
+                # Merge consecutive text pieces back into a single part
+                if parts and parts[-1].text is not None and not parts[-1].thought:
+                    parts[-1] = types.Part(text=parts[-1].text + part.text)
+                else:
+                    parts.append(types.Part(text=part.text))
+            else:
+                parts.append(part)
+
+    return types.GenerateContentResponse(
+        candidates=[
+            types.Candidate(
+                content=types.Content(role="model", parts=parts),
+                finish_reason=finish_reason,
+            )
+        ]
+        if parts
+        else [],
+        usage_metadata=usage_metadata,
+    )
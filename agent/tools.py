@@ -0,0 +1,73 @@
+from functools import cache
+from importlib import import_module
+
+# Tool name -> module defining the function and its schema_<name> declaration.
+# Modules are imported on first use, so importing this module stays cheap.
+TOOL_MODULES = {
+    "get_files_info": "functions.get_files_info",
+    "get_file_content": "functions.get_file_content",
+    "search_code": "functions.search_code",
+    "get_symbols": "functions.get_symbols",
+    "write_file": "functions.write_file",
+    "edit_file": "functions.edit_file",
+    "run_python_file": "functions.run_python_file",
+    "delete_file": "functions.delete_file",
+    "get_project_description": "functions.get_project_description",
+}
+
+
+@cache
+def get_available_functions():
+    """Combines all function schemas into the Tool definition (built once)."""
+    from google.genai import types
+
+    return types.Tool(
+        function_declarations=[
+            getattr(import_module(module), f"schema_{name}")
+            for name, module in TOOL_MODULES.items()
+        ]
+    )
+
+
+def get_tool(func_name):
+    """The function implementing a tool, importing its module on first use."""
+    return getattr(import_module(TOOL_MODULES[func_name]), func_name)
+
+
+# Tools that may only touch files listed in the project's key_files
+FILE_RESTRICTED_FUNCTIONS = [
+    "write_file",
+    "edit_file",
+    "get_file_content",
+    "get_symbols",
+    "delete_file",
+    "run_python_file",
+]
+
+
+def call_function(working_directory, func_name, func_args):
+    """Executes a single tool call and returns its result (errors included)."""
+    try:
+        if func_name not in TOOL_MODULES:
+            return f"Error: Unknown function {func_name}"
+        return get_tool(func_name)(working_directory, **func_args)
+    except Exception as e:
+        # Capture execution errors clearly for the model and user
+        return f"ERROR executing {func_name}: {e}"
+
+
+def check_file_access(func_name, func_args, key_files):
+    """
+    File access control: returns the error result for a call on a file that is
+    not listed in the project's key_files, or None if the call is allowed.
+    """
+    # Determine the path for access control checks
+    file_path = func_args.get("file_path")
+
+    # Check for file path access restriction on relevant functions
+    if func_name in FILE_RESTRICTED_FUNCTIONS and file_path:
+        # Check if the file_path matches any of the relative paths in key_files
+        if not any(file_path == kf for kf in key_files):
+            return f"SECURITY ERROR: Operation on file_path '{file_path}' is not permitted. File must be listed in 'key_files'."
+    return None
+
@@ -0,0 +1,265 @@
+"""
+Tracing for the agent loop: spans for each agent step, model call and tool
+call, written as one JSON object per line.
+
+    python main.py --trace=trace.jsonl      # record spans while running
+    python -m agent.tracing trace.jsonl     # percentiles per step/model/tool
+
+Each span records its wall time plus attributes (token usage for model
+calls; result size and tool-cache hits for tool calls). With no trace path
+the tracer is disabled and spans cost almost nothing.
+"""
+
+import cProfile
+import io
+import json
+import math
+import pstats
+import sys
+import threading
+import time
+import uuid
+
+from agent.dispatcher import call_target
+from functions.cache import tool_cache
+
+
+class Span:
+    """
+    A timed operation, started when created. Use as a context manager or
+    call finish(); set() adds attributes.
+    """
+
+    def __init__(self, tracer, kind, name, parent, attributes):
+        self.tracer = tracer
+        self.id = tracer.next_id() if tracer.enabled else None
+        self.kind = kind
+        self.name = name
+        self.parent = parent.id if isinstance(parent, Span) else parent
+        self.attributes = attributes
+        self.start = time.time()
+        self._started = time.perf_counter()
+        self._finished = False
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def finish(self, error=None):
+        """Writes the span (once) with its duration so far."""
+        if self._finished or not self.tracer.enabled:
+            return
+        self._finished = True
+        record = {
+            "session": self.tracer.session_id,
+            "span": self.id,
+            "parent": self.parent,
+            "kind": self.kind,
+            "name": self.name,
+            "start": round(self.start, 6),
+            "duration_ms": round((time.perf_counter() - self._started) * 1000, 3),
+        }
+        record.update(self.attributes)
+        if error is not None:
+            record["error"] = f"{type(error).__name__}: {error}"
+        self.tracer.write(record)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.finish(exc_value)
+        return False
+
+
+class Tracer:
+    """
+    Writes finished spans to a JSONL file (appending, so one file can hold
+    several sessions). Thread-safe: tool spans finish on dispatcher threads.
+    """
+
+    def __init__(self, path=None, session_id=None):
+        self.path = path
+        self.enabled = bool(path)
+        self.session_id = session_id or uuid.uuid4().hex[:12]
+        self._file = open(path, "a", encoding="utf-8") if self.enabled else None
+        self._lock = threading.Lock()
+        self._next_id = 0
+
+    def next_id(self):
+        with self._lock:
+            self._next_id += 1
+            return self._next_id
+
+    def span(self, kind, name=None, parent=None, **attributes):
+        """A new span; parent is a Span (or span id) for nesting."""
+        return Span(self, kind, name or kind, parent, attributes)
+
+    def write(self, record):
+        line = json.dumps(record, default=str) + "\n"
+        with self._lock:
+            if self._file:
+                self._file.write(line)
+                self._file.flush()
+
+    def close(self):
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+        self.enabled = False
+
+
+def record_usage(span, response):
+    """Adds a model response's token counts to its span."""
+    usage = getattr(response, "usage_metadata", None)
+    if usage:
+        span.set(
+            prompt_tokens=usage.prompt_token_count or 0,
+            response_tokens=usage.candidates_token_count or 0,
+            cached_tokens=usage.cached_content_token_count or 0,
+            total_tokens=usage.total_token_count or 0,
+        )
+    span.set(function_calls=len(response.function_calls or []))
+
+
+def traced_execute(tracer, execute, parent=None, **attributes):
+    """
+    Wraps a dispatcher execute(func_name, func_args) function so that each
+    tool call is recorded as a "tool" span (target, result size, cache hits).
+    """
+    if not tracer.enabled:
+        return execute
+
+    def run(func_name, func_args):
+        hits, misses = tool_cache.thread_counts()
+        with tracer.span(
+            "tool",
+            func_name,
+            parent,
+            target=call_target(func_name, func_args),
+            **attributes,
+        ) as span:
+            result = execute(func_name, func_args)
+            new_hits, new_misses = tool_cache.thread_counts()
+            text = result if isinstance(result, str) else json.dumps(result, default=str)
+            span.set(
+                result_chars=len(text),
+                cache_hits=new_hits - hits,
+                cache_misses=new_misses - misses,
+                failed=text.lstrip().upper().startswith(("ERROR", "SECURITY ERROR")),
+            )
+            return result
+
+    return run
+
+
+# --- Profiling ---
+
+
+def start_profile():
+    """Starts cProfile on the calling thread (the agent loop), not on tool threads."""
+    profiler = cProfile.Profile()
+    profiler.enable()
+    return profiler
+
+
+def stop_profile(profiler, path, top=20):
+    """Stops profiling, saves pstats data to path and returns the top functions as text."""
+    profiler.disable()
+    profiler.dump_stats(path)
+    output = io.StringIO()
+    pstats.Stats(profiler, stream=output).sort_stats("cumulative").print_stats(top)
+    return output.getvalue()
+
+
+# --- Summary ---
+
+
+def read_trace(paths):
+    """Yields the span records of one or more JSONL trace files."""
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        continue
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values), max(1, math.ceil(fraction * len(sorted_values)))) - 1
+    return sorted_values[index]
+
+
+def summarize(records):
+    """
+    Aggregates span records into rows of duration percentiles: one row per
+    span kind (step, model, tool) and one per tool name.
+    Returns (rows, totals) where totals has session count and token sums.
+    """
+    durations = {}
+    sessions = set()
+    totals = {"prompt_tokens": 0, "response_tokens": 0, "cached_tokens": 0}
+    for record in records:
+        sessions.add(record.get("session"))
+        kind = record.get("kind", "?")
+        duration = record.get("duration_ms", 0.0)
+        durations.setdefault(kind, []).append(duration)
+        if kind == "tool":
+            durations.setdefault(f"tool:{record.get('name')}", []).append(duration)
+        if kind == "model":
+            for key in totals:
+                totals[key] += record.get(key, 0) or 0
+
+    rows = []
+    for label in sorted(durations, key=lambda label: (":" in label, label)):
+        values = sorted(durations[label])
+        rows.append(
+            {
+                "span": label,
+                "count": len(values),
+                "p50_ms": percentile(values, 0.50),
+                "p90_ms": percentile(values, 0.90),
+                "p99_ms": percentile(values, 0.99),
+                "max_ms": values[-1],
+                "total_ms": sum(values),
+            }
+        )
+    totals["sessions"] = len(sessions)
+    return rows, totals
+
+
+def format_summary(rows, totals):
+    lines = [
+        f"{'span':<28}{'count':>7}{'p50 ms':>11}{'p90 ms':>11}{'p99 ms':>11}{'max ms':>11}{'total s':>10}"
+    ]
+    for row in rows:
+        lines.append(
+            f"{row['span']:<28}{row['count']:>7}{row['p50_ms']:>11.1f}{row['p90_ms']:>11.1f}"
+            f"{row['p99_ms']:>11.1f}{row['max_ms']:>11.1f}{row['total_ms'] / 1000:>10.2f}"
+        )
+    lines.append(
+        f"\nSessions: {totals['sessions']} | Prompt tokens: {totals['prompt_tokens']} | "
+        f"Response tokens: {totals['response_tokens']} | Cached tokens: {totals['cached_tokens']}"
+    )
+    return "\n".join(lines)
+
+
+def main(argv):
+    if not argv:
+        print("usage: python -m agent.tracing <trace.jsonl> [more.jsonl ...]", file=sys.stderr)
+        return 2
+    rows, totals = summarize(read_trace(argv))
+    if not rows:
+        print("No spans found.")
+        return 1
+    print(format_summary(rows, totals))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
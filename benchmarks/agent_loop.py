@@ -0,0 +1,269 @@
+"""
+Deterministic agent-loop benchmark.
+
+Replays the canned sessions in benchmarks/sessions/ (model responses recorded
+with --record, served by ReplayBackend) through AgentLoop.run_turn, the loop
+the CLI and batch mode use, against a fresh copy of the calculator/ sample
+project. No network or API key needed.
+
+    python -m benchmarks.agent_loop                    # compare with the baseline
+    python -m benchmarks.agent_loop --update-baseline  # accept current numbers
+    python -m benchmarks.agent_loop --repeat=10 --tolerance=0.3
+
+Per session it reports loop overhead (step time not spent in the model or in
+tools), tool dispatch time and history growth, using the spans written by
+agent/tracing.py. Timings are compared as multiples of the reference
+workload (benchmarks/reference.py) timed before each run, so the baseline
+holds across machines. Exits with 1 when a metric is still worse than the
+baseline allows after re-measuring the session CONFIRM_RUNS times.
+"""
+
+import glob
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+from agent.loop import AgentLoop
+from agent.model_backend import ReplayBackend
+from agent.scheduler import ModelScheduler
+from agent.tracing import Tracer, percentile, read_trace
+from benchmarks.reference import reference_ms
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SESSIONS_DIR = os.path.join(ROOT, "benchmarks", "sessions")
+BASELINE_PATH = os.path.join(ROOT, "benchmarks", "agent_loop_baseline.json")
+SAMPLE_PROJECT = os.path.join(ROOT, "calculator")
+
+MODEL_NAME = "gemini-2.5-flash"  # Only recorded in the trace; replay ignores it
+SYSTEM_PROMPT = "Benchmark replay."
+DEFAULT_REPEAT = 5
+DEFAULT_TOLERANCE = 0.5  # Allowed slowdown of timing metrics (0.5 = +50%)
+MIN_REGRESSION_MS = 2.0  # Timing changes smaller than this are noise
+COUNT_TOLERANCE = 0.05  # Allowed growth of deterministic metrics
+CONFIRM_RUNS = 2  # Re-measurements of a session that regressed before failing
+
+# Compared as multiples of the reference workload (run_once reports them in ms)
+TIMING_METRICS = ["wall", "loop_overhead", "tool", "tool_p90"]
+COUNT_METRICS = ["steps", "tool_calls", "history_tokens", "prompt_tokens"]
+
+
+def _copy_project(destination):
+    shutil.copytree(
+        SAMPLE_PROJECT,
+        destination,
+        ignore=shutil.ignore_patterns("__pycache__", ".codecrafter"),
+    )
+
+
+def _busy_ms(intervals):
+    """Length of the union of (start, end) intervals (in seconds), in milliseconds."""
+    busy = 0.0
+    covered_until = None
+    for start, end in sorted(intervals):
+        if covered_until is None or start > covered_until:
+            busy += end - start
+            covered_until = end
+        elif end > covered_until:
+            busy += end - covered_until
+            covered_until = end
+    return busy * 1000
+
+
+def loop_overhead_ms(spans):
+    """
+    Step time during which neither the model nor any tool was running.
+    Tool calls of a step overlap (and may overlap a streamed model call), so
+    each step subtracts the union of its children's intervals, not their sum.
+    """
+    children = {}
+    for span in spans:
+        if span["kind"] in ("model", "tool"):
+            start = span["start"]
+            children.setdefault(span["parent"], []).append(
+                (start, start + span["duration_ms"] / 1000)
+            )
+    return sum(
+        max(0.0, span["duration_ms"] - _busy_ms(children.get(span["span"], [])))
+        for span in spans
+        if span["kind"] == "step"
+    )
+
+
+def run_once(cassette_path):
+    """Replays one session on a fresh project copy. Returns its metrics."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        working_dir = os.path.join(temp_dir, "calculator")
+        _copy_project(working_dir)
+        trace_path = os.path.join(temp_dir, "trace.jsonl")
+        tracer = Tracer(trace_path)
+        backend = ReplayBackend(cassette_path)
+        agent = AgentLoop(
+            backend,
+            MODEL_NAME,
+            SYSTEM_PROMPT,
+            working_dir,
+            os.path.join(working_dir, "project_description.json"),
+            agent_name="Benchmark",
+            context_cache=False,  # Replay has no caches API
+            tracer=tracer,
+            scheduler=ModelScheduler(),  # No budget: replay has no quota
+            quiet=True,
+        )
+
+        started = time.perf_counter()
+        try:
+            for number, prompt in enumerate(backend.prompts(), start=1):
+                result = agent.run_turn(prompt)
+                if result["error"]:
+                    raise RuntimeError(f"prompt {number} failed: {result['error']}")
+        finally:
+            agent.close()
+        wall_ms = (time.perf_counter() - started) * 1000
+        tracer.close()
+        spans = list(read_trace([trace_path]))
+
+    def durations(kind):
+        return [span["duration_ms"] for span in spans if span["kind"] == kind]
+
+    return {
+        "wall_ms": wall_ms,
+        "loop_overhead_ms": loop_overhead_ms(spans),
+        "tool_ms": sum(durations("tool")),
+        "tool_p90_ms": percentile(sorted(durations("tool")), 0.90),
+        "steps": len(durations("step")),
+        "tool_calls": len(durations("tool")),
+        "history_tokens": max(
+            (span.get("history_tokens", 0) for span in spans if span["kind"] == "step"),
+            default=0,
+        ),
+        "prompt_tokens": sum(
+            span.get("prompt_tokens", 0) for span in spans if span["kind"] == "model"
+        ),
+    }
+
+
+def run_session(cassette_path, repeat):
+    """
+    Median metrics over `repeat` runs (after one warm-up run). Each timing
+    is divided by the reference workload timed just before its run.
+    """
+    run_once(cassette_path)  # Warm-up: imports, interpreter caches
+    runs = []
+    for _ in range(repeat):
+        reference = reference_ms()
+        runs.append((reference, run_once(cassette_path)))
+    metrics = {
+        name: round(statistics.median(run[f"{name}_ms"] / reference for reference, run in runs), 4)
+        for name in TIMING_METRICS
+    }
+    metrics.update({name: runs[0][1][name] for name in COUNT_METRICS})
+    metrics["reference_ms"] = round(statistics.median(reference for reference, _ in runs), 3)
+    return metrics
+
+
+def find_regressions(results, baseline, tolerance):
+    """Returns a message per metric that got worse than the baseline allows."""
+    regressions = []
+    for session, metrics in results.items():
+        expected = baseline.get(session)
+        if expected is None:
+            continue
+        reference = metrics["reference_ms"]
+        for name in TIMING_METRICS:
+            base, current = expected.get(name), metrics[name]
+            if base is None:
+                continue
+            if (
+                current > base * (1 + tolerance)
+                and (current - base) * reference > MIN_REGRESSION_MS
+            ):
+                regressions.append(
+                    f"{session}.{name}: {current:.3f} vs baseline {base:.3f} "
+                    f"(x reference, {current * reference:.1f} vs {base * reference:.1f} ms here)"
+                )
+        for name in COUNT_METRICS:
+            base, current = expected.get(name), metrics[name]
+            if base is None:
+                continue
+            if current > base * (1 + COUNT_TOLERANCE):
+                regressions.append(f"{session}.{name}: {current} vs baseline {base}")
+    return regressions
+
+
+def print_session(session, m):
+    ms = {name: m[name] * m["reference_ms"] for name in TIMING_METRICS}
+    print(
+        f"{session:<24} wall {ms['wall']:8.1f} ms | overhead {ms['loop_overhead']:7.2f} ms | "
+        f"tools {ms['tool']:8.1f} ms (p90 {ms['tool_p90']:.1f}) | "
+        f"{m['steps']} steps, {m['tool_calls']} calls | history ~{m['history_tokens']} tokens"
+    )
+
+
+def main(argv):
+    repeat = DEFAULT_REPEAT
+    tolerance = DEFAULT_TOLERANCE
+    for arg in argv:
+        if arg.startswith("--repeat="):
+            repeat = max(1, int(arg.split("=", 1)[1]))
+        elif arg.startswith("--tolerance="):
+            tolerance = float(arg.split("=", 1)[1])
+
+    cassettes = {
+        os.path.splitext(os.path.basename(path))[0]: path
+        for path in sorted(glob.glob(os.path.join(SESSIONS_DIR, "*.jsonl")))
+    }
+    results = {}
+    for session, cassette_path in cassettes.items():
+        results[session] = run_session(cassette_path, repeat)
+        print_session(session, results[session])
+    print(f"(reference workload: {statistics.median(m['reference_ms'] for m in results.values()):.1f} ms)")
+
+    if "--update-baseline" in argv:
+        # Only machine-independent numbers: relative timings and counts
+        baseline = {
+            session: {name: value for name, value in metrics.items() if name != "reference_ms"}
+            for session, metrics in results.items()
+        }
+        with open(BASELINE_PATH, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Baseline written to {BASELINE_PATH}")
+        return 0
+
+    try:
+        with open(BASELINE_PATH, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    except FileNotFoundError:
+        print("No baseline yet; run with --update-baseline to create one.")
+        return 0
+
+    regressions = find_regressions(results, baseline, tolerance)
+    for _ in range(CONFIRM_RUNS):
+        if not regressions:
+            break
+        # Timings are noisy on shared machines: re-measure, keeping the best
+        regressed = sorted({message.split(".", 1)[0] for message in regressions})
+        print(f"\nRe-measuring {', '.join(regressed)} to confirm...")
+        for session in regressed:
+            metrics = run_session(cassettes[session], repeat)
+            best = results[session]
+            for name in TIMING_METRICS:
+                best[name] = min(best[name], metrics[name])
+            print_session(session, best)
+        regressions = find_regressions(results, baseline, tolerance)
+
+    if regressions:
+        print("\nRegressions:")
+        for message in regressions:
+            print(f" - {message}")
+        return 1
+    print("\nNo regressions against the baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
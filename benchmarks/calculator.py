@@ -0,0 +1,290 @@
+"""
+Calculator micro-benchmarks.
+
+Runs the calculator/ sample project's engine and renderer over generated
+corpora (fixed seed, so every run sees the same expressions):
+- chains: long operator chains ("3 + 41 * 7 - ..." with 200 operands);
+- nested: deeply nested parentheses (40 levels);
+- functions: expressions dominated by sin/cos/tan calls;
+- batch: many short, distinct expressions (more than the compile cache holds).
+
+    python -m benchmarks.calculator                    # compare with the baseline
+    python -m benchmarks.calculator --update-baseline  # accept current numbers
+    python -m benchmarks.calculator --repeat=9 --tolerance=0.3 --corpus=nested
+
+Targets per corpus: _tokenize, _evaluate_infix (on pre-tokenized input),
+evaluate with no cache (parse + build + run), evaluate with a warm cache,
+format_json_output and ResultWriter.write. It reports ops/sec (median of
+the repeats) and the peak memory allocated per operation (tracemalloc).
+Speed is compared as operations per run of the reference workload
+(benchmarks/reference.py) timed before each round of passes, so the
+baseline holds across machines. Exits with 1 when a metric is still worse
+than the baseline allows after re-measuring the corpus CONFIRM_RUNS times.
+"""
+
+import io
+import json
+import os
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+from benchmarks.reference import reference_ms
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_PATH = os.path.join(ROOT, "benchmarks", "calculator_baseline.json")
+SAMPLE_PROJECT = os.path.join(ROOT, "calculator")
+
+SEED = 1234
+DEFAULT_REPEAT = 5
+DEFAULT_TOLERANCE = 0.5  # Allowed slowdown (0.5 = relative speed may drop to 1/1.5 of the baseline)
+ALLOC_TOLERANCE = 0.1  # Allowed growth of allocated bytes per operation
+ALLOC_SAMPLE = 200  # Operations traced per target for the allocation metric
+MIN_PASS_SECONDS = 0.05  # Each timed pass loops over the corpus for at least this long
+CONFIRM_RUNS = 2  # Re-measurements of a corpus that regressed before failing
+
+OPERATORS = ["+", "-", "*", "/"]
+FUNCTIONS = ["sin", "cos", "tan"]
+
+
+def _number(rng):
+    if rng.random() < 0.3:
+        return f"{rng.randint(1, 999)}.{rng.randint(1, 99)}"
+    return str(rng.randint(1, 999))
+
+
+def _chain(rng, operands):
+    parts = [_number(rng)]
+    for _ in range(operands - 1):
+        parts += [rng.choice(OPERATORS), _number(rng)]
+    return " ".join(parts)
+
+
+def _nested(rng, depth):
+    expression = _number(rng)
+    for _ in range(depth):
+        # No division by subexpressions, which could be zero
+        expression = f"({expression} {rng.choice('+-*')} {_number(rng)})"
+        if rng.random() < 0.3:
+            expression = f"{_number(rng)} - {expression} / {rng.randint(1, 9)}"
+    return expression
+
+
+def _function_heavy(rng, calls):
+    terms = []
+    for _ in range(calls):
+        term = _number(rng)
+        for _ in range(rng.randint(1, 3)):
+            term = f"{rng.choice(FUNCTIONS)}({term})"
+        terms.append(term)
+    return f" {rng.choice('+-*')} ".join(terms)
+
+
+def build_corpora():
+    """The generated corpora: name -> list of expressions."""
+    rng = random.Random(SEED)
+    return {
+        "chains": [_chain(rng, 200) for _ in range(100)],
+        "nested": [_nested(rng, 40) for _ in range(200)],
+        "functions": [_function_heavy(rng, 12) for _ in range(500)],
+        "batch": [_chain(rng, rng.randint(2, 6)) for _ in range(20000)],
+    }
+
+
+def build_targets(expressions):
+    """Target name -> function running one operation on the i-th expression."""
+    if SAMPLE_PROJECT not in sys.path:
+        sys.path.insert(0, SAMPLE_PROJECT)
+    from pkg.calculator import Calculator
+    from pkg.render import ResultWriter, format_json_output
+
+    uncached = Calculator(cache_size=0)
+    cached = Calculator(cache_size=len(expressions))
+    tokens = [uncached._tokenize(expression) for expression in expressions]
+    results = [cached.evaluate(expression) for expression in expressions]  # Also warms the cache
+    writer = ResultWriter(io.BytesIO())
+    writer.stream.write = lambda data: None  # Measure formatting, not the sink
+
+    return {
+        "tokenize": lambda i: uncached._tokenize(expressions[i]),
+        "evaluate_infix": lambda i: uncached._evaluate_infix(tokens[i]),
+        "evaluate": lambda i: uncached.evaluate(expressions[i]),
+        "evaluate_cached": lambda i: cached.evaluate(expressions[i]),
+        "format_json_output": lambda i: format_json_output(expressions[i], results[i]),
+        "result_writer": lambda i: writer.write(expressions[i], results[i]),
+    }
+
+
+def time_pass(run, count):
+    """Ops/sec of one timed pass: the corpus, looped for at least MIN_PASS_SECONDS."""
+    operations = 0
+    started = time.perf_counter()
+    while True:
+        for i in range(count):
+            run(i)
+        operations += count
+        elapsed = time.perf_counter() - started
+        if elapsed >= MIN_PASS_SECONDS:
+            return operations / elapsed
+
+
+def allocated_per_op(run, count):
+    """Mean peak bytes allocated by one operation, over ALLOC_SAMPLE of them."""
+    sample = range(min(count, ALLOC_SAMPLE))
+    tracemalloc.start()
+    try:
+        total = 0
+        for i in sample:
+            before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            run(i)
+            total += tracemalloc.get_traced_memory()[1] - before
+    finally:
+        tracemalloc.stop()
+    return total / len(sample)
+
+
+def run_corpus(expressions, repeat):
+    """
+    Metrics per target. The timed passes of the targets are interleaved,
+    so a noisy moment on the machine does not hit every pass of one target.
+    Each round of passes follows a run of the reference workload; the
+    relative speed is ops/sec times its duration. Both are the median pass.
+    """
+    count = len(expressions)
+    targets = build_targets(expressions)
+    for run in targets.values():  # Warm-up pass
+        for i in range(count):
+            run(i)
+    rates = {target: [] for target in targets}
+    relative = {target: [] for target in targets}
+    for _ in range(repeat):
+        reference_seconds = reference_ms() / 1000
+        for target, run in targets.items():
+            rate = time_pass(run, count)
+            rates[target].append(rate)
+            relative[target].append(rate * reference_seconds)
+
+    # Allocations are traced on fresh targets, so buffers start out empty
+    fresh = build_targets(expressions)
+    return {
+        target: {
+            "ops_per_sec": round(statistics.median(rates[target]), 1),
+            "ops_per_reference": round(statistics.median(relative[target]), 2),
+            "alloc_bytes_per_op": round(allocated_per_op(fresh[target], count), 1),
+        }
+        for target in targets
+    }
+
+
+def find_regressions(results, baseline, tolerance):
+    """Returns a message per metric that got worse than the baseline allows."""
+    regressions = []
+    for corpus, targets in results.items():
+        for target, metrics in targets.items():
+            expected = baseline.get(corpus, {}).get(target)
+            if expected is None:
+                continue
+            base, current = expected.get("ops_per_reference"), metrics["ops_per_reference"]
+            if base and current < base / (1 + tolerance):
+                regressions.append(
+                    f"{corpus}.{target}.ops_per_reference: {current:,.1f} vs baseline {base:,.1f}"
+                )
+            base, current = expected.get("alloc_bytes_per_op"), metrics["alloc_bytes_per_op"]
+            if base is not None and current > base * (1 + ALLOC_TOLERANCE) + 64:
+                regressions.append(
+                    f"{corpus}.{target}.alloc_bytes_per_op: {current:,.0f} vs baseline {base:,.0f}"
+                )
+    return regressions
+
+
+def print_corpus(corpus, metrics):
+    for target, m in metrics.items():
+        print(
+            f"{corpus:<10} {target:<19} {m['ops_per_sec']:>12,.0f} ops/s "
+            f"({m['ops_per_reference']:>10,.1f} per reference run) | "
+            f"{m['alloc_bytes_per_op']:>10,.0f} B allocated/op"
+        )
+
+
+def main(argv):
+    repeat = DEFAULT_REPEAT
+    tolerance = DEFAULT_TOLERANCE
+    selected = None
+    for arg in argv:
+        if arg.startswith("--repeat="):
+            repeat = max(1, int(arg.split("=", 1)[1]))
+        elif arg.startswith("--tolerance="):
+            tolerance = float(arg.split("=", 1)[1])
+        elif arg.startswith("--corpus="):
+            selected = arg.split("=", 1)[1].split(",")
+
+    corpora = {
+        corpus: expressions
+        for corpus, expressions in build_corpora().items()
+        if not selected or corpus in selected
+    }
+    results = {}
+    for corpus, expressions in corpora.items():
+        results[corpus] = run_corpus(expressions, repeat)
+        print_corpus(corpus, results[corpus])
+
+    if "--update-baseline" in argv:
+        baseline = {}
+        if selected and os.path.exists(BASELINE_PATH):
+            with open(BASELINE_PATH, "r", encoding="utf-8") as f:
+                baseline = json.load(f)
+        # Only machine-independent numbers: relative speed and allocations
+        baseline.update(
+            {
+                corpus: {
+                    target: {
+                        name: value for name, value in metrics.items() if name != "ops_per_sec"
+                    }
+                    for target, metrics in targets.items()
+                }
+                for corpus, targets in results.items()
+            }
+        )
+        with open(BASELINE_PATH, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Baseline written to {BASELINE_PATH}")
+        return 0
+
+    try:
+        with open(BASELINE_PATH, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    except FileNotFoundError:
+        print("No baseline yet; run with --update-baseline to create one.")
+        return 0
+
+    regressions = find_regressions(results, baseline, tolerance)
+    for _ in range(CONFIRM_RUNS):
+        if not regressions:
+            break
+        # Timings are noisy on shared machines: re-measure, keeping the best
+        regressed = sorted({message.split(".", 1)[0] for message in regressions})
+        print(f"\nRe-measuring {', '.join(regressed)} to confirm...")
+        for corpus in regressed:
+            for target, metrics in run_corpus(corpora[corpus], repeat).items():
+                best = results[corpus][target]
+                if metrics["ops_per_reference"] > best["ops_per_reference"]:
+                    best["ops_per_sec"] = metrics["ops_per_sec"]
+                    best["ops_per_reference"] = metrics["ops_per_reference"]
+            print_corpus(corpus, results[corpus])
+        regressions = find_regressions(results, baseline, tolerance)
+
+    if regressions:
+        print("\nRegressions:")
+        for message in regressions:
+            print(f" - {message}")
+        return 1
+    print("\nNo regressions against the baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
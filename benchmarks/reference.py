@@ -0,0 +1,41 @@
+"""
+Reference workload for the benchmarks' relative thresholds.
+
+A fixed amount of plain interpreter work (JSON round trips, regex
+tokenizing, dict and list churn, sorting), timed right next to each
+measurement. Baselines store timings as multiples of it, so one recorded on
+a fast machine still holds on a slow one, and a busy moment slows the
+reference along with the measurement instead of failing the gate.
+"""
+
+import json
+import re
+import time
+
+REFERENCE_RUNS = 3  # Best of, per measurement
+WORD = re.compile(r"[A-Za-z_]\w*|\d+|\S")
+
+_RECORDS = [
+    {"id": i, "name": f"item_{i % 97}_{i}", "tags": ["a", "b", str(i % 7)], "value": i * 0.5}
+    for i in range(1500)
+]
+
+
+def _workload():
+    records = json.loads(json.dumps(_RECORDS))
+    counts = {}
+    for record in records:
+        for token in WORD.findall(f"{record['name']} = {record['value']} + len({record['tags']})"):
+            counts[token] = counts.get(token, 0) + 1
+    return sorted(records, key=lambda record: (record["tags"][-1], record["name"]))[0], len(counts)
+
+
+def reference_ms():
+    """Best time of REFERENCE_RUNS runs of the reference workload, in milliseconds."""
+    best = None
+    for _ in range(REFERENCE_RUNS):
+        started = time.perf_counter()
+        _workload()
+        elapsed = (time.perf_counter() - started) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
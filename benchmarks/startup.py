@@ -0,0 +1,116 @@
+"""
+CLI startup benchmark.
+
+    python -m benchmarks.startup [--repeat=N]
+
+Checks that importing main.py and agent/tools.py stays free of the
+google-genai SDK and the tool modules, and measures (best of N runs, in
+fresh interpreters):
+- the cumulative `python -X importtime` cost of `import main`;
+- the time until the CLI is ready for the first prompt (`python main.py`
+  quitting immediately), minus a bare `python -c pass`.
+Exits with 1 when a heavy module is imported early or a budget is exceeded.
+"""
+
+import os
+import subprocess
+import sys
+import time
+
+from agent.tools import TOOL_MODULES
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_REPEAT = 5
+IMPORT_BUDGET_MS = 50  # `import main`
+STARTUP_BUDGET_MS = 150  # Ready for the first prompt, beyond interpreter startup
+
+# Must not be imported until the first prompt / first tool call
+LAZY_MODULES = ["google.genai", "agent.loop", *TOOL_MODULES.values()]
+IMPORT_CHECKS = ["main", "agent.tools", "agent.dispatcher", "agent.tracing"]
+
+
+def _python(args, stdin=None, env=None):
+    return subprocess.run(
+        [sys.executable, *args],
+        cwd=ROOT,
+        input=stdin,
+        capture_output=True,
+        text=True,
+        env=env,
+        timeout=60,
+    )
+
+
+def early_imports(module):
+    """The lazy modules that importing `module` pulls in."""
+    code = (
+        f"import sys, {module}\n"
+        f"print('\\n'.join(name for name in sys.modules "
+        f"if name in {LAZY_MODULES!r} or name.startswith('google.genai.')))"
+    )
+    result = _python(["-c", code])
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr}")
+    return [line for line in result.stdout.splitlines() if line]
+
+
+def import_time_ms(module):
+    """Cumulative import time of `module` reported by -X importtime."""
+    result = _python(["-X", "importtime", "-c", f"import {module}"])
+    for line in reversed(result.stderr.splitlines()):
+        fields = [field.strip() for field in line.split("|")]
+        if len(fields) == 3 and fields[2] == module:
+            return int(fields[1]) / 1000
+    raise RuntimeError(f"no importtime line for {module}:\n{result.stderr}")
+
+
+def wall_time_ms(args, stdin=None, env=None):
+    started = time.perf_counter()
+    result = _python(args, stdin=stdin, env=env)
+    elapsed = (time.perf_counter() - started) * 1000
+    if result.returncode != 0:
+        raise RuntimeError(f"{args} failed:\n{result.stdout}{result.stderr}")
+    return elapsed
+
+
+def main(argv):
+    repeat = DEFAULT_REPEAT
+    for arg in argv:
+        if arg.startswith("--repeat="):
+            repeat = max(1, int(arg.split("=", 1)[1]))
+
+    failures = []
+    for module in IMPORT_CHECKS:
+        loaded = early_imports(module)
+        print(f"import {module:<20} lazy modules loaded: {', '.join(loaded) or 'none'}")
+        if loaded:
+            failures.append(f"import {module} loads {', '.join(loaded)}")
+
+    import_ms = min(import_time_ms("main") for _ in range(repeat))
+    env = dict(os.environ, GEMINI_API_KEY=os.environ.get("GEMINI_API_KEY", "startup-benchmark"))
+    bare_ms = min(wall_time_ms(["-c", "pass"]) for _ in range(repeat))
+    ready_ms = min(wall_time_ms(["main.py"], stdin="q\n", env=env) for _ in range(repeat))
+    startup_ms = max(0.0, ready_ms - bare_ms)
+
+    print(f"import main:          {import_ms:7.1f} ms (budget {IMPORT_BUDGET_MS} ms)")
+    print(
+        f"ready for prompt:     {startup_ms:7.1f} ms over a bare interpreter "
+        f"({ready_ms:.1f} ms total, budget {STARTUP_BUDGET_MS} ms)"
+    )
+    if import_ms > IMPORT_BUDGET_MS:
+        failures.append(f"import main took {import_ms:.1f} ms")
+    if startup_ms > STARTUP_BUDGET_MS:
+        failures.append(f"startup took {startup_ms:.1f} ms")
+
+    if failures:
+        print("\nRegressions:")
+        for message in failures:
+            print(f" - {message}")
+        return 1
+    print("\nStartup within budget.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
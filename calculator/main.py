@@ -1,9 +1,61 @@
+import sys
+
 from pkg.calculator import Calculator
 from pkg.render import format_json_output
 
-calc = Calculator()
-expression = "sin(90) + 7 * 2"
-result = calc.evaluate(expression) # Test with a scientific function
 
-rendered_output = format_json_output(expression, result)
-print(rendered_output)
\ No newline at end of file
+def flag_value(args, name, default=None):
+    """Returns the value of a "--name=value" CLI flag, or the default."""
+    for arg in args:
+        if arg.startswith(f"{name}="):
+            return arg.split("=", 1)[1]
+    return default
+
+
+def run_batch_cli(args):
+    """
+    python main.py --batch [FILE|-] [--output=FILE] [--workers=N] [--chunk-kb=N]
+                           [--format=ndjson|csv] [--non-finite=null|string|error]
+
+    Evaluates one expression per line of FILE (stdin by default) and writes
+    NDJSON (or CSV) records to --output (stdout by default); the throughput
+    report goes to stderr.
+    """
+    from pkg.batch import DEFAULT_CHUNK_BYTES, run_batch
+
+    position = args.index("--batch") + 1
+    path = args[position] if position < len(args) and not args[position].startswith("--") else "-"
+    output_path = flag_value(args, "--output")
+    workers = int(flag_value(args, "--workers", 0)) or None
+    chunk_bytes = int(flag_value(args, "--chunk-kb", 0)) * 1024 or DEFAULT_CHUNK_BYTES
+    output_format = flag_value(args, "--format", "ndjson")
+    non_finite = flag_value(args, "--non-finite", "null")
+
+    source = sys.stdin.buffer if path == "-" else open(path, "rb")
+    output = open(output_path, "wb") if output_path else sys.stdout.buffer
+    try:
+        stats = run_batch(source, output, workers, chunk_bytes, output_format, non_finite)
+    finally:
+        if source is not sys.stdin.buffer:
+            source.close()
+        if output is not sys.stdout.buffer:
+            output.close()
+    print(stats.summary(), file=sys.stderr)
+    return 0
+
+
+def main(args):
+    if "--batch" in args:
+        return run_batch_cli(args)
+
+    calc = Calculator()
+    expression = "sin(90) + 7 * 2"
+    result = calc.evaluate(expression) # Test with a scientific function
+
+    rendered_output = format_json_output(expression, result)
+    print(rendered_output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
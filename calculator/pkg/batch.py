@@ -0,0 +1,139 @@
+# batch.py
+
+import io
+import os
+import time
+from collections import deque
+from functools import partial
+from multiprocessing import Pool
+
+from pkg.calculator import Calculator
+from pkg.render import ResultWriter
+
+DEFAULT_CHUNK_BYTES = 1024 * 1024  # Input sent to a worker per task (whole lines)
+IN_FLIGHT_PER_WORKER = 2  # Chunks queued or running per worker; bounds memory
+
+_calculator = None  # One per worker process, so its compile cache is reused
+
+
+class BatchStats:
+    """Counts of a batch run, for the throughput report."""
+
+    def __init__(self, workers):
+        self.workers = workers
+        self.records = 0
+        self.errors = 0
+        self.bytes_read = 0
+        self.started = time.perf_counter()
+        self.seconds = 0.0
+
+    def add(self, records, errors, bytes_read):
+        self.records += records
+        self.errors += errors
+        self.bytes_read += bytes_read
+
+    def finish(self):
+        self.seconds = time.perf_counter() - self.started
+
+    def summary(self):
+        seconds = max(self.seconds, 1e-9)
+        return (
+            f"Evaluated {self.records} expressions ({self.errors} errors) in "
+            f"{self.seconds:.2f} s: {self.records / seconds:,.0f} expressions/s, "
+            f"{self.bytes_read / seconds / 1e6:.1f} MB/s, {self.workers} workers"
+        )
+
+
+def read_chunks(source, chunk_bytes=DEFAULT_CHUNK_BYTES):
+    """
+    Yields (first_line_number, data) blocks of about chunk_bytes from a
+    binary stream, each ending at a line break, without splitting lines.
+    """
+    line_number = 1
+    while True:
+        data = source.read(chunk_bytes)
+        if not data:
+            return
+        if not data.endswith(b"\n"):
+            data += source.readline()
+        yield line_number, data
+        line_number += data.count(b"\n")
+
+
+def evaluate_chunk(chunk, format="ndjson", non_finite="null"):
+    """
+    Evaluates each non-blank line of a chunk. Returns (output, records,
+    errors, bytes_read): one record per expression, in order, encoded by a
+    ResultWriter. Expressions that fail give error records with their line.
+    """
+    global _calculator
+    if _calculator is None:
+        _calculator = Calculator()
+    evaluate = _calculator.evaluate
+
+    first_line, data = chunk
+    lines = data.decode("utf-8", errors="replace").split("\n")
+    if lines[-1] == "":
+        lines.pop()  # After the final line break
+    output = io.BytesIO()
+    writer = ResultWriter(output, format, non_finite)
+    errors = 0
+    for offset, line in enumerate(lines):
+        expression = line.strip()
+        if not expression:
+            continue
+        try:
+            writer.write(expression, evaluate(expression))
+        except Exception as e:
+            # Whatever one expression raises (e.g. RecursionError) is that
+            # line's error record, not the end of the batch
+            errors += 1
+            writer.write_error(expression, e, first_line + offset)
+    writer.flush()
+    return output.getvalue(), writer.records, errors, len(data)
+
+
+def run_batch(
+    source,
+    output,
+    workers=None,
+    chunk_bytes=DEFAULT_CHUNK_BYTES,
+    format="ndjson",
+    non_finite="null",
+):
+    """
+    Evaluates every line of the binary stream source and writes one record
+    per expression (NDJSON or CSV, see ResultWriter) to the binary stream
+    output, in input order, as each chunk completes. Chunks fan out over a
+    pool of `workers` processes (default: one per CPU). At most
+    IN_FLIGHT_PER_WORKER chunks per worker are read ahead, so memory stays
+    flat for inputs of any size (Pool.imap would read the whole input
+    ahead). Returns the BatchStats.
+    """
+    workers = workers or os.cpu_count() or 1
+    stats = BatchStats(workers)
+    header = ResultWriter(output, format, non_finite)  # Also checks the options
+    header.write_header()
+    header.flush()
+    evaluate = partial(evaluate_chunk, format=format, non_finite=non_finite)
+
+    def write(data, records, errors, bytes_read):
+        output.write(data)
+        stats.add(records, errors, bytes_read)
+
+    chunks = read_chunks(source, chunk_bytes)
+    if workers == 1:
+        for chunk in chunks:
+            write(*evaluate(chunk))
+    else:
+        with Pool(workers) as pool:
+            pending = deque()
+            for chunk in chunks:
+                pending.append(pool.apply_async(evaluate, (chunk,)))
+                if len(pending) >= workers * IN_FLIGHT_PER_WORKER:
+                    write(*pending.popleft().get())
+            while pending:
+                write(*pending.popleft().get())
+    output.flush()
+    stats.finish()
+    return stats
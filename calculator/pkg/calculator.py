@@ -1,17 +1,49 @@
 # calculator.py
 
-import json
-import math # Import the math module
+import math  # Import the math module
+import operator
+import re
+from collections import OrderedDict
+from functools import partial
+
+NAME_PATTERN = re.compile(r"[a-zA-Z_][a-zA-Z0-9_]*")
+DEFAULT_CACHE_SIZE = 4096  # Compiled expressions kept by each Calculator
+
+# Kinds of the (kind, payload) steps in the folded code run by _run
+_VARIABLE, _BINARY, _FUNCTION = range(3)
+
+
+class CompiledExpression:
+    """
+    An expression parsed once into a flat postfix program (numbers, operator
+    and function names, variable names). Constant subexpressions are folded
+    ahead of time, so calling it only runs what is left, in a loop over a
+    value stack (no recursion, however long the expression). Created by
+    Calculator.compile.
+    """
+
+    __slots__ = ("expression", "program", "variables", "_function", "vector_function")
+
+    def __init__(self, expression, program, variables, function):
+        self.expression = expression
+        self.program = program
+        self.variables = variables  # Variable names, in order of first use
+        self._function = function
+        self.vector_function = None  # Built by Calculator.evaluate_many on first use
+
+    def __call__(self, variables=None):
+        if self.variables:
+            _check_bound(self.variables, variables)
+        return self._function(variables)
+
 
 class Calculator:
-    def __init__(self):
+    def __init__(self, cache_size=DEFAULT_CACHE_SIZE):
         self.operators = {
-            "+": lambda a, b: a + b,
-            "-": lambda a, b: a - b,
-            "*": lambda a, b: a * b,
-            "/": lambda a, b: self._divide(
-                a, b
-            ),  # Modified to use a helper method for division
+            "+": operator.add,
+            "-": operator.sub,
+            "*": operator.mul,
+            "/": self._divide,  # Modified to use a helper method for division
         }
         self.precedence = {
             "+": 1,
@@ -28,87 +60,250 @@ class Calculator:
             "cos": math.cos,
             "tan": math.tan,
         }
+        self.token_pattern = _token_pattern(self.functions)
+        # LRU cache of compiled expressions, keyed by the expression text
+        self.cache_size = cache_size
+        self._compiled = OrderedDict()
 
     def _divide(self, a, b):
         if b == 0:
             raise ValueError("division by zero")
         return a / b
 
-    def evaluate(self, expression):
+    def evaluate(self, expression, variables=None):
+        """
+        Evaluates expression to a float; `variables` maps the names used in it
+        (e.g. x in "sin(x) * 2") to numbers.
+        """
         if not expression or expression.isspace():
             return None
-        # Modified to tokenize expression to handle parentheses and multi-digit numbers
-        tokens = self._tokenize(expression)
-        return self._evaluate_infix(tokens)
+        return self.compile(expression)(variables)
+
+    def evaluate_many(self, expression, variables):
+        """
+        Evaluates expression once over whole arrays: `variables` maps each name
+        to a NumPy array or column (anything np.asarray accepts); constants
+        broadcast. Returns a float64 array. Uses the same operators and
+        functions (in degrees) as evaluate, and raises the same ValueError if
+        any row divides by zero. Needs NumPy.
+        """
+        import numpy as np
+
+        compiled = self.compile(expression)
+        if compiled.vector_function is None:
+            operators, functions = self._vector_tables(np)
+            compiled.vector_function = self._build(
+                compiled.program, operators, functions, np.radians
+            )
+        _check_bound(compiled.variables, variables)
+        columns = {
+            name: np.asarray(variables[name], dtype=np.float64)
+            for name in compiled.variables
+        }
+        shape = np.broadcast_shapes(*(column.shape for column in columns.values()))
+        result = np.asarray(compiled.vector_function(columns), dtype=np.float64)
+        if result.shape != shape:
+            result = np.broadcast_to(result, shape).copy()
+        return result
+
+    def _vector_tables(self, np):
+        """NumPy versions of self.operators and self.functions, by name."""
+        ufuncs = {"+": np.add, "-": np.subtract, "*": np.multiply}
+
+        def divide(a, b):
+            zero = np.flatnonzero(np.asarray(b) == 0)
+            if zero.size:
+                raise ValueError(f"division by zero (row {zero[0]})")
+            return np.true_divide(a, b)
+
+        operators = {}
+        for symbol, apply in self.operators.items():
+            if symbol == "/":
+                operators[symbol] = divide
+            else:
+                operators[symbol] = ufuncs.get(symbol) or np.vectorize(apply, otypes=[float])
+        functions = {
+            name: getattr(np, function.__name__, None)
+            or np.vectorize(function, otypes=[float])
+            for name, function in self.functions.items()
+        }
+        return operators, functions
+
+    def compile(self, expression):
+        """
+        Returns the CompiledExpression for expression, parsing it only the
+        first time (until it drops out of the LRU cache).
+        Raises ValueError for invalid expressions.
+        """
+        compiled = self._compiled.get(expression)
+        if compiled is not None:
+            self._compiled.move_to_end(expression)
+            return compiled
+
+        program = self._to_postfix(self._tokenize(expression))
+        variables = tuple(
+            dict.fromkeys(
+                instruction
+                for instruction in program
+                if instruction.__class__ is str
+                and instruction not in self.operators
+                and instruction not in self.functions
+            )
+        )
+        compiled = CompiledExpression(expression, program, variables, self._build(program))
+        if self.cache_size > 0:
+            self._compiled[expression] = compiled
+            if len(self._compiled) > self.cache_size:
+                self._compiled.popitem(last=False)
+        return compiled
 
     def _tokenize(self, expression):
-        # This is a basic tokenizer, a more robust solution might use regex
-        # It separates numbers, operators, and parentheses
-        import re
-
-        # Updated regex to also capture scientific function names
-        return [
-            token
-            for token in re.findall(r"(\d+\.?\d*|[a-zA-Z]+|\S)", expression)
-            if token.strip()
-        ]
-
-    def _evaluate_infix(self, tokens):
-        values = []
+        # It separates numbers, operators, names and parentheses
+        return self.token_pattern.findall(expression)
+
+    def _evaluate_infix(self, tokens, variables=None):
+        return self._build(self._to_postfix(tokens))(variables)
+
+    def _to_postfix(self, tokens):
+        """
+        Shunting-yard: turns infix tokens into a postfix program of floats and
+        operator/function names, checking operand counts on the way.
+        """
+        program = []
         operators = []
+        depth = 0  # Values on the stack when the program runs
+        binary, functions, precedence = self.operators, self.functions, self.precedence
+
+        def emit(depth):
+            # Moves the top operator to the program; returns the new depth
+            operator_token = operators.pop()
+            program.append(operator_token)
+            if operator_token in binary:
+                if depth < 2:
+                    raise ValueError(f"not enough operands for operator {operator_token}")
+                return depth - 1
+            if depth < 1:
+                raise ValueError(f"not enough operands for function {operator_token}")
+            return depth
 
         for token in tokens:
             if token == "(":
                 operators.append(token)
             elif token == ")":
                 while operators and operators[-1] != "(":
-                    self._apply_operator(operators, values)
-                if not operators or operators[-1] != "(":
+                    depth = emit(depth)
+                if not operators:
                     raise ValueError("mismatched parentheses")
                 operators.pop()  # Pop the '('
-            elif token in self.operators:
+            elif token in binary:
+                token_precedence = precedence.get(token, 0)
                 while (
                     operators
                     and operators[-1] != "("
-                    and self.precedence.get(operators[-1], 0)
-                    >= self.precedence.get(token, 0)
+                    and precedence.get(operators[-1], 0) >= token_precedence
                 ):
-                    self._apply_operator(operators, values)
+                    depth = emit(depth)
                 operators.append(token)
-            elif token in self.functions: # Handle scientific functions
+            elif token in functions: # Handle scientific functions
                 operators.append(token)
+            elif NAME_PATTERN.fullmatch(token):  # A variable
+                program.append(token)
+                depth += 1
             else:
                 try:
-                    values.append(float(token))
+                    program.append(float(token))
                 except ValueError:
                     raise ValueError(f"invalid token: {token}")
+                depth += 1
 
         while operators:
             if operators[-1] == "(":
                 raise ValueError("mismatched parentheses")
-            self._apply_operator(operators, values)
+            depth = emit(depth)
 
-        if len(values) != 1:
+        if depth != 1:
             raise ValueError("invalid expression")
 
-        return values[0]
-
-    def _apply_operator(self, operators, values):
-        if not operators:
-            return
-
-        operator = operators.pop()
-
-        if operator in self.operators:
-            if len(values) < 2:
-                raise ValueError(f"not enough operands for operator {operator}")
-            b = values.pop()
-            a = values.pop()
-            values.append(self.operators[operator](a, b))
-        elif operator in self.functions: # Apply scientific function
-            if len(values) < 1:
-                raise ValueError(f"not enough operands for function {operator}")
-            operand = values.pop()
-            # Functions like sin, cos, tan usually operate on degrees, so convert if needed
-            # Assuming input is in degrees for sin(90) example, otherwise use math.radians
-            values.append(self.functions[operator](math.radians(operand)))
+        return tuple(program)
+
+    def _build(self, program, operators=None, functions=None, radians=math.radians):
+        """
+        Folds the constant subexpressions of a postfix program and returns a
+        function of the variables mapping that runs the rest (see _run).
+        Operations that fail on constants (division by zero) are kept, so they
+        raise on every call. evaluate_many passes NumPy operator/function tables.
+        """
+        operators = self.operators if operators is None else operators
+        functions = self.functions if functions is None else functions
+        code = []  # Constants, and (kind, payload) steps that need the variables
+        emit, pop = code.append, code.pop
+        for instruction in program:
+            if instruction.__class__ is float:
+                emit(instruction)
+                continue
+            apply = operators.get(instruction)
+            if apply is not None:
+                # Two constants on top are exactly this operator's operands
+                if (
+                    len(code) >= 2
+                    and code[-1].__class__ is not tuple
+                    and code[-2].__class__ is not tuple
+                ):
+                    right = pop()
+                    try:
+                        code[-1] = apply(code[-1], right)
+                        continue
+                    except ValueError:
+                        emit(right)  # Kept, so it raises on every call
+                emit((_BINARY, apply))
+            elif instruction in functions:
+                # Functions like sin, cos, tan take degrees, as in sin(90) = 1
+                function = functions[instruction]
+                if code and code[-1].__class__ is not tuple:
+                    try:
+                        code[-1] = function(radians(code[-1]))
+                        continue
+                    except ValueError:
+                        pass
+                emit((_FUNCTION, function))
+            else:
+                emit((_VARIABLE, instruction))
+        if len(code) == 1 and code[0].__class__ is not tuple:
+            value = code[0]
+            return lambda variables: value
+        return partial(_run, tuple(code), radians)
+
+
+def _check_bound(names, variables):
+    missing = [name for name in names if variables is None or name not in variables]
+    if missing:
+        raise ValueError(f"unbound variable: {', '.join(missing)}")
+
+
+def _run(code, radians, variables):
+    """Runs folded postfix code on a value stack."""
+    stack = []
+    push, pop = stack.append, stack.pop
+    for step in code:
+        if step.__class__ is not tuple:
+            push(step)
+            continue
+        kind, payload = step
+        if kind == _VARIABLE:
+            push(variables[payload])
+        elif kind == _BINARY:
+            right = pop()
+            push(payload(pop(), right))
+        else:
+            push(payload(radians(pop())))
+    return stack[0]
+
+
+def _token_pattern(function_names):
+    """
+    Numbers, names (scientific functions and variables) and single-character
+    symbols. A function name directly followed by a digit is its own token, so
+    "sin2" is still sin(2) as before variables existed ("x2" is a variable).
+    """
+    functions = "|".join(sorted(map(re.escape, function_names), key=len, reverse=True))
+    return re.compile(rf"(\d+\.?\d*|(?:{functions})(?=\d)|[a-zA-Z_][a-zA-Z0-9_]*|\S)")
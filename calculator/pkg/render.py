@@ -1,6 +1,8 @@
 # render.py
 
 import json
+import math
+from json.encoder import encode_basestring_ascii as _json_string
 
 
 def format_json_output(expression: str, result: float, indent: int = 2) -> str:
@@ -14,3 +16,95 @@ def format_json_output(expression: str, result: float, indent: int = 2) -> str:
         "result": result_to_dump,
     }
     return json.dumps(output_data, indent=indent)
+
+
+NON_FINITE_POLICIES = ("null", "string", "error")
+WRITE_BUFFER_CHARS = 64 * 1024  # Text gathered before each write to the stream
+CSV_SPECIAL = frozenset(',"\r\n')
+
+
+class ResultWriter:
+    """
+    Streams (expression, result) records to a binary stream as compact
+    NDJSON ({"expression":"1 + 2","result":3} per line) or CSV
+    (expression,result,error). Records are formatted straight to text,
+    without building a dict per record, and written in large blocks; call
+    flush() when done. Results that are whole numbers are written as
+    integers, as in format_json_output. Infinite and NaN results (not valid
+    JSON) are written per non_finite: "null" (null / an empty CSV field),
+    "string" ("inf", "-inf", "nan") or "error" (raise ValueError).
+    """
+
+    def __init__(self, stream, format="ndjson", non_finite="null", buffer_chars=WRITE_BUFFER_CHARS):
+        if format not in ("ndjson", "csv"):
+            raise ValueError(f"unknown output format: {format}")
+        if non_finite not in NON_FINITE_POLICIES:
+            raise ValueError(f"unknown non-finite policy: {non_finite}")
+        self.stream = stream
+        self.format = format
+        self.non_finite = non_finite
+        self.buffer_chars = buffer_chars
+        self.records = 0
+        self._parts = []
+        self._size = 0
+
+    def write_header(self):
+        """Writes the CSV header row (NDJSON has none)."""
+        if self.format == "csv":
+            self._parts.append("expression,result,error\n")
+
+    def write(self, expression, result):
+        if self.format == "csv":
+            self._append(f"{_csv_field(expression)},{self._number(result, csv=True)},\n")
+        else:
+            number = self._number(result)
+            self._append(f'{{"expression":{_json_string(expression)},"result":{number}}}\n')
+
+    def write_error(self, expression, error, line=None):
+        """Writes a record for an expression that failed, with its input line number."""
+        if self.format == "csv":
+            self._append(f"{_csv_field(expression)},,{_csv_field(str(error))}\n")
+            return
+        prefix = "{" if line is None else f'{{"line":{line},'
+        self._append(
+            f'{prefix}"expression":{_json_string(expression)},"error":{_json_string(str(error))}}}\n'
+        )
+
+    def flush(self):
+        """Writes out the buffered records and flushes the stream."""
+        self._drain()
+        self.stream.flush()
+
+    def _append(self, text):
+        self.records += 1
+        self._parts.append(text)
+        self._size += len(text)
+        if self._size >= self.buffer_chars:
+            self._drain()
+
+    def _drain(self):
+        if self._parts:
+            self.stream.write("".join(self._parts).encode("utf-8"))
+            self._parts.clear()
+            self._size = 0
+
+    def _number(self, result, csv=False):
+        """The JSON (or CSV) text of a result."""
+        if result is None:
+            return "" if csv else "null"
+        if result.__class__ is int:
+            return str(result)
+        if math.isfinite(result):
+            return str(int(result)) if result.is_integer() else float.__repr__(float(result))
+        if self.non_finite == "null":
+            return "" if csv else "null"
+        if self.non_finite == "string":
+            name = "nan" if math.isnan(result) else ("inf" if result > 0 else "-inf")
+            return name if csv else f'"{name}"'
+        raise ValueError(f"result is not a finite number: {result}")
+
+
+def _csv_field(text):
+    if CSV_SPECIAL.isdisjoint(text):
+        return text
+    return '"' + text.replace('"', '""') + '"'
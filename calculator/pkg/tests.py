@@ -1,12 +1,21 @@
+import importlib.util
+import io
+import json
 import unittest
 import sys
 import os
+from unittest import mock
 
 # Add the parent directory of pkg to sys.path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+from pkg import batch
+from pkg.batch import run_batch
 from pkg.calculator import Calculator
-from pkg.render import format_json_output
+from pkg.render import ResultWriter, format_json_output
+
+# evaluate_many needs NumPy (optional); imported only by the tests using it
+HAS_NUMPY = importlib.util.find_spec("numpy") is not None
 
 
 class TestCalculator(unittest.TestCase):
@@ -55,6 +64,102 @@ class TestCalculator(unittest.TestCase):
         # Test combined expression
         self.assertAlmostEqual(self.calculator.evaluate("sin(30) + cos(60)"), 1.0, places=7)
 
+    def test_compiled_expression_is_cached(self):
+        compiled = self.calculator.compile("(1 + 2) * 3")
+        self.assertEqual(compiled.program, (1.0, 2.0, "+", 3.0, "*"))
+        self.assertIs(self.calculator.compile("(1 + 2) * 3"), compiled)
+        self.assertEqual(compiled(), 9.0)
+
+    def test_compile_cache_is_bounded(self):
+        calculator = Calculator(cache_size=2)
+        first = calculator.compile("1 + 1")
+        calculator.compile("2 + 2")
+        calculator.compile("1 + 1")  # Most recently used again
+        calculator.compile("3 + 3")  # Evicts "2 + 2"
+        self.assertEqual(len(calculator._compiled), 2)
+        self.assertIs(calculator.compile("1 + 1"), first)
+        self.assertNotIn("2 + 2", calculator._compiled)
+
+    def test_cached_zero_division_still_raises(self):
+        for _ in range(2):
+            with self.assertRaises(ValueError):
+                self.calculator.evaluate("2 * (3 / (1 - 1))")
+
+    def test_long_chain_does_not_recurse(self):
+        # Deeper than the recursion limit: evaluation must not nest calls
+        long_chain = "1/0" + "+1" * 3000
+        for _ in range(2):
+            with self.assertRaises(ValueError):
+                self.calculator.evaluate(long_chain)
+        self.assertEqual(self.calculator.evaluate("1" + "+1" * 3000), 3001.0)
+
+    def test_variables(self):
+        self.assertAlmostEqual(
+            self.calculator.evaluate("sin(x) * 2 + y", {"x": 90, "y": 1.5}), 3.5, places=7
+        )
+        self.assertEqual(self.calculator.compile("x * y + x").variables, ("x", "y"))
+        self.assertEqual(self.calculator.evaluate("rate_2 * 10", {"rate_2": 0.5}), 5.0)
+
+    def test_function_name_followed_by_a_number(self):
+        self.assertEqual(self.calculator._tokenize("sin2 + cos45"), ["sin", "2", "+", "cos", "45"])
+        self.assertAlmostEqual(self.calculator.evaluate("sin90"), 1.0, places=7)
+        self.assertAlmostEqual(self.calculator.evaluate("tan45 * 2"), 2.0, places=7)
+        # Other names with digits are variables, and sin_x is not a function call
+        self.assertEqual(self.calculator.evaluate("x2 + sin_x", {"x2": 1, "sin_x": 2}), 3.0)
+
+    def test_long_chain_of_variables(self):
+        self.assertEqual(self.calculator.evaluate("x" + "+x" * 3000, {"x": 1}), 3001.0)
+
+    def test_unbound_variable(self):
+        with self.assertRaises(ValueError):
+            self.calculator.evaluate("x + 1")
+        with self.assertRaises(ValueError):
+            self.calculator.evaluate("x + y", {"x": 1})
+
+    def test_zero_division_with_variables(self):
+        with self.assertRaises(ValueError):
+            self.calculator.evaluate("x / (y - 2)", {"x": 1, "y": 2})
+
+
+@unittest.skipUnless(HAS_NUMPY, "NumPy is not installed")
+class TestEvaluateMany(unittest.TestCase):
+
+    def setUp(self):
+        self.calculator = Calculator()
+
+    def test_matches_scalar_evaluation(self):
+        import numpy
+
+        x = numpy.array([0.0, 30.0, 90.0, 180.0])
+        y = numpy.array([1.0, 2.0, 3.0, 4.0])
+        results = self.calculator.evaluate_many("sin(x) * 2 + y / 4", {"x": x, "y": y})
+        for row, result in enumerate(results):
+            expected = self.calculator.evaluate(
+                "sin(x) * 2 + y / 4", {"x": x[row], "y": y[row]}
+            )
+            self.assertAlmostEqual(result, expected, places=12)
+
+    def test_constants_broadcast(self):
+        results = self.calculator.evaluate_many("x * 0 + (1 + 2) * 3", {"x": [1, 2, 3]})
+        self.assertEqual(results.tolist(), [9.0, 9.0, 9.0])
+
+    def test_zero_division(self):
+        with self.assertRaises(ValueError):
+            self.calculator.evaluate_many("x / y", {"x": [1, 2], "y": [1, 0]})
+        with self.assertRaises(ValueError):
+            self.calculator.evaluate_many("x / 0", {"x": [1, 2]})
+
+    def test_long_chain(self):
+        results = self.calculator.evaluate_many("x" + "+x" * 3000, {"x": [1, 2]})
+        self.assertEqual(results.tolist(), [3001.0, 6002.0])
+        with self.assertRaises(ValueError):
+            self.calculator.evaluate_many("x/0" + "+x" * 3000, {"x": [1, 2]})
+
+    def test_unbound_variable(self):
+        with self.assertRaises(ValueError):
+            self.calculator.evaluate_many("x + z", {"x": [1, 2]})
+
+
 class TestRender(unittest.TestCase):
 
     def test_json_output(self):
@@ -84,5 +189,101 @@ class TestRender(unittest.TestCase):
         self.assertEqual(format_json_output(expression, result), expected_output)
 
 
+class TestResultWriter(unittest.TestCase):
+
+    def written(self, pairs, **options):
+        output = io.BytesIO()
+        writer = ResultWriter(output, buffer_chars=32, **options)
+        writer.write_header()
+        for expression, result in pairs:
+            writer.write(expression, result)
+        writer.flush()
+        return output.getvalue().decode("utf-8")
+
+    def test_ndjson_matches_format_json_output(self):
+        pairs = [("3 + 5", 8.0), ("7 / 2", 3.5), ("10 / 3", 10 / 3), ('"q"', -0.25)]
+        lines = self.written(pairs).splitlines()
+        self.assertEqual(lines[0], '{"expression":"3 + 5","result":8}')
+        for line, (expression, result) in zip(lines, pairs):
+            self.assertEqual(json.loads(line), json.loads(format_json_output(expression, result)))
+
+    def test_non_finite_results(self):
+        pairs = [("a", float("inf")), ("b", float("-inf")), ("c", float("nan"))]
+        self.assertEqual(
+            self.written(pairs),
+            '{"expression":"a","result":null}\n'
+            '{"expression":"b","result":null}\n'
+            '{"expression":"c","result":null}\n',
+        )
+        self.assertEqual(
+            [json.loads(line)["result"] for line in self.written(pairs, non_finite="string").splitlines()],
+            ["inf", "-inf", "nan"],
+        )
+        with self.assertRaises(ValueError):
+            self.written(pairs, non_finite="error")
+
+    def test_csv(self):
+        output = io.BytesIO()
+        writer = ResultWriter(output, format="csv")
+        writer.write_header()
+        writer.write("1 + 2", 3.0)
+        writer.write('2, "3"', float("inf"))
+        writer.write_error("3 / 0", ValueError("division by zero"), line=3)
+        writer.flush()
+        self.assertEqual(
+            output.getvalue().decode("utf-8"),
+            'expression,result,error\n1 + 2,3,\n"2, ""3""",,\n3 / 0,,division by zero\n',
+        )
+        self.assertEqual(writer.records, 3)
+
+
+class TestBatch(unittest.TestCase):
+
+    def run_lines(self, lines, **options):
+        source = io.BytesIO("\n".join(lines).encode("utf-8"))
+        output = io.BytesIO()
+        stats = run_batch(source, output, **options)
+        records = [json.loads(line) for line in output.getvalue().decode("utf-8").splitlines()]
+        return records, stats
+
+    def test_records_in_order_with_errors(self):
+        lines = ["1 + 2", "", "3 / 0", "2 * (3", "1.5 * 3"] * 50
+        records, stats = self.run_lines(lines, workers=1, chunk_bytes=64)
+        self.assertEqual(stats.records, 200)
+        self.assertEqual(stats.errors, 100)
+        self.assertEqual(records[0], {"expression": "1 + 2", "result": 3})
+        self.assertEqual(records[0], json.loads(format_json_output("1 + 2", 3.0)))
+        self.assertEqual(
+            records[1], {"line": 3, "expression": "3 / 0", "error": "division by zero"}
+        )
+        self.assertEqual(records[2]["line"], 4)
+        self.assertEqual(records[-1], {"expression": "1.5 * 3", "result": 4.5})
+        self.assertEqual(records[-3]["line"], len(lines) - 2)
+
+    def test_any_expression_error_is_a_record(self):
+        calculator = Calculator()
+
+        def overflow(a, b):
+            raise RecursionError("maximum recursion depth exceeded")
+
+        calculator.operators["*"] = overflow
+        lines = ["1 + 2", "1/0" + "+1" * 3000, "2 * 3", "4 - 1"]
+        with mock.patch.object(batch, "_calculator", calculator):
+            records, stats = self.run_lines(lines, workers=1)
+        self.assertEqual(stats.records, 4)
+        self.assertEqual(stats.errors, 2)
+        self.assertEqual(records[1]["line"], 2)
+        self.assertEqual(
+            records[2], {"line": 3, "expression": "2 * 3", "error": "maximum recursion depth exceeded"}
+        )
+        self.assertEqual(records[3], {"expression": "4 - 1", "result": 3})
+
+    def test_process_pool_keeps_order(self):
+        lines = [f"{i} * 2" for i in range(2000)]
+        records, stats = self.run_lines(lines, workers=2, chunk_bytes=256)
+        self.assertEqual([record["result"] for record in records], [i * 2 for i in range(2000)])
+        self.assertEqual(stats.errors, 0)
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,89 @@
+import os
+import threading
+from collections import OrderedDict
+from functions.config import CACHE_MAX_ENTRIES
+
+
+def file_signature(path):
+    """
+    Returns (mtime_ns, size) of a path, or None if it cannot be stat'ed.
+    A cached result is only reused while the signature is unchanged.
+    """
+    try:
+        stats = os.stat(path)
+    except OSError:
+        return None
+    return (stats.st_mtime_ns, stats.st_size)
+
+
+class ToolCache:
+    """
+    Bounded LRU cache for the read-side tools (file contents, line indexes,
+    project description). Entries are keyed on (kind, absolute path, variant)
+    and validated against the path's (mtime, size) on every lookup.
+    write_file/delete_file invalidate the touched path right away.
+    Directory listings use the persistent index in file_index.py instead.
+    Safe to use from the concurrent tool dispatcher.
+    """
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # (kind, path, variant) -> (signature, value)
+        self._lock = threading.Lock()
+        self._local = threading.local()  # Per-thread hits/misses, for tracing
+
+    def get_or_compute(self, kind, path, compute, variant=None):
+        """
+        Returns the cached value for (kind, path, variant) if the file is
+        unchanged, otherwise calls compute() and caches its result.
+        Exceptions raised by compute() are not cached.
+        """
+        key = (kind, path, variant)
+        signature = file_signature(path)
+
+        with self._lock:
+            cached = self._entries.get(key)
+            if signature is not None and cached and cached[0] == signature:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                self._local.hits = self.thread_counts()[0] + 1
+                return cached[1]
+            self.misses += 1
+            self._local.misses = self.thread_counts()[1] + 1
+
+        value = compute()
+
+        if signature is not None:
+            with self._lock:
+                self._entries[key] = (signature, value)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+
+        return value
+
+    def invalidate(self, path):
+        """Drops cached results for path itself or anything under it."""
+        path = os.path.abspath(path)
+        with self._lock:
+            for key in list(self._entries):
+                cached_path = key[1]
+                if cached_path == path or cached_path.startswith(path + os.sep):
+                    del self._entries[key]
+
+    def thread_counts(self):
+        """(hits, misses) of lookups made by the calling thread so far."""
+        return getattr(self._local, "hits", 0), getattr(self._local, "misses", 0)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        return f"hits: {self.hits}, misses: {self.misses}, entries: {len(self._entries)}"
+
+
+# Shared by all tools in the process
+tool_cache = ToolCache()
@@ -1 +1,11 @@
-MAX_CHARS = 10000
+MAX_CHARS = 10000  # Max chars of one tool result (file reads, encoded results)
+CACHE_MAX_ENTRIES = 256  # Max results kept by the read-side tool cache
+
+# run_python_file limits; the rlimits only apply where the resource module exists (POSIX)
+RUN_TIMEOUT_SECONDS = 30  # Wall clock
+RUN_CPU_SECONDS = 30  # RLIMIT_CPU
+RUN_MEMORY_BYTES = None  # RLIMIT_AS (address space), opt-in with --run-memory-mb
+RUN_OPEN_FILES = 256  # RLIMIT_NOFILE
+RUN_FILE_SIZE_BYTES = 256 * 1024 * 1024  # RLIMIT_FSIZE, warm runs only (output goes to temp files)
+RUN_OUTPUT_HEAD_BYTES = 1500  # Kept from the start of stdout / stderr
+RUN_OUTPUT_TAIL_BYTES = 3500  # Kept from the end (tracebacks, summaries)
@@ -1,5 +1,7 @@
 import os
 from google.genai import types
+from functions.cache import tool_cache
+from functions.search_code import update_search_index
 
 
 def delete_file(working_directory, file_path):
@@ -27,6 +29,8 @@ def delete_file(working_directory, file_path):
 
     try:
         os.remove(target_file_abs)
+        tool_cache.invalidate(target_file_abs)
+        update_search_index(working_directory, target_file_abs)
         return f'Successfully deleted "{file_path}".'
     except PermissionError:
         return f'Error: Permission denied while deleting "{file_path}".'
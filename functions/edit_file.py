@@ -0,0 +1,235 @@
+import os
+import re
+from google.genai import types
+from functions.cache import tool_cache
+from functions.search_code import update_search_index
+from functions.write_file import atomic_write
+
+HUNK_HEADER = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+
+
+class PatchError(Exception):
+    """A hunk does not apply to the current file content."""
+
+
+def edit_file(working_directory, file_path, patch=None, edits=None):
+    """
+    Applies a small change to an existing file instead of rewriting it.
+    Accepts either a unified diff (patch) or a list of search/replace edits
+    ({"search": ..., "replace": ...}, each search must match exactly once).
+    All hunks are validated against the current content before anything is
+    written, and the file is replaced atomically (temp file + rename).
+    Returns success message or error string.
+    """
+
+    # Normalize paths
+    working_directory_abs = os.path.abspath(working_directory)
+    target_file_abs = os.path.abspath(os.path.join(working_directory, file_path))
+
+    # 1. Validate scope
+    if not target_file_abs.startswith(working_directory_abs):
+        return f'Error: Cannot edit "{file_path}" as it is outside the permitted working directory'
+
+    # 2. Validate file exists
+    if not os.path.isfile(target_file_abs):
+        return f'Error: File not found or is not a regular file: "{file_path}". Use write_file to create it.'
+
+    # 3. Validate arguments
+    if bool(patch) == bool(edits):
+        return "Error: Provide exactly one of 'patch' (unified diff) or 'edits' (search/replace list)."
+
+    try:
+        with open(target_file_abs, "r", encoding="utf-8", newline="") as f:
+            original = f.read()
+    except Exception as e:
+        return f"Error: Failed to read {file_path}: {e}"
+
+    # Edits are made on "\n" text; CRLF files keep their line endings
+    crlf = "\r\n" in original
+    content = original.replace("\r\n", "\n") if crlf else original
+
+    try:
+        if patch:
+            content, added, removed, applied = apply_unified_diff(content, patch)
+        else:
+            content, added, removed, applied = apply_search_replace(content, edits)
+    except PatchError as e:
+        return f'Error: Patch does not apply to "{file_path}" (file left unchanged): {e}'
+
+    if crlf:
+        content = content.replace("\n", "\r\n")
+
+    # 4. Write atomically so readers never see a half-written file
+    try:
+        atomic_write(target_file_abs, content, newline="")
+        tool_cache.invalidate(target_file_abs)
+        update_search_index(working_directory, target_file_abs)
+    except Exception as e:
+        return f"Error: Failed to write to {file_path}: {e}"
+
+    return (
+        f'Successfully edited "{file_path}": applied {applied} hunk(s) '
+        f"(+{added}/-{removed} lines)"
+    )
+
+
+def apply_search_replace(content, edits):
+    """Applies search/replace edits in order. Returns (content, added, removed, count)."""
+    added = removed = 0
+    for number, edit in enumerate(edits, start=1):
+        search = edit.get("search", "")
+        replace = edit.get("replace", "")
+        if not search:
+            raise PatchError(f"edit {number} has an empty 'search' text")
+        matches = content.count(search)
+        if matches != 1:
+            raise PatchError(
+                f"edit {number}: 'search' text found {matches} times, it must match exactly once"
+                + ("; include more surrounding lines" if matches else "")
+            )
+        # Count the whole lines around the match that actually changed
+        start = content.index(search)
+        end = start + len(search)
+        line_start = content.rfind("\n", 0, start) + 1
+        line_end = content.find("\n", end)
+        if line_end == -1:
+            line_end = len(content)
+        old_block = content[line_start:line_end].split("\n")
+        new_block = (content[line_start:start] + replace + content[end:line_end]).split("\n")
+        block_added, block_removed = _changed_lines(old_block, new_block)
+        added += block_added
+        removed += block_removed
+        content = content[:start] + replace + content[end:]
+    return content, added, removed, len(edits)
+
+
+def _changed_lines(old_block, new_block):
+    """(added, removed) counts, leaving out the lines both blocks start or end with."""
+    shortest = min(len(old_block), len(new_block))
+    head = 0
+    while head < shortest and old_block[head] == new_block[head]:
+        head += 1
+    tail = 0
+    while tail < shortest - head and old_block[-1 - tail] == new_block[-1 - tail]:
+        tail += 1
+    return len(new_block) - head - tail, len(old_block) - head - tail
+
+
+def parse_unified_diff(patch):
+    """Returns a list of [old_start, old_lines, new_lines, added, removed] hunks."""
+    hunks = []
+    current = None
+    patch_lines = patch.replace("\r\n", "\n").split("\n")
+    if patch_lines and patch_lines[-1] == "":
+        patch_lines.pop()  # Newline ending the patch text, not an empty context line
+
+    for line in patch_lines:
+        header = HUNK_HEADER.match(line)
+        if header:
+            old_start = int(header.group(1))
+            if header.group(2) == "0":
+                # A pure insertion ("-5,0") names the line it goes after, not the first line
+                old_start += 1
+            current = [old_start, [], [], 0, 0]
+            hunks.append(current)
+        elif current is None or line.startswith(("--- ", "+++ ", "\\")):
+            continue  # File headers, "\ No newline at end of file"
+        elif line.startswith("-"):
+            current[1].append(line[1:])
+            current[4] += 1
+        elif line.startswith("+"):
+            current[2].append(line[1:])
+            current[3] += 1
+        else:
+            # Context line (some editors strip the leading space of empty ones)
+            current[1].append(line[1:])
+            current[2].append(line[1:])
+
+    if not hunks:
+        raise PatchError("no '@@ -a,b +c,d @@' hunk headers found")
+    return hunks
+
+
+def _find_block(lines, block, expected, start):
+    """Index where block matches lines, preferring the one nearest to expected."""
+    if not block:
+        return min(max(expected, start), len(lines))
+    candidates = [
+        index
+        for index in range(start, len(lines) - len(block) + 1)
+        if lines[index : index + len(block)] == block
+    ]
+    if not candidates:
+        return None
+    return min(candidates, key=lambda index: abs(index - expected))
+
+
+def apply_unified_diff(content, patch):
+    """Applies unified diff hunks in order. Returns (content, added, removed, count)."""
+    lines = content.split("\n")
+    hunks = parse_unified_diff(patch)
+    total_added = total_removed = 0
+    offset = 0  # Shift caused by earlier hunks
+    search_from = 0
+
+    for number, (old_start, old_lines, new_lines, added, removed) in enumerate(
+        hunks, start=1
+    ):
+        expected = max(old_start - 1, 0) + offset
+        index = _find_block(lines, old_lines, expected, search_from)
+        if index is None:
+            preview = "\n".join(old_lines[:5])
+            raise PatchError(
+                f"hunk {number} (line {old_start}) does not match the current content; "
+                f"expected:\n{preview}"
+            )
+        lines[index : index + len(old_lines)] = new_lines
+        offset += len(new_lines) - len(old_lines)
+        search_from = index + len(new_lines)
+        total_added += added
+        total_removed += removed
+
+    return "\n".join(lines), total_added, total_removed, len(hunks)
+
+
+# --- Gemini / LLM Function Schema ---
+schema_edit_file = types.FunctionDeclaration(
+    name="edit_file",
+    description=(
+        "Edits an existing file by applying a unified diff or search/replace edits, "
+        "instead of rewriting the whole file. Every hunk must match the current content; "
+        "nothing is written if any hunk fails. Prefer this over write_file for small changes."
+    ),
+    parameters=types.Schema(
+        type=types.Type.OBJECT,
+        properties={
+            "file_path": types.Schema(
+                type=types.Type.STRING,
+                description="The path of the file to edit, relative to the working directory.",
+            ),
+            "patch": types.Schema(
+                type=types.Type.STRING,
+                description="A unified diff with '@@ -a,b +c,d @@' hunks and context lines.",
+            ),
+            "edits": types.Schema(
+                type=types.Type.ARRAY,
+                description="Search/replace edits applied in order. Each 'search' must match exactly once.",
+                items=types.Schema(
+                    type=types.Type.OBJECT,
+                    properties={
+                        "search": types.Schema(
+                            type=types.Type.STRING,
+                            description="Exact existing text to replace, with enough context to be unique.",
+                        ),
+                        "replace": types.Schema(
+                            type=types.Type.STRING,
+                            description="Text to put in its place.",
+                        ),
+                    },
+                    required=["search", "replace"],
+                ),
+            ),
+        },
+        required=["file_path"],
+    ),
+)
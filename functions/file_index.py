@@ -0,0 +1,320 @@
+import fnmatch
+import json
+import os
+import re
+import threading
+
+INDEX_DIR = ".codecrafter"
+INDEX_FILE = "files_index.json"
+INDEX_VERSION = 1
+
+# Never listed or descended into, whatever .gitignore says
+DEFAULT_EXCLUDES = [
+    ".git/",
+    ".hg/",
+    ".svn/",
+    ".venv/",
+    "venv/",
+    "node_modules/",
+    "__pycache__/",
+    ".mypy_cache/",
+    ".pytest_cache/",
+    ".ruff_cache/",
+    ".tox/",
+    INDEX_DIR + "/",
+]
+
+
+def _translate(pattern):
+    """Translates a gitignore glob (with ** support) to a regex string."""
+    parts = []
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith("**/", i):
+            parts.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("**", i):
+            parts.append(".*")
+            i += 2
+        elif pattern[i] == "*":
+            parts.append("[^/]*")
+            i += 1
+        elif pattern[i] == "?":
+            parts.append("[^/]")
+            i += 1
+        elif pattern[i] == "[":
+            end = pattern.find("]", i + 1)
+            if end == -1:
+                parts.append(re.escape("["))
+                i += 1
+            else:
+                parts.append(fnmatch.translate(pattern[i : end + 1])[4:-3])
+                i = end + 1
+        else:
+            parts.append(re.escape(pattern[i]))
+            i += 1
+    return "".join(parts)
+
+
+class IgnoreRules:
+    """
+    .gitignore-style rules: globs with * ? [] and **, "!" negation, a trailing
+    "/" for directories only, and patterns containing "/" anchored to the root.
+    The last matching rule wins.
+    """
+
+    def __init__(self, patterns=()):
+        self.rules = []
+        self.patterns = []
+        for pattern in patterns:
+            self.add(pattern)
+
+    def add(self, pattern):
+        pattern = pattern.rstrip("\n").rstrip()
+        if not pattern or pattern.startswith("#"):
+            return
+        self.patterns.append(pattern)
+        negate = pattern.startswith("!")
+        if negate:
+            pattern = pattern[1:]
+        dir_only = pattern.endswith("/")
+        pattern = pattern.strip("/") if dir_only else pattern
+        anchored = pattern.startswith("/") or "/" in pattern.lstrip("/")
+        pattern = pattern.lstrip("/")
+        prefix = "" if anchored else "(?:.*/)?"
+        regex = re.compile(f"^{prefix}{_translate(pattern)}$")
+        self.rules.append((regex, negate, dir_only))
+
+    def ignored(self, relative_path, is_dir):
+        result = False
+        for regex, negate, dir_only in self.rules:
+            if dir_only and not is_dir:
+                continue
+            if regex.match(relative_path):
+                result = not negate
+        return result
+
+    def excludes(self, relative_path):
+        """True if the file or any directory above it is ignored."""
+        parts = relative_path.split("/")
+        for depth in range(1, len(parts)):
+            if self.ignored("/".join(parts[:depth]), True):
+                return True
+        return self.ignored(relative_path, False)
+
+
+def load_ignore_rules(working_directory_abs, extra_patterns=()):
+    """Default excludes, the root .gitignore, then any extra patterns."""
+    rules = IgnoreRules(DEFAULT_EXCLUDES)
+    try:
+        with open(
+            os.path.join(working_directory_abs, ".gitignore"), "r", encoding="utf-8"
+        ) as f:
+            for line in f:
+                rules.add(line)
+    except OSError:
+        pass
+    for pattern in extra_patterns:
+        rules.add(pattern)
+    return rules
+
+
+class FileIndex:
+    """
+    Persistent index of the files under a working directory, stored in
+    <working_directory>/.codecrafter/files_index.json.
+    Each directory entry remembers the directory's mtime; a refresh only
+    re-lists (os.scandir) directories whose mtime changed. Editing a file in
+    place changes its size/mtime but not its directory's, so callers re-stat
+    just the files they return (restat) instead of every indexed file.
+    """
+
+    def __init__(self, working_directory_abs):
+        self.root = working_directory_abs
+        self.path = os.path.join(self.root, INDEX_DIR, INDEX_FILE)
+        self.lock = threading.Lock()
+        self.rules = None
+        self._rules_signature = None
+        self.dirs = {}  # relative dir -> {"mtime_ns", "files": {name: [size, mtime_ns]}, "subdirs": [...]}
+        self._dirty = False
+        self._load()
+
+    def _ignore_signature(self):
+        try:
+            stats = os.stat(os.path.join(self.root, ".gitignore"))
+            return [stats.st_mtime_ns, stats.st_size]
+        except OSError:
+            return None
+
+    def _load(self):
+        self.rules = load_ignore_rules(self.root)
+        self._rules_signature = self._ignore_signature()
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        # Different ignore rules change what is indexed: start over
+        if (
+            data.get("version") == INDEX_VERSION
+            and data.get("ignore_signature") == self._ignore_signature()
+        ):
+            self.dirs = data.get("dirs", {})
+
+    def save(self):
+        if not self._dirty:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            temp_path = self.path + ".tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(
+                    {
+                        "version": INDEX_VERSION,
+                        "ignore_signature": self._ignore_signature(),
+                        "dirs": self.dirs,
+                    },
+                    f,
+                    separators=(",", ":"),
+                )
+            os.replace(temp_path, self.path)
+            self._dirty = False
+        except OSError:
+            pass  # The index is only an optimization
+
+    def _scan_dir(self, relative_dir, mtime_ns):
+        absolute_dir = os.path.join(self.root, relative_dir)
+        files = {}
+        subdirs = []
+        with os.scandir(absolute_dir) as entries:
+            for entry in entries:
+                relative = entry.name if relative_dir == "." else f"{relative_dir}/{entry.name}"
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if not self.rules.ignored(relative, True):
+                            subdirs.append(entry.name)
+                    elif entry.is_file():
+                        if not self.rules.ignored(relative, False):
+                            stats = entry.stat()
+                            files[entry.name] = [stats.st_size, stats.st_mtime_ns]
+                except OSError:
+                    continue
+        subdirs.sort()
+        return {"mtime_ns": mtime_ns, "files": files, "subdirs": subdirs}
+
+    def _forget(self, relative_dir):
+        prefix = relative_dir + "/"
+        for key in [k for k in self.dirs if k == relative_dir or k.startswith(prefix)]:
+            del self.dirs[key]
+
+    def refresh(self, relative_dir=".", max_depth=None):
+        """
+        Brings the index up to date below relative_dir (down to max_depth
+        directory levels, 1 = the directory itself). Call with the lock held.
+        """
+        if self._ignore_signature() != self._rules_signature:
+            # .gitignore changed since the rules were read: re-index everything
+            self.rules = load_ignore_rules(self.root)
+            self._rules_signature = self._ignore_signature()
+            self.dirs = {}
+            self._dirty = True
+
+        stack = [(relative_dir, 1)]
+        while stack:
+            current, depth = stack.pop()
+            try:
+                mtime_ns = os.stat(os.path.join(self.root, current)).st_mtime_ns
+            except OSError:
+                self._forget(current)
+                self._dirty = True
+                continue
+
+            entry = self.dirs.get(current)
+            if entry is None or entry["mtime_ns"] != mtime_ns:
+                entry = self._scan_dir(current, mtime_ns)
+                old = self.dirs.get(current)
+                if old:
+                    for removed in set(old["subdirs"]) - set(entry["subdirs"]):
+                        self._forget(removed if current == "." else f"{current}/{removed}")
+                self.dirs[current] = entry
+                self._dirty = True
+
+            if max_depth is None or depth < max_depth:
+                for name in entry["subdirs"]:
+                    child = name if current == "." else f"{current}/{name}"
+                    stack.append((child, depth + 1))
+
+    def restat(self, paths):
+        """
+        Stats the given indexed files again and updates their entries.
+        Returns their fresh (path, size, mtime_ns); files gone since are
+        dropped. Call with the lock held.
+        """
+        results = []
+        for path in paths:
+            relative_dir, _, name = path.rpartition("/")
+            files = self.dirs.get(relative_dir or ".", {}).get("files", {})
+            try:
+                stats = os.stat(os.path.join(self.root, path))
+            except OSError:
+                if files.pop(name, None) is not None:
+                    self._dirty = True
+                continue
+            fresh = [stats.st_size, stats.st_mtime_ns]
+            if name in files and files[name] != fresh:
+                files[name] = fresh
+                self._dirty = True
+            results.append((path, stats.st_size, stats.st_mtime_ns))
+        return results
+
+    def iter_files(self, relative_dir=".", max_depth=None):
+        """Yields (relative path, size, mtime_ns) from the index, sorted by path."""
+        stack = [(relative_dir, 1)]
+        results = []
+        while stack:
+            current, depth = stack.pop()
+            entry = self.dirs.get(current)
+            if entry is None:
+                continue
+            for name, (size, mtime_ns) in entry["files"].items():
+                path = name if current == "." else f"{current}/{name}"
+                results.append((path, size, mtime_ns))
+            if max_depth is None or depth < max_depth:
+                for name in entry["subdirs"]:
+                    stack.append((name if current == "." else f"{current}/{name}", depth + 1))
+        results.sort()
+        return results
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_file_index(working_directory):
+    """The shared FileIndex of a working directory (loaded from disk once)."""
+    working_directory_abs = os.path.abspath(working_directory)
+    with _indexes_lock:
+        index = _indexes.get(working_directory_abs)
+        if index is None:
+            index = FileIndex(working_directory_abs)
+            _indexes[working_directory_abs] = index
+        return index
+
+
+def list_files(working_directory, relative_dir=".", max_depth=None):
+    """Refreshes the index below relative_dir and returns its (path, size, mtime_ns) list."""
+    index = get_file_index(working_directory)
+    with index.lock:
+        index.refresh(relative_dir, max_depth)
+        files = index.iter_files(relative_dir, max_depth)
+        index.save()
+    return files
+
+
+def restat_files(working_directory, paths):
+    """Re-stats indexed files (e.g. one page of a listing) and returns their (path, size, mtime_ns)."""
+    index = get_file_index(working_directory)
+    with index.lock:
+        files = index.restat(paths)
+        index.save()
+    return files
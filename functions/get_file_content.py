@@ -1,13 +1,31 @@
 import os
+import mmap
+import codecs
+from array import array
+from bisect import bisect_left
 from google.genai import types
+from functions.cache import tool_cache
+from functions.config import MAX_CHARS
 
-MAX_FILE_CHARS = 10000  # Max chars to read from a file
+MAX_FILE_CHARS = MAX_CHARS  # Max chars to read from a file
+INDEX_BLOCK_SIZE = 1 << 16  # Bytes per block of the line-offset index
 
 
-def get_file_content(working_directory, file_path):
+def get_file_content(
+    working_directory,
+    file_path,
+    start_line=None,
+    end_line=None,
+    offset=None,
+    length=None,
+):
     """
     Reads a file within the working_directory safely.
-    Returns file contents (truncated if too long) or error string.
+    Without a range, returns the start of the file (truncated if too long).
+    With start_line/end_line (1-based, inclusive) or offset/length (bytes),
+    returns only that part, preceded by the file's total size and line count
+    so the caller can page through it. Files are memory-mapped, so only the
+    requested bytes are read. Returns file contents or error string.
     """
 
     # Normalize paths
@@ -23,15 +41,25 @@ def get_file_content(working_directory, file_path):
         return f'Error: File not found or is not a regular file: "{file_path}"'
 
     try:
-        with open(target_file_abs, "r", encoding="utf-8") as f:
-            content = f.read()
+        if start_line is not None or end_line is not None:
+            return _read_lines(target_file_abs, file_path, start_line, end_line)
+        if offset is not None or length is not None:
+            return _read_bytes(target_file_abs, file_path, offset, length)
+
+        # Re-reads only when the file's mtime/size changed since the last call
+        content, truncated = tool_cache.get_or_compute(
+            "content", target_file_abs, lambda: _read_file(target_file_abs)
+        )
 
         # 3. Truncate if too long
-        if len(content) > MAX_FILE_CHARS:
+        if truncated:
+            index = _line_index(target_file_abs)
             truncated_msg = (
-                f'\n[...File "{file_path}" truncated at {MAX_FILE_CHARS} characters]'
+                f'\n[...File "{file_path}" truncated at {MAX_FILE_CHARS} characters. '
+                f"Total: {index.size} bytes, {index.line_count} lines. "
+                "Use start_line/end_line or offset/length to read the rest.]"
             )
-            content = content[:MAX_FILE_CHARS] + truncated_msg
+            content = content + truncated_msg
 
         return content
 
@@ -39,6 +67,146 @@ def get_file_content(working_directory, file_path):
         return f"Error: {e}"
 
 
+class LineIndex:
+    """
+    Sparse line-offset index of a file: the number of newlines before each
+    INDEX_BLOCK_SIZE block. Finding a line's offset only scans one block.
+    """
+
+    def __init__(self, mapped, size):
+        self.size = size
+        self.newlines_before = array("Q")
+        newlines = 0
+        for block_start in range(0, size, INDEX_BLOCK_SIZE):
+            self.newlines_before.append(newlines)
+            newlines += mapped[block_start : block_start + INDEX_BLOCK_SIZE].count(b"\n")
+        self.newlines = newlines
+        ends_with_newline = size > 0 and mapped[size - 1 : size] == b"\n"
+        self.line_count = newlines + (1 if size and not ends_with_newline else 0)
+
+    def line_offset(self, mapped, line):
+        """Byte offset where 0-based line `line` starts (size if past the end)."""
+        if line <= 0:
+            return 0
+        if line > self.newlines:
+            return self.size
+        # The block holding the line-th newline, then scan within it
+        block = bisect_left(self.newlines_before, line) - 1
+        position = block * INDEX_BLOCK_SIZE - 1
+        for _ in range(line - self.newlines_before[block]):
+            position = mapped.find(b"\n", position + 1)
+        return position + 1
+
+
+def _open_mapped(target_file_abs):
+    """Returns (file, mmap) or (None, None) for an empty file."""
+    f = open(target_file_abs, "rb")
+    if os.fstat(f.fileno()).st_size == 0:
+        f.close()
+        return None, None
+    return f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _line_index(target_file_abs):
+    """The file's LineIndex, cached until its mtime/size changes."""
+
+    def build():
+        f, mapped = _open_mapped(target_file_abs)
+        if mapped is None:
+            return LineIndex(b"", 0)
+        with f, mapped:
+            return LineIndex(mapped, len(mapped))
+
+    return tool_cache.get_or_compute("line_index", target_file_abs, build)
+
+
+def _decode(data, errors="strict"):
+    # An incomplete character at the end of the range is dropped, not an error
+    text = codecs.getincrementaldecoder("utf-8")(errors=errors).decode(data)
+    return text.replace("\r\n", "\n").replace("\r", "\n")
+
+
+def _read_file(target_file_abs):
+    """Returns (content cut at MAX_FILE_CHARS, whether it was cut)."""
+    f, mapped = _open_mapped(target_file_abs)
+    if mapped is None:
+        return "", False
+    with f, mapped:
+        # At most 4 bytes per character, so this always covers MAX_FILE_CHARS
+        data = mapped[: MAX_FILE_CHARS * 4 + 1]
+        content = _decode(data)
+        truncated = len(content) > MAX_FILE_CHARS or len(data) < len(mapped)
+    return content[:MAX_FILE_CHARS], truncated
+
+
+def _read_lines(target_file_abs, file_path, start_line, end_line):
+    index = _line_index(target_file_abs)
+    start_line = max(1, int(start_line or 1))
+    if end_line is None:
+        end_line = index.line_count
+    end_line = min(int(end_line), index.line_count)
+    header = f'[File "{file_path}": {index.size} bytes, {index.line_count} lines total]'
+    if start_line > end_line:
+        return f"{header}\n[No lines in range {start_line}-{end_line}]"
+
+    f, mapped = _open_mapped(target_file_abs)
+    with f, mapped:
+        begin = index.line_offset(mapped, start_line - 1)
+        end = index.line_offset(mapped, end_line)
+        content = _decode(mapped[begin : min(end, begin + MAX_FILE_CHARS * 4)])
+
+    shown_end = end_line
+    note = ""
+    if len(content) > MAX_FILE_CHARS or end - begin > MAX_FILE_CHARS * 4:
+        content = content[:MAX_FILE_CHARS]
+        if "\n" not in content:
+            # Not even the first line fits: the rest of it can only be read by bytes.
+            # No line break was decoded, so no \r was either: the text is the raw bytes.
+            shown = len(content.encode("utf-8"))
+            note = (
+                f"\n[...Line {start_line} is longer than {MAX_FILE_CHARS} characters. "
+                f"Continue with offset={begin + shown}.]"
+            )
+            return f"{header}\n[Line {start_line}, first {shown} bytes]\n{content}{note}"
+        # Only report complete lines as shown
+        content = content[: content.rfind("\n") + 1]
+        shown_end = start_line + content.count("\n") - 1
+        note = (
+            f"\n[...Range truncated at {MAX_FILE_CHARS} characters. "
+            f"Continue with start_line={shown_end + 1}.]"
+        )
+    return f"{header}\n[Lines {start_line}-{shown_end}]\n{content}{note}"
+
+
+def _read_bytes(target_file_abs, file_path, offset, length):
+    index = _line_index(target_file_abs)
+    offset = max(0, int(offset or 0))
+    if length is None:
+        # Without a length the read goes to the end of the file, cut at the character cap
+        length, requested_end = MAX_FILE_CHARS, index.size
+    else:
+        length = max(0, int(length))
+        requested_end = offset + length
+    header = f'[File "{file_path}": {index.size} bytes, {index.line_count} lines total]'
+    if offset >= index.size:
+        return f"{header}\n[Offset {offset} is past the end of the file]"
+
+    f, mapped = _open_mapped(target_file_abs)
+    with f, mapped:
+        data = mapped[offset : offset + min(length, MAX_FILE_CHARS * 4)]
+    # The range may start or end inside a multi-byte character
+    content = _decode(data, errors="replace")
+
+    note = ""
+    if len(content) > MAX_FILE_CHARS:
+        content = content[:MAX_FILE_CHARS]
+        data = content.encode("utf-8")
+    end = offset + len(data)
+    if end < min(requested_end, index.size):
+        note = f"\n[...Range truncated at {MAX_FILE_CHARS} characters. Continue with offset={end}.]"
+    return f"{header}\n[Bytes {offset}-{end}]\n{content}{note}"
+
+
 WORKING_DIR = r"C:\Users\Muhammad Rameez\Documents\CodeCrafter\calculator"
 
 
@@ -58,13 +226,31 @@ schema_get_file_content = make_function_schema(
     name="get_file_content",
     description=(
         "Reads the contents of a specified file within the working directory safely. "
-        "Truncates the file at the configured maximum length to avoid sending too much data."
+        "Truncates the file at the configured maximum length to avoid sending too much data. "
+        "Long files can be read in parts with a line range or a byte range; ranged reads "
+        "report the file's total size and line count."
     ),
     params={
         "file_path": {
             "type": types.Type.STRING,
             "description": "The relative path of the file to read from the working directory.",
         },
+        "start_line": {
+            "type": types.Type.INTEGER,
+            "description": "Optional first line to read (1-based). Use with end_line to page through long files.",
+        },
+        "end_line": {
+            "type": types.Type.INTEGER,
+            "description": "Optional last line to read (inclusive). Defaults to the end of the file.",
+        },
+        "offset": {
+            "type": types.Type.INTEGER,
+            "description": "Optional byte offset to start reading at (for very large or single-line files).",
+        },
+        "length": {
+            "type": types.Type.INTEGER,
+            "description": "Optional number of bytes to read from offset.",
+        },
         "working_directory": {
             "type": types.Type.STRING,
             "description": "The root directory that scopes file access. Files outside this directory are not allowed.",
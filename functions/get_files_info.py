@@ -1,6 +1,8 @@
 import os
+import fnmatch
 from datetime import datetime
 from google.genai import types
+from functions.file_index import IgnoreRules, list_files, restat_files
 
 
 def make_function_schema(name, description, params):
@@ -14,14 +16,31 @@ def make_function_schema(name, description, params):
     }
 
 
-def get_files_info(working_directory, directory=".", verbose=True):
+DEFAULT_LIST_LIMIT = 200  # Max entries returned per call (use offset to page)
+
+
+def get_files_info(
+    working_directory,
+    directory=".",
+    verbose=False,
+    max_depth=None,
+    pattern=None,
+    exclude=None,
+    offset=0,
+    limit=DEFAULT_LIST_LIMIT,
+):
     """
     Recursively lists files in a directory (relative to working_directory),
     includes size and last modified time (without reading file content).
-    Returns a list of dicts, or an error string if invalid.
+    Skips .git, virtualenvs, node_modules, caches and anything matched by the
+    project's .gitignore or the extra `exclude` patterns. Results come from a
+    persistent index (functions/file_index.py) that only re-scans directories
+    whose mtime changed, and are returned one page at a time; only the files
+    on the page are stat'ed again.
+    Returns {"files": [...], "total": N, "offset": ..., "next_offset": ...},
+    or an error string if invalid.
     """
 
-    files_info = []
     target_directory = os.path.join(working_directory, directory)
 
     # Normalize paths
@@ -40,39 +59,62 @@ def get_files_info(working_directory, directory=".", verbose=True):
     if not os.path.isdir(target_directory_abs):
         return f'Error: "{directory}" is not a directory'
 
-    # Walk recursively
-    for root, _, files in os.walk(target_directory_abs):
-        for file in files:
-            file_path = os.path.join(root, file)
-            relative_path = os.path.relpath(file_path, working_directory_abs)
-
-            try:
-                stats = os.stat(file_path)
-                file_size_kb = round(stats.st_size / 1024, 2)
-                modified_time = datetime.fromtimestamp(stats.st_mtime).strftime(
-                    "%Y-%m-%d %H:%M:%S"
-                )
-
-                if verbose:
-                    print(
-                        f"Found: {relative_path} | Size: {file_size_kb} KB | Modified: {modified_time}"
-                    )
-
-                files_info.append(
-                    {
-                        "path": relative_path,
-                        "size_kb": file_size_kb,
-                        "modified": modified_time,
-                    }
-                )
-
-            except Exception as e:
-                print(f"Error reading metadata for {file_path}: {e}")
+    relative_dir = os.path.relpath(target_directory_abs, working_directory_abs)
+    relative_dir = relative_dir.replace(os.sep, "/")
+    files = list_files(
+        working_directory_abs,
+        relative_dir,
+        int(max_depth) if max_depth is not None else None,
+    )
+
+    # 4. Filters that don't change what is indexed
+    if exclude:
+        rules = IgnoreRules(exclude)
+        files = [f for f in files if not rules.excludes(f[0])]
+    if pattern:
+        # Patterns without "/" match the file name, others the whole path
+        key = (lambda path: path) if "/" in pattern else (lambda path: path.rsplit("/", 1)[-1])
+        files = [f for f in files if fnmatch.fnmatchcase(key(f[0]), pattern)]
+
+    # 5. Paginate
+    offset = max(0, int(offset or 0))
+    limit = max(1, int(limit or DEFAULT_LIST_LIMIT))
+    page = files[offset : offset + limit]
+    next_offset = offset + len(page)
+    # Only unchanged directories skip the scan: stat what is shown, so files
+    # edited in place report their current size and date
+    page = restat_files(working_directory_abs, [path for path, _, _ in page])
+
+    files_info = []
+    for path, size, mtime_ns in page:
+        relative_path = path.replace("/", os.sep)
+        file_size_kb = round(size / 1024, 2)
+        modified_time = datetime.fromtimestamp(mtime_ns / 1e9).strftime(
+            "%Y-%m-%d %H:%M:%S"
+        )
+
+        if verbose:
+            print(
+                f"Found: {relative_path} | Size: {file_size_kb} KB | Modified: {modified_time}"
+            )
+
+        files_info.append(
+            {
+                "path": relative_path,
+                "size_kb": file_size_kb,
+                "modified": modified_time,
+            }
+        )
 
     if verbose:
-        print(f"Total files found: {len(files_info)}")
+        print(f"Total files found: {len(files)}")
 
-    return files_info
+    return {
+        "files": files_info,
+        "total": len(files),
+        "offset": offset,
+        "next_offset": next_offset if next_offset < len(files) else None,
+    }
 
 
 # --- Schema for function calling (Gemini / LLM integration) ---
@@ -81,6 +123,8 @@ schema_get_files_info = make_function_schema(
     description=(
         "Recursively lists files in the specified directory (relative to the working directory). "
         "Includes file size and modified date (without reading file content). "
+        "Skips ignored files (.gitignore, .git, virtualenvs, caches) and returns one page of "
+        "results with the total count and next_offset. "
         "Ensures directory stays within the working directory."
     ),
     params={
@@ -95,5 +139,26 @@ schema_get_files_info = make_function_schema(
             "type": types.Type.BOOLEAN,
             "description": "Whether to print detailed info for each file while scanning.",
         },
+        "max_depth": {
+            "type": types.Type.INTEGER,
+            "description": "Directory levels to include: 1 lists only the directory's own files. Default: unlimited.",
+        },
+        "pattern": {
+            "type": types.Type.STRING,
+            "description": "Optional glob filter, e.g. '*.py' (file name) or 'pkg/*.py' (path).",
+        },
+        "exclude": {
+            "type": types.Type.ARRAY,
+            "description": "Extra .gitignore-style patterns to skip, e.g. ['tests/', '*.json'].",
+            "items": {"type": types.Type.STRING},
+        },
+        "offset": {
+            "type": types.Type.INTEGER,
+            "description": "Index of the first entry to return; use next_offset from the previous page.",
+        },
+        "limit": {
+            "type": types.Type.INTEGER,
+            "description": f"Max entries to return (default {DEFAULT_LIST_LIMIT}).",
+        },
     },
 )
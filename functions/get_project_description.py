@@ -1,6 +1,7 @@
 import os
 import json
 from google.genai import types
+from functions.cache import tool_cache
 
 
 def get_project_description(working_directory, file_path="project_description.json"):
@@ -14,13 +15,19 @@ def get_project_description(working_directory, file_path="project_description.js
         return f"Error: Project description file '{file_path}' not found."
 
     try:
-        with open(target_file, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        return data
+        # Re-parsed only when the file's mtime/size changed since the last call
+        return tool_cache.get_or_compute(
+            "description", os.path.abspath(target_file), lambda: _load_json(target_file)
+        )
     except Exception as e:
         return f"Error reading project description: {e}"
 
 
+def _load_json(target_file):
+    with open(target_file, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
 schema_get_project_description = types.FunctionDeclaration(
     name="get_project_description",
     description="Fetch the project description or manifest to identify file responsibilities and debug notes.",
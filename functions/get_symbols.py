@@ -0,0 +1,188 @@
+import ast
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from google.genai import types
+from functions.config import CACHE_MAX_ENTRIES
+from functions.get_file_content import MAX_FILE_CHARS
+
+
+@dataclass
+class Symbol:
+    name: str  # Qualified, e.g. "Calculator._evaluate_infix"
+    kind: str  # "class", "function" or "method"
+    start_line: int  # 1-based, first decorator line if decorated
+    end_line: int
+    signature: str
+    depth: int  # Nesting level in the outline
+
+
+def _signature(node):
+    if isinstance(node, ast.ClassDef):
+        bases = [ast.unparse(base) for base in node.bases]
+        bases += [ast.unparse(keyword) for keyword in node.keywords]
+        return f"class {node.name}({', '.join(bases)})" if bases else f"class {node.name}"
+    prefix = "async def" if isinstance(node, ast.AsyncFunctionDef) else "def"
+    signature = f"{prefix} {node.name}({ast.unparse(node.args)})"
+    if node.returns is not None:
+        signature += f" -> {ast.unparse(node.returns)}"
+    return signature
+
+
+def parse_outline(source):
+    """Returns the Symbols of a module's source, in file order."""
+    tree = ast.parse(source)
+    symbols = []
+
+    def visit(body, prefix, parent_is_class, depth):
+        for node in body:
+            if isinstance(node, ast.ClassDef):
+                kind = "class"
+            elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                kind = "method" if parent_is_class else "function"
+            else:
+                continue
+            name = f"{prefix}{node.name}"
+            start = min([node.lineno] + [d.lineno for d in node.decorator_list])
+            symbols.append(
+                Symbol(name, kind, start, node.end_lineno, _signature(node), depth)
+            )
+            visit(node.body, name + ".", kind == "class", depth + 1)
+
+    visit(tree.body, "", False, 0)
+    return symbols
+
+
+class OutlineCache:
+    """Bounded LRU of parsed outlines keyed on the sha256 of the file content."""
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # content hash -> list of Symbol
+        self._lock = threading.Lock()
+
+    def get(self, data):
+        key = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            outline = self._entries.get(key)
+            if outline is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return outline
+            self.misses += 1
+
+        # SyntaxError is not cached: the file will change before it parses
+        outline = parse_outline(data)
+
+        with self._lock:
+            self._entries[key] = outline
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return outline
+
+
+outline_cache = OutlineCache()
+
+
+def get_symbols(working_directory, file_path, symbol=None):
+    """
+    Lists the classes, functions and methods of a Python file within the
+    working_directory, each with its line range and signature. With `symbol`
+    (e.g. "Calculator._evaluate_infix" or just "_evaluate_infix"), returns
+    only that symbol's source. Outlines are cached by content hash.
+    Returns the outline/source or error string.
+    """
+
+    # Normalize paths
+    working_directory_abs = os.path.abspath(working_directory)
+    target_file_abs = os.path.abspath(os.path.join(working_directory, file_path))
+
+    # 1. Validate scope
+    if not target_file_abs.startswith(working_directory_abs):
+        return f'Error: Cannot read "{file_path}" as it is outside the permitted working directory'
+
+    # 2. Validate file exists
+    if not os.path.isfile(target_file_abs):
+        return f'Error: File not found or is not a regular file: "{file_path}"'
+
+    # 3. Validate file type
+    if not file_path.endswith(".py"):
+        return f'Error: "{file_path}" is not a Python file.'
+
+    try:
+        with open(target_file_abs, "rb") as f:
+            data = f.read()
+        outline = outline_cache.get(data)
+    except SyntaxError as e:
+        return f'Error: Cannot parse "{file_path}": {e.msg} (line {e.lineno})'
+    except Exception as e:
+        return f"Error: {e}"
+
+    if symbol is None:
+        return _format_outline(file_path, outline)
+
+    # 4. Exact qualified name, else a unique match on the last name part
+    matches = [s for s in outline if s.name == symbol]
+    if not matches:
+        matches = [s for s in outline if s.name.rsplit(".", 1)[-1] == symbol]
+    if not matches:
+        return f'Error: Symbol "{symbol}" not found in "{file_path}". Call get_symbols without symbol to list them.'
+    if len(matches) > 1:
+        names = ", ".join(s.name for s in matches)
+        return f'Error: Symbol "{symbol}" is ambiguous in "{file_path}": {names}'
+
+    found = matches[0]
+    # Split where the parser counts lines: str.splitlines also breaks on \x0c, \u2028...
+    text = data.decode("utf-8", errors="replace")
+    lines = io.StringIO(text, newline=None).readlines()
+    source = "".join(lines[found.start_line - 1 : found.end_line])
+    header = (
+        f'[{found.kind.capitalize()} "{found.name}" in "{file_path}", '
+        f"lines {found.start_line}-{found.end_line}]"
+    )
+    if len(source) > MAX_FILE_CHARS:
+        source = source[:MAX_FILE_CHARS] + (
+            f"\n[...Truncated at {MAX_FILE_CHARS} characters. "
+            f"Use get_file_content with start_line/end_line for the rest.]"
+        )
+    return f"{header}\n{source}"
+
+
+def _format_outline(file_path, outline):
+    if not outline:
+        return f'[File "{file_path}": no classes or functions]'
+    lines = [f'[File "{file_path}": {len(outline)} symbols]']
+    for s in outline:
+        indent = "  " * s.depth
+        lines.append(f"{indent}{s.signature}  # {s.name}, lines {s.start_line}-{s.end_line}")
+    return "\n".join(lines)
+
+
+# --- Gemini / LLM Function Schema ---
+schema_get_symbols = types.FunctionDeclaration(
+    name="get_symbols",
+    description=(
+        "Outlines a Python file: its classes, functions and methods with signatures and "
+        "line ranges. With 'symbol', returns just that symbol's source code. "
+        "Use it to read one method instead of the whole module."
+    ),
+    parameters=types.Schema(
+        type=types.Type.OBJECT,
+        properties={
+            "file_path": types.Schema(
+                type=types.Type.STRING,
+                description="The path of the Python file, relative to the working directory.",
+            ),
+            "symbol": types.Schema(
+                type=types.Type.STRING,
+                description="Optional qualified name to fetch, e.g. 'Calculator._evaluate_infix'.",
+            ),
+        },
+        required=["file_path"],
+    ),
+)
@@ -0,0 +1,239 @@
+"""
+Incremental unittest runner used by run_python_file(incremental=True).
+
+    python incremental_tests.py <test_file> [-v]
+
+Runs the unittest cases of <test_file> (run from the working directory),
+recording for each test the project files whose code it executed, in any
+thread. Code run outside the tests themselves (importing the test module,
+setUpModule/setUpClass and their teardowns) counts as a dependency of every
+test in the file, since tests can rely on its effects and on module-level
+data without calling into it. A passing test is stored with the content
+hashes of those files (and of the test file itself); on the next run it is
+reported as a cached pass instead of being run again, unless one of those
+files changed. Failures are never cached.
+The cache lives in <working_directory>/.codecrafter/test_results.json.
+"""
+
+import hashlib
+import importlib.util
+import json
+import os
+import sys
+import threading
+import time
+import unittest
+
+CACHE_DIR = ".codecrafter"
+CACHE_FILE = "test_results.json"
+
+
+class FileHasher:
+    """sha256 of file contents, computed at most once per run."""
+
+    def __init__(self):
+        self._hashes = {}
+
+    def __call__(self, path):
+        if path not in self._hashes:
+            try:
+                with open(path, "rb") as f:
+                    self._hashes[path] = hashlib.sha256(f.read()).hexdigest()
+            except OSError:
+                self._hashes[path] = None
+        return self._hashes[path]
+
+
+class DependencyRecorder:
+    """
+    Collects the project files whose code runs (functions and module bodies)
+    in any thread between start() and stop(). Files go to the current test
+    while one runs (enter_test/leave_test), otherwise to the shared set
+    returned by stop().
+    """
+
+    def __init__(self, working_directory):
+        self.prefix = working_directory + os.sep
+        self.shared = set()
+        self.files = self.shared
+        self._seen_codes = set()
+
+    def _profile(self, frame, event, arg):
+        if event == "call":
+            code = frame.f_code
+            if code not in self._seen_codes:
+                self._seen_codes.add(code)
+                filename = code.co_filename
+                if filename.startswith(self.prefix):
+                    self.files.add(filename)
+
+    def _switch(self, files):
+        self.files = files
+        self._seen_codes = set()
+
+    def start(self):
+        self.shared = set()
+        self._switch(self.shared)
+        threading.setprofile(self._profile)  # Threads started from now on
+        sys.setprofile(self._profile)
+
+    def enter_test(self):
+        self._switch(set())
+
+    def leave_test(self):
+        files = self.files
+        self._switch(self.shared)
+        return files
+
+    def stop(self):
+        sys.setprofile(None)
+        threading.setprofile(None)
+        return self.shared
+
+
+class RecordingResult(unittest.TextTestResult):
+    """TextTestResult that records each test's dependencies and outcome."""
+
+    def __init__(self, *args, recorder, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.recorder = recorder
+        self.dependencies = {}  # test id -> set of files
+        self.passed = set()
+
+    def startTest(self, test):
+        super().startTest(test)
+        self.recorder.enter_test()
+
+    def stopTest(self, test):
+        self.dependencies[test.id()] = self.recorder.leave_test()
+        super().stopTest(test)
+
+    def addSuccess(self, test):
+        super().addSuccess(test)
+        self.passed.add(test.id())
+
+
+def load_test_module(test_file, working_directory):
+    relative = os.path.relpath(test_file, working_directory)[:-3]
+    name = relative.replace(os.sep, ".")
+    if not all(part.isidentifier() for part in name.split(".")):
+        name = "tests_under_run"
+    spec = importlib.util.spec_from_file_location(name, test_file)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def iter_tests(suite):
+    for item in suite:
+        if isinstance(item, unittest.TestSuite):
+            yield from iter_tests(item)
+        else:
+            yield item
+
+
+def load_cache(cache_path):
+    try:
+        with open(cache_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_cache(cache_path, cache):
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    temp_path = cache_path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(cache, f, indent=1, sort_keys=True)
+    os.replace(temp_path, cache_path)
+
+
+def is_cached_pass(entry, working_directory, file_hash):
+    if not entry:
+        return False
+    return all(
+        file_hash(os.path.join(working_directory, relative)) == digest
+        for relative, digest in entry["dependencies"].items()
+    )
+
+
+def main(argv):
+    if not argv:
+        print("usage: incremental_tests.py <test_file> [-v]", file=sys.stderr)
+        return 2
+
+    test_file = os.path.abspath(argv[0])
+    verbosity = 2 if "-v" in argv[1:] else 1
+    working_directory = os.getcwd()
+    cache_path = os.path.join(working_directory, CACHE_DIR, CACHE_FILE)
+    file_hash = FileHasher()
+
+    # Same import environment as `python test_file`
+    sys.argv = [test_file, *argv[1:]]
+    sys.path[0] = os.path.dirname(test_file)
+    recorder = DependencyRecorder(working_directory)
+    recorder.start()  # Importing the test module counts for every test in it
+    module = load_test_module(test_file, working_directory)
+    tests = list(iter_tests(unittest.defaultTestLoader.loadTestsFromModule(module)))
+
+    cache = load_cache(cache_path)
+    test_file_key = os.path.relpath(test_file, working_directory)
+    cached = cache.get(test_file_key, {})
+
+    to_run = unittest.TestSuite()
+    cached_passes = []
+    for test in tests:
+        if is_cached_pass(cached.get(test.id()), working_directory, file_hash):
+            cached_passes.append(test.id())
+        else:
+            to_run.addTest(test)
+
+    runner = unittest.TextTestRunner(
+        verbosity=verbosity,
+        resultclass=lambda *args, **kwargs: RecordingResult(
+            *args, recorder=recorder, **kwargs
+        ),
+    )
+    start = time.perf_counter()
+    try:
+        result = runner.run(to_run)
+    finally:
+        shared_files = recorder.stop()  # Imports, module and class fixtures
+    elapsed = time.perf_counter() - start
+
+    # Remember passes with the hashes of everything they depended on
+    still_present = {test.id() for test in tests}
+    entries = {
+        test_id: entry for test_id, entry in cached.items() if test_id in still_present
+    }
+    for test_id, files in result.dependencies.items():
+        if test_id not in result.passed:
+            entries.pop(test_id, None)
+            continue
+        files = set(files) | shared_files | {test_file}
+        entries[test_id] = {
+            "dependencies": {
+                os.path.relpath(path, working_directory): file_hash(path)
+                for path in sorted(files)
+            }
+        }
+    cache[test_file_key] = entries
+    try:
+        save_cache(cache_path, cache)
+    except OSError as e:
+        print(f"Warning: could not save test cache: {e}", file=sys.stderr)
+
+    for test_id in cached_passes:
+        if verbosity > 1:
+            print(f"{test_id} ... ok (cached pass)", file=sys.stderr)
+    print(
+        f"Incremental run: {result.testsRun} run in {elapsed:.3f}s, "
+        f"{len(cached_passes)} cached passes (dependencies unchanged)",
+        file=sys.stderr,
+    )
+    return 0 if result.wasSuccessful() else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,226 @@
+"""
+Bounded execution of scripts for run_python_file.
+
+stdout/stderr are read from pipes while the script runs and kept in a
+HeadTailBuffer (the first and last few KB), so a script that prints
+gigabytes costs the agent a few KB of memory and the model a few KB of
+prompt. Scripts run in their own process group (killed as a whole on
+timeout) under CPU and open-file rlimits (and an address-space one if
+configured) where the resource module exists (POSIX). The rlimits are set
+by a small launcher interpreter that then execs the script's, not in a
+preexec_fn, which is unsafe in the threaded agent process.
+"""
+
+import codecs
+import json
+import os
+import signal
+import subprocess
+import sys
+import threading
+
+from functions.config import (
+    RUN_CPU_SECONDS,
+    RUN_FILE_SIZE_BYTES,
+    RUN_MEMORY_BYTES,
+    RUN_OPEN_FILES,
+    RUN_OUTPUT_HEAD_BYTES,
+    RUN_OUTPUT_TAIL_BYTES,
+    RUN_TIMEOUT_SECONDS,
+)
+
+try:
+    import resource
+except ImportError:  # Windows: no rlimits, only the timeout
+    resource = None
+
+READ_CHUNK = 64 * 1024
+CPU_GRACE_SECONDS = 5  # SIGXCPU at the soft limit, SIGKILL this much later
+
+# python -c LAUNCHER '<rlimits json>' python script.py args...
+LAUNCHER = (
+    "import json, os, resource, sys\n"
+    "for kind, soft, hard in json.loads(sys.argv[1]):\n"
+    "    resource.setrlimit(kind, (soft, hard))\n"
+    "os.execvp(sys.argv[2], sys.argv[2:])\n"
+)
+
+
+class HeadTailBuffer:
+    """
+    Keeps the first head_bytes and the last tail_bytes written to it and
+    counts the rest. getvalue() joins them with a truncation marker.
+    """
+
+    def __init__(self, head_bytes=RUN_OUTPUT_HEAD_BYTES, tail_bytes=RUN_OUTPUT_TAIL_BYTES):
+        self.head_bytes = head_bytes
+        self.tail_bytes = tail_bytes
+        self.head = bytearray()
+        self.tail = bytearray()
+        self.total = 0
+
+    def write(self, data):
+        self.total += len(data)
+        room = self.head_bytes - len(self.head)
+        if room > 0:
+            self.head += data[:room]
+            data = data[room:]
+        if data and self.tail_bytes:
+            self.tail += data[-self.tail_bytes :]
+            excess = len(self.tail) - self.tail_bytes
+            if excess > 0:
+                del self.tail[:excess]
+
+    def skip(self, size):
+        """Counts size bytes as omitted without reading them (see read_bounded)."""
+        self.total += size
+
+    @property
+    def omitted(self):
+        return self.total - len(self.head) - len(self.tail)
+
+    def getvalue(self):
+        if not self.omitted:
+            return bytes(self.head + self.tail).decode("utf-8", errors="replace")
+        head = self.head.decode("utf-8", errors="replace")
+        tail = self.tail.decode("utf-8", errors="replace")
+        return f"{head}\n[... {self.omitted} bytes omitted ...]\n{tail}"
+
+
+def read_bounded(path, buffer=None):
+    """Reads a file's head and tail into a HeadTailBuffer without reading the middle."""
+    buffer = buffer or HeadTailBuffer()
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        buffer.write(f.read(buffer.head_bytes))
+        middle = size - buffer.head_bytes - buffer.tail_bytes
+        if middle > 0:
+            buffer.skip(middle)
+            f.seek(size - buffer.tail_bytes)
+        buffer.write(f.read())
+    return buffer
+
+
+class RunLimits:
+    """
+    Limits and output options for scripts started by run_python_file.
+    A limit of None (or 0) is not applied. Set from the CLI flags in main.py.
+    """
+
+    def __init__(self):
+        self.timeout = RUN_TIMEOUT_SECONDS
+        self.cpu_seconds = RUN_CPU_SECONDS
+        self.memory_bytes = RUN_MEMORY_BYTES
+        self.open_files = RUN_OPEN_FILES
+        self.file_size_bytes = RUN_FILE_SIZE_BYTES
+        self.live_output = False  # Echo output to the terminal while it runs
+
+    def rlimits(self, file_size=False):
+        """[resource, soft, hard] triples for the configured limits."""
+        if resource is None:
+            return []
+        wanted = [
+            (resource.RLIMIT_CPU, self.cpu_seconds, CPU_GRACE_SECONDS),
+            (resource.RLIMIT_AS, self.memory_bytes, 0),
+            (resource.RLIMIT_NOFILE, self.open_files, 0),
+        ]
+        if file_size:
+            wanted.append((resource.RLIMIT_FSIZE, self.file_size_bytes, 0))
+
+        triples = []
+        for kind, value, grace in wanted:
+            if not value:
+                continue
+            soft, hard = resource.getrlimit(kind)
+            if hard != resource.RLIM_INFINITY:
+                value = min(value, hard)
+                grace = 0
+            triples.append([kind, value, value + grace])
+        return triples
+
+    def launch_command(self, command):
+        """The argv running `python *command` under the rlimits (through LAUNCHER)."""
+        rlimits = self.rlimits()
+        if not rlimits:
+            return ["python", *command]
+        return ["python", "-c", LAUNCHER, json.dumps(rlimits), "python", *command]
+
+
+# Shared by run_python_file; configured from the CLI (--run-timeout, --live-output, ...)
+run_limits = RunLimits()
+
+
+def _pump(pipe, buffer, echo):
+    """Copies a pipe into a buffer (and optionally the terminal) until EOF."""
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace") if echo else None
+    fd = pipe.fileno()
+    try:
+        while True:
+            chunk = os.read(fd, READ_CHUNK)
+            if not chunk:
+                break
+            buffer.write(chunk)
+            if decoder:
+                echo.write(decoder.decode(chunk))
+                echo.flush()
+    finally:
+        pipe.close()
+
+
+def _kill_group(process):
+    if os.name == "posix":
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+    else:
+        process.kill()
+
+
+def run_bounded(command, cwd, limits=run_limits):
+    """
+    Runs `python *command` in cwd. Returns (stdout, stderr, returncode) with
+    each stream cut to its head and tail. Raises subprocess.TimeoutExpired
+    (with the output so far) once it runs longer than limits.timeout.
+    """
+    stdout_buffer, stderr_buffer = HeadTailBuffer(), HeadTailBuffer()
+    process = subprocess.Popen(
+        limits.launch_command(command),
+        cwd=cwd,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        start_new_session=os.name == "posix",
+    )
+    readers = [
+        threading.Thread(
+            target=_pump,
+            args=(pipe, buffer, echo if limits.live_output else None),
+            daemon=True,
+        )
+        for pipe, buffer, echo in (
+            (process.stdout, stdout_buffer, sys.stdout),
+            (process.stderr, stderr_buffer, sys.stderr),
+        )
+    ]
+    for reader in readers:
+        reader.start()
+
+    timed_out = False
+    try:
+        process.wait(timeout=limits.timeout)
+    except subprocess.TimeoutExpired:
+        timed_out = True
+    finally:
+        # Also reaps background children still holding the pipes open
+        _kill_group(process)
+        process.wait()
+        for reader in readers:
+            reader.join()
+
+    stdout, stderr = stdout_buffer.getvalue(), stderr_buffer.getvalue()
+    if timed_out:
+        raise subprocess.TimeoutExpired(
+            process.args, limits.timeout, output=stdout, stderr=stderr
+        )
+    return stdout, stderr, process.returncode
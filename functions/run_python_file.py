@@ -1,12 +1,24 @@
 import os
+import signal
 import subprocess
 from google.genai import types
+from functions.process_runner import run_bounded, run_limits
+from functions.warm_interpreter import warm_pool
 
 
-def run_python_file(working_directory, path, args=[]):
+INCREMENTAL_RUNNER = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "incremental_tests.py"
+)
+
+
+def run_python_file(working_directory, path, args=[], incremental=False):
     """
     Safely executes a Python file within the working_directory.
-    Captures stdout and stderr, enforces a 30-second timeout.
+    Streams stdout and stderr into bounded head/tail buffers and enforces the
+    timeout and rlimits of run_limits (30 seconds, 30 s of CPU...).
+    Uses a warm forked interpreter instead of a new process when the
+    warm pool is enabled and output is not shown live. With incremental=True the file is run as a unittest
+    module that only re-runs tests whose project files changed.
     Returns formatted output or error string.
     """
 
@@ -26,34 +38,67 @@ def run_python_file(working_directory, path, args=[]):
     if not target_file_abs.endswith(".py"):
         return f'Error: "{path}" is not a Python file.'
 
+    # Incremental mode runs the test file through the dependency-tracking runner
+    command = [target_file_abs, *args]
+    if incremental:
+        command = [INCREMENTAL_RUNNER, target_file_abs, *args]
+
     try:
-        completed = subprocess.run(
-            ["python", target_file_abs, *args],
-            capture_output=True,
-            text=True,
-            cwd=working_directory_abs,
-            timeout=30,
-        )
-
-        stdout = completed.stdout.strip()
-        stderr = completed.stderr.strip()
+        stdout, stderr, returncode = None, None, None
+        if warm_pool.enabled and not run_limits.live_output:
+            try:
+                # Forked from a pre-imported interpreter: no startup cost
+                stdout, stderr, returncode = warm_pool.run(
+                    working_directory_abs, command[0], command[1:], run_limits
+                )
+            except (RuntimeError, OSError, ValueError):
+                pass  # Broken warm interpreter: fall back to a new process
+
+        if returncode is None:
+            stdout, stderr, returncode = run_bounded(command, working_directory_abs)
+
+        stdout = stdout.strip()
+        stderr = stderr.strip()
         output = ""
 
         if stdout:
             output += f"STDOUT:\n{stdout}\n"
         if stderr:
             output += f"STDERR:\n{stderr}\n"
-        if completed.returncode != 0:
-            output += f"Process exited with code {completed.returncode}\n"
-        if not stdout and not stderr:
+        if returncode != 0:
+            output += f"{describe_exit(returncode)}\n"
+        if not output:
             output = "No output produced."
 
         return output.strip()
 
+    except subprocess.TimeoutExpired as e:
+        # Keep what the script printed before it was killed
+        output = ""
+        for label, text in (("STDOUT", e.output), ("STDERR", e.stderr)):
+            if text and text.strip():
+                output += f"{label}:\n{text.strip()}\n"
+        return f"{output}Error: Process timed out after {e.timeout} seconds and was killed"
+
     except Exception as e:
         return f"Error: executing Python file: {e}"
 
 
+def describe_exit(returncode):
+    """The exit line of a run, naming the signal (and rlimit) that killed it."""
+    if returncode >= 0:
+        return f"Process exited with code {returncode}"
+    try:
+        name = signal.Signals(-returncode).name
+    except ValueError:
+        name = f"signal {-returncode}"
+    if name == "SIGXCPU":
+        return f"Process killed by {name}: CPU time limit of {run_limits.cpu_seconds}s exceeded"
+    if name == "SIGXFSZ":
+        return f"Process killed by {name}: file size limit exceeded"
+    return f"Process killed by {name} (exit code {returncode})"
+
+
 # --- Gemini / LLM Function Schema ---
 def make_function_schema(name, description, params):
     return {
@@ -83,6 +128,13 @@ schema_run_python_file = types.FunctionDeclaration(
                     type=types.Type.STRING
                 ),  # This line fixes your error
             ),
+            "incremental": types.Schema(
+                type=types.Type.BOOLEAN,
+                description=(
+                    "For unittest files only: re-run just the tests whose project files "
+                    "changed since their last passing run; the rest are reported as cached passes."
+                ),
+            ),
         },
         required=["path"],
     ),
@@ -0,0 +1,385 @@
+import os
+import re
+import threading
+from google.genai import types
+from functions.file_index import get_file_index, list_files, restat_files
+
+MAX_INDEXED_FILE_BYTES = 1_000_000  # Larger files are not indexed or searched
+MAX_SEARCH_RESULTS = 50  # Default cap on matching lines returned
+MAX_CONTEXT_LINES = 5  # Cap on context lines around each match
+MAX_SNIPPET_CHARS = 200  # Long lines are cut in the output
+
+
+def trigrams(text):
+    """The set of lowercase 3-character substrings of text."""
+    text = text.lower()
+    return set(map("".join, set(zip(text, text[1:], text[2:]))))
+
+
+def _skip_class(pattern, i):
+    """Index just after the [...] character class starting at pattern[i]."""
+    i += 1
+    if i < len(pattern) and pattern[i] == "^":
+        i += 1
+    if i < len(pattern) and pattern[i] == "]":
+        i += 1
+    while i < len(pattern) and pattern[i] != "]":
+        i += 2 if pattern[i] == "\\" else 1
+    return i + 1
+
+
+def _skip_group(pattern, i):
+    """Index just after the (...) group starting at pattern[i]."""
+    depth = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == "\\":
+            i += 2
+            continue
+        if char == "[":
+            i = _skip_class(pattern, i)
+            continue
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+            if depth == 0:
+                return i + 1
+        i += 1
+    return i
+
+
+def _skip_quantifier(pattern, i):
+    """Index just after the quantifier (and lazy/possessive suffix) at pattern[i]."""
+    if pattern[i] == "{":
+        end = pattern.find("}", i)
+        i = len(pattern) if end == -1 else end + 1
+    else:
+        i += 1
+    if i < len(pattern) and pattern[i] in "?+":
+        i += 1
+    return i
+
+
+def required_literals(pattern):
+    """
+    Literal substrings every match of the regex must contain, used to pick
+    candidate files from the trigram index. Only top-level literal runs are
+    used (groups, classes and optional characters break a run); a top-level
+    alternation means nothing is required.
+    """
+    literals = []
+    run = []
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == "\\":
+            escaped = pattern[i + 1 : i + 2]
+            i += 2
+            if escaped and not escaped.isalnum():
+                literal = escaped
+            else:
+                # \d, \w, \b, backreferences...
+                literals.append("".join(run))
+                run = []
+                continue
+        elif char == "|":
+            return []
+        elif char in "([":
+            literals.append("".join(run))
+            run = []
+            i = _skip_group(pattern, i) if char == "(" else _skip_class(pattern, i)
+            if i < len(pattern) and pattern[i] in "*?+{":
+                i = _skip_quantifier(pattern, i)
+            continue
+        elif char in "*?+{":
+            # The quantified character may be absent or repeated
+            if run:
+                run.pop()
+            literals.append("".join(run))
+            run = []
+            i = _skip_quantifier(pattern, i)
+            continue
+        elif char in ".^$":
+            literals.append("".join(run))
+            run = []
+            i += 1
+            continue
+        else:
+            literal = char
+            i += 1
+
+        if i < len(pattern) and pattern[i] in "*?{":
+            continue  # Optional character: not part of any required run
+        run.append(literal)
+
+    literals.append("".join(run))
+    return [literal for literal in literals if len(literal) >= 3]
+
+
+class SearchIndex:
+    """
+    Trigram inverted index of the text files under a working directory.
+    Files are enumerated through the persistent file index (same ignore rules
+    as get_files_info); only files whose size or mtime changed are re-read.
+    write_file/edit_file/delete_file update single files via update_file().
+    A query only opens the files that contain every trigram of the literals
+    the pattern requires, then matches them line by line.
+    """
+
+    def __init__(self, working_directory_abs):
+        self.root = working_directory_abs
+        self.lock = threading.Lock()
+        self.files = {}  # relative path -> (size, mtime_ns, trigrams or None if skipped)
+        self.postings = {}  # trigram -> set of relative paths
+
+    def _add(self, path, size, mtime_ns):
+        grams = None
+        if size <= MAX_INDEXED_FILE_BYTES:
+            try:
+                with open(os.path.join(self.root, path), "rb") as f:
+                    # Remember the stats of the content actually read, so an edit
+                    # made since the listing is still seen as a change next time
+                    stats = os.fstat(f.fileno())
+                    size, mtime_ns = stats.st_size, stats.st_mtime_ns
+                    data = f.read()
+                if b"\0" not in data[:8192]:  # Binary files are not searched
+                    grams = trigrams(data.decode("utf-8", errors="replace"))
+            except OSError:
+                pass
+        self.files[path] = (size, mtime_ns, grams)
+        for gram in grams or ():
+            self.postings.setdefault(gram, set()).add(path)
+
+    def _remove(self, path):
+        entry = self.files.pop(path, None)
+        if entry is None:
+            return
+        for gram in entry[2] or ():
+            paths = self.postings.get(gram)
+            if paths is not None:
+                paths.discard(path)
+                if not paths:
+                    del self.postings[gram]
+
+    def refresh(self):
+        """Re-indexes new and changed files and drops removed ones. Call with the lock held."""
+        present = set()
+        # Unchanged directories are not re-listed, so stat every file: files edited
+        # in place (e.g. by a script) must show up as changed
+        listed = [path for path, _, _ in list_files(self.root)]
+        for path, size, mtime_ns in restat_files(self.root, listed):
+            present.add(path)
+            entry = self.files.get(path)
+            if entry is None or entry[0] != size or entry[1] != mtime_ns:
+                self._remove(path)
+                self._add(path, size, mtime_ns)
+        for path in [path for path in self.files if path not in present]:
+            self._remove(path)
+
+    def update_file(self, path):
+        """Re-indexes (or drops) one file after the agent changed it."""
+        with self.lock:
+            self._remove(path)
+            rules = get_file_index(self.root).rules
+            try:
+                stats = os.stat(os.path.join(self.root, path))
+            except OSError:
+                return
+            if not rules.excludes(path):
+                self._add(path, stats.st_size, stats.st_mtime_ns)
+
+    def candidates(self, literals):
+        """Paths of the searchable files that may contain every literal."""
+        result = None
+        for literal in literals:
+            for gram in trigrams(literal):
+                paths = self.postings.get(gram, set())
+                result = set(paths) if result is None else result & paths
+                if not result:
+                    return []
+        if result is None:
+            result = [path for path, entry in self.files.items() if entry[2] is not None]
+        return sorted(result)
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_search_index(working_directory):
+    """The shared SearchIndex of a working directory."""
+    working_directory_abs = os.path.abspath(working_directory)
+    with _indexes_lock:
+        index = _indexes.get(working_directory_abs)
+        if index is None:
+            index = SearchIndex(working_directory_abs)
+            _indexes[working_directory_abs] = index
+        return index
+
+
+def update_search_index(working_directory, file_abs):
+    """Keeps an already built index current after a file was written or deleted."""
+    working_directory_abs = os.path.abspath(working_directory)
+    with _indexes_lock:
+        index = _indexes.get(working_directory_abs)
+    if index is not None:
+        path = os.path.relpath(file_abs, working_directory_abs).replace(os.sep, "/")
+        index.update_file(path)
+
+
+def _snippet(line):
+    line = line.rstrip("\r\n")
+    if len(line) > MAX_SNIPPET_CHARS:
+        return line[:MAX_SNIPPET_CHARS] + "..."
+    return line
+
+
+def search_code(
+    working_directory,
+    query,
+    regex=False,
+    case_sensitive=True,
+    directory=".",
+    context_lines=0,
+    max_results=MAX_SEARCH_RESULTS,
+):
+    """
+    Searches the text files of the working directory for a literal string or
+    a regular expression, matched line by line. Candidate files come from a
+    trigram index, so only files that can contain the query are read.
+    Returns grep-style "path:line: text" snippets (context lines use "-"),
+    or an error string if invalid.
+    """
+
+    # Normalize paths
+    working_directory_abs = os.path.abspath(working_directory)
+    target_directory_abs = os.path.abspath(os.path.join(working_directory, directory))
+
+    # 1. Validate path is within working directory
+    if not target_directory_abs.startswith(working_directory_abs):
+        return f'Error: Cannot search "{directory}" as it is outside the permitted working directory'
+
+    # 2. Validate directory exists
+    if not os.path.isdir(target_directory_abs):
+        return f'Error: "{directory}" is not a directory'
+
+    # 3. Validate query
+    if not query:
+        return "Error: 'query' must not be empty"
+    try:
+        matcher = re.compile(
+            query if regex else re.escape(query), 0 if case_sensitive else re.IGNORECASE
+        )
+    except re.error as e:
+        return f"Error: Invalid regular expression {query!r}: {e}"
+
+    context_lines = min(max(0, int(context_lines or 0)), MAX_CONTEXT_LINES)
+    max_results = max(1, int(max_results or MAX_SEARCH_RESULTS))
+    literals = required_literals(query) if regex else [query]
+
+    relative_dir = os.path.relpath(target_directory_abs, working_directory_abs)
+    prefix = "" if relative_dir == "." else relative_dir.replace(os.sep, "/") + "/"
+
+    index = get_search_index(working_directory_abs)
+    with index.lock:
+        index.refresh()
+        candidates = [path for path in index.candidates(literals) if path.startswith(prefix)]
+        indexed = len(index.files)
+
+    # 4. Match candidate files line by line
+    blocks = []
+    matches = 0
+    matched_files = 0
+    truncated = False
+    for path in candidates:
+        try:
+            with open(
+                os.path.join(working_directory_abs, path),
+                "r",
+                encoding="utf-8",
+                errors="replace",
+            ) as f:
+                lines = f.readlines()
+        except OSError:
+            continue
+
+        hits = [number for number, line in enumerate(lines) if matcher.search(line)]
+        if not hits:
+            continue
+        matched_files += 1
+
+        if matches + len(hits) > max_results:
+            hits = hits[: max_results - matches]
+            truncated = True
+        matches += len(hits)
+
+        hit_set = set(hits)
+        block = []
+        last_shown = -1
+        for number in hits:
+            start = max(number - context_lines, last_shown + 1)
+            end = min(number + context_lines, len(lines) - 1)
+            if block and context_lines and start > last_shown + 1:
+                block.append("--")
+            for shown in range(start, end + 1):
+                separator = ":" if shown in hit_set else "-"
+                block.append(f"{path}{separator}{shown + 1}{separator} {_snippet(lines[shown])}")
+            last_shown = max(last_shown, end)
+        blocks.append("\n".join(block))
+
+        if truncated:
+            break
+
+    if not matches:
+        return f"No matches for {query!r} ({len(candidates)} candidate files of {indexed} indexed)."
+
+    header = (
+        f"Found {matches} matching lines for {query!r} in {matched_files} files "
+        f"({len(candidates)} candidate files of {indexed} indexed)"
+    )
+    if truncated:
+        header += f". Stopped at max_results={max_results}; narrow the query or directory for more"
+    separator = "\n--\n" if context_lines else "\n"
+    return header + ":\n" + separator.join(blocks)
+
+
+# --- Gemini / LLM Function Schema ---
+schema_search_code = types.FunctionDeclaration(
+    name="search_code",
+    description=(
+        "Searches the working directory's text files for a literal string or a regular "
+        "expression and returns matching lines as 'path:line: text' snippets. "
+        "Use it to find where a symbol is defined or used instead of reading whole files."
+    ),
+    parameters=types.Schema(
+        type=types.Type.OBJECT,
+        properties={
+            "query": types.Schema(
+                type=types.Type.STRING,
+                description="The text to search for, or a Python regular expression if regex is true.",
+            ),
+            "regex": types.Schema(
+                type=types.Type.BOOLEAN,
+                description="Treat query as a regular expression (matched per line). Default: false.",
+            ),
+            "case_sensitive": types.Schema(
+                type=types.Type.BOOLEAN,
+                description="Match case exactly. Default: true.",
+            ),
+            "directory": types.Schema(
+                type=types.Type.STRING,
+                description="Only search files under this directory (relative to the working directory).",
+            ),
+            "context_lines": types.Schema(
+                type=types.Type.INTEGER,
+                description=f"Lines of context to show around each match (0-{MAX_CONTEXT_LINES}).",
+            ),
+            "max_results": types.Schema(
+                type=types.Type.INTEGER,
+                description=f"Maximum matching lines to return (default {MAX_SEARCH_RESULTS}).",
+            ),
+        },
+        required=["query"],
+    ),
+)
@@ -0,0 +1,129 @@
+import atexit
+import json
+import os
+import subprocess
+import tempfile
+import threading
+
+from functions.process_runner import read_bounded
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "warm_worker.py")
+
+
+class WarmInterpreter:
+    """
+    One long-lived, pre-imported Python server for a working directory.
+    Every run is executed by a fresh fork of it (see warm_worker.py), so runs
+    stay isolated but skip interpreter startup and the common imports.
+    """
+
+    def __init__(self, working_directory):
+        self.working_directory = working_directory
+        self._lock = threading.Lock()  # One request in flight per server
+        self.process = subprocess.Popen(
+            ["python", WORKER_SCRIPT, working_directory],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            cwd=working_directory,
+            text=True,
+            encoding="utf-8",
+        )
+
+    def alive(self):
+        return self.process.poll() is None
+
+    def run(self, target_file_abs, args, limits):
+        """
+        Runs a script in a forked child under the rlimits of limits (a
+        RunLimits). Returns (stdout, stderr, returncode), each stream cut to
+        its head and tail; raises subprocess.TimeoutExpired (with the output
+        so far) if it ran longer than limits.timeout seconds.
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            stdout_path = os.path.join(tmp, "stdout")
+            stderr_path = os.path.join(tmp, "stderr")
+            open(stdout_path, "w").close()
+            open(stderr_path, "w").close()
+
+            request = {
+                "path": target_file_abs,
+                "args": list(args),
+                "stdout": stdout_path,
+                "stderr": stderr_path,
+                "timeout": limits.timeout,
+                # Output goes to temp files (maybe tmpfs), so their size is capped too
+                "rlimits": limits.rlimits(file_size=True),
+            }
+            with self._lock:
+                self.process.stdin.write(json.dumps(request) + "\n")
+                self.process.stdin.flush()
+                line = self.process.stdout.readline()
+
+            if not line:
+                raise RuntimeError("warm interpreter exited unexpectedly")
+            reply = json.loads(line)
+            stdout = read_bounded(stdout_path).getvalue()
+            stderr = read_bounded(stderr_path).getvalue()
+            if reply.get("timeout"):
+                raise subprocess.TimeoutExpired(
+                    ["python", target_file_abs, *args],
+                    limits.timeout,
+                    output=stdout,
+                    stderr=stderr,
+                )
+            return stdout, stderr, reply["returncode"]
+
+    def close(self):
+        if self.alive():
+            self.process.stdin.close()
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+
+
+class InterpreterPool:
+    """
+    Optional pool of warm interpreters, one per working directory.
+    Disabled by default, and only available where os.fork exists.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self._interpreters = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def supported():
+        return hasattr(os, "fork")
+
+    def start(self, working_directory):
+        """Enables the pool and warms up an interpreter for working_directory."""
+        if not self.supported():
+            return False
+        self.enabled = True
+        self.get(os.path.abspath(working_directory))
+        return True
+
+    def get(self, working_directory_abs):
+        with self._lock:
+            interpreter = self._interpreters.get(working_directory_abs)
+            if interpreter is None or not interpreter.alive():
+                interpreter = WarmInterpreter(working_directory_abs)
+                self._interpreters[working_directory_abs] = interpreter
+            return interpreter
+
+    def run(self, working_directory_abs, target_file_abs, args, limits):
+        return self.get(working_directory_abs).run(target_file_abs, args, limits)
+
+    def shutdown(self):
+        with self._lock:
+            for interpreter in self._interpreters.values():
+                interpreter.close()
+            self._interpreters.clear()
+
+
+# Shared by run_python_file; enabled from the CLI with --warm-python
+warm_pool = InterpreterPool()
+atexit.register(warm_pool.shutdown)
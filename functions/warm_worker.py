@@ -0,0 +1,179 @@
+"""
+Warm interpreter server used by functions/warm_interpreter.py (POSIX only).
+
+Started once per working directory as: python warm_worker.py <working_directory>
+It pre-imports common modules and the project's package modules, then reads
+one JSON request per line from stdin:
+    {"path": ..., "args": [...], "stdout": ..., "stderr": ..., "timeout": ...,
+     "rlimits": [[resource, soft, hard], ...]}
+Each request runs in a freshly forked child (so runs never see each other's
+state) with its stdout/stderr redirected to the given files and the given
+rlimits applied. One JSON reply
+per request is written back: {"returncode": N} or {"timeout": true}.
+"""
+
+import json
+import os
+import resource
+import runpy
+import signal
+import sys
+import time
+import traceback
+
+# Modules most scripts/test suites need; importing them once is the point
+WARM_IMPORTS = ["unittest", "json", "re", "math", "decimal", "datetime", "argparse"]
+
+# Directories never imported from while warming up
+SKIP_DIRS = {".git", ".venv", "venv", "node_modules", "__pycache__"}
+
+
+def project_module_names(working_directory):
+    """Dotted names of the .py modules inside the project's subdirectories."""
+    names = []
+    for root, dirs, files in os.walk(working_directory):
+        dirs[:] = [d for d in dirs if d not in SKIP_DIRS and not d.startswith(".")]
+        if root == working_directory:
+            continue  # Top-level files are scripts, importing them would run them
+        package = os.path.relpath(root, working_directory).replace(os.sep, ".")
+        if not all(part.isidentifier() for part in package.split(".")):
+            continue
+        for file in sorted(files):
+            if file.endswith(".py") and file[:-3].isidentifier():
+                module = file[:-3]
+                names.append(package if module == "__init__" else f"{package}.{module}")
+    return names
+
+
+def warm_up(working_directory):
+    """
+    Imports common and project modules, ignoring any that fail.
+    Returns {module name: (file, mtime_ns)} for the project modules imported.
+    """
+    for name in WARM_IMPORTS:
+        try:
+            __import__(name)
+        except BaseException:
+            pass
+
+    sys.path.insert(0, working_directory)
+    for name in project_module_names(working_directory):
+        try:
+            __import__(name)
+        except BaseException:
+            pass
+    sys.path.remove(working_directory)
+
+    return project_modules(working_directory)
+
+
+def project_modules(working_directory):
+    modules = {}
+    for name, module in list(sys.modules.items()):
+        file = getattr(module, "__file__", None)
+        if file and os.path.abspath(file).startswith(working_directory + os.sep):
+            try:
+                modules[name] = (file, os.stat(file).st_mtime_ns)
+            except OSError:
+                modules[name] = (file, None)
+    return modules
+
+
+def drop_stale_modules(warmed):
+    """
+    If any pre-imported project file changed since warm-up, forget all of
+    them so the script imports the current code (modules can hold references
+    to each other, so dropping only the changed one is not enough).
+    """
+    for file, mtime_ns in warmed.values():
+        try:
+            current = os.stat(file).st_mtime_ns
+        except OSError:
+            current = None
+        if current != mtime_ns:
+            for name in warmed:
+                sys.modules.pop(name, None)
+            return
+
+
+def run_child(request, warmed):
+    """Runs one script in the forked child and exits with its exit code."""
+    code = 0
+    try:
+        devnull = os.open(os.devnull, os.O_RDONLY)
+        os.dup2(devnull, 0)
+        os.dup2(os.open(request["stdout"], os.O_WRONLY | os.O_TRUNC), 1)
+        os.dup2(os.open(request["stderr"], os.O_WRONLY | os.O_TRUNC), 2)
+        for kind, soft, hard in request.get("rlimits", []):
+            resource.setrlimit(kind, (soft, hard))
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+
+        drop_stale_modules(warmed)
+        path = request["path"]
+        sys.argv = [path, *request["args"]]
+        sys.path[0] = os.path.dirname(path)  # Same as `python path`
+        runpy.run_path(path, run_name="__main__")
+    except SystemExit as e:
+        if e.code is None:
+            code = 0
+        elif isinstance(e.code, int):
+            code = e.code
+        else:
+            print(e.code, file=sys.stderr)
+            code = 1
+    except BaseException as e:
+        # Report the traceback the way `python path` would, without our frames
+        tb = e.__traceback__
+        while tb and tb.tb_frame.f_code.co_filename != request["path"]:
+            tb = tb.tb_next
+        traceback.print_exception(type(e), e, tb)
+        code = 1
+    finally:
+        try:
+            sys.stdout.flush()
+            sys.stderr.flush()
+        finally:
+            os._exit(code & 0xFF)
+
+
+def wait_for_child(pid, timeout):
+    """Waits for the child, killing it after timeout. Returns the reply dict."""
+    deadline = time.monotonic() + timeout
+    delay = 0.0005
+    while True:
+        finished, status = os.waitpid(pid, os.WNOHANG)
+        if finished:
+            return {"returncode": os.waitstatus_to_exitcode(status)}
+        if time.monotonic() >= deadline:
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+            return {"timeout": True}
+        time.sleep(delay)
+        delay = min(delay * 2, 0.01)
+
+
+def serve(working_directory):
+    # Replies go through a private copy of stdout; the real fds 1/2 are
+    # silenced so stray prints from warm-up imports can't corrupt the protocol
+    replies = os.fdopen(os.dup(1), "w", encoding="utf-8")
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, 1)
+    os.dup2(devnull, 2)
+
+    os.chdir(working_directory)
+    warmed = warm_up(working_directory)
+
+    for line in sys.stdin:
+        request = json.loads(line)
+        sys.stdout.flush()
+        sys.stderr.flush()
+        pid = os.fork()
+        if pid == 0:
+            replies.close()
+            run_child(request, warmed)
+        replies.write(json.dumps(wait_for_child(pid, request["timeout"])) + "\n")
+        replies.flush()
+
+
+if __name__ == "__main__":
+    serve(os.path.abspath(sys.argv[1]))
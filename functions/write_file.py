@@ -1,5 +1,8 @@
 import os
+import uuid
 from google.genai import types
+from functions.cache import tool_cache
+from functions.search_code import update_search_index
 
 
 def write_file(working_directory, file_path, content):
@@ -27,8 +30,9 @@ def write_file(working_directory, file_path, content):
 
     # 3. Write the content
     try:
-        with open(target_file_abs, "w", encoding="utf-8") as f:
-            f.write(content)
+        atomic_write(target_file_abs, content)
+        tool_cache.invalidate(target_file_abs)
+        update_search_index(working_directory, target_file_abs)
         return (
             f'Successfully wrote to "{file_path}" ({len(content)} characters written)'
         )
@@ -36,6 +40,41 @@ def write_file(working_directory, file_path, content):
         return f"Error: Failed to write to {file_path}: {e}"
 
 
+def atomic_write(target_file_abs, content, newline=None):
+    """
+    Writes content to a temp file next to the target and renames it over the
+    target, so the file is never seen half-written. Like open(path, "w"), it
+    writes through symlinks, translates newlines (unless newline="" is
+    given, as edit_file does to keep a file's own line endings), keeps an
+    existing file's mode and gives new files the default mode minus umask.
+    """
+    target_file_abs = os.path.realpath(target_file_abs)
+    directory, name = os.path.split(target_file_abs)
+    fd, temp_path = _create_temp(directory, name)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", newline=newline) as f:
+            f.write(content)
+        if os.path.exists(target_file_abs):
+            os.chmod(temp_path, os.stat(target_file_abs).st_mode & 0o7777)
+        os.replace(temp_path, target_file_abs)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+def _create_temp(directory, name):
+    """Creates an unused temp file; the kernel applies the umask to its 0o666 mode."""
+    while True:
+        temp_path = os.path.join(directory, f".{name}.{uuid.uuid4().hex[:8]}.tmp")
+        try:
+            return os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666), temp_path
+        except FileExistsError:
+            continue
+
+
 # --- Schema for Gemini / LLM function calling ---
 def make_function_schema(name, description, params):
     return {
@@ -1,80 +1,19 @@
 import os
 import sys
-import json
-from dotenv import load_dotenv
-from google import genai
-from google.genai import types
-from functions.get_files_info import get_files_info, schema_get_files_info
-from functions.get_file_content import get_file_content, schema_get_file_content
-from functions.write_file import write_file, schema_write_file
-from functions.run_python_file import run_python_file, schema_run_python_file
-from functions.delete_file import delete_file, schema_delete_file
-from functions.get_project_description import (
-    get_project_description,
-    schema_get_project_description,
-)
-
-# --- Configuration & Initialization ---
-
-# Load environment variables
-load_dotenv()
-api_key = os.environ.get("GEMINI_API_KEY")
-
-try:
-    if not api_key:
-        # Improved: Raise a more user-friendly error
-        raise ValueError(
-            "GEMINI_API_KEY environment variable not found. Please set it in your .env file."
-        )
-    client = genai.Client(api_key=api_key)
-except Exception as e:
-    print(f"Error initializing Gemini client: {e}")
-    sys.exit(1)
+import threading
+import time
 
-# Parse CLI flags (Simplified to check for verbose, and usage is now part of verbose)
-args = sys.argv[1:]
-verbose_mode = "--verbose" in args
-# usage_mode is now implicitly controlled by verbose_mode for cleaner UI separation
-
-# Hardcoded working directory (Ensure this is correct and accessible!)
-WORKING_DIR = r"C:\Users\Muhammad Rameez\Documents\CodeCrafter\calculator"
-if verbose_mode:
-    print(f"Working Directory: {WORKING_DIR}")
-
-# Load project metadata once at startup
-try:
-    with open(
-        os.path.join(WORKING_DIR, "project_description.json"), "r", encoding="utf-8"
-    ) as f:
-        PROJECT_METADATA = json.load(f)
-except FileNotFoundError:
-    print(
-        f"Error: project_description.json not found in {WORKING_DIR}. File access control may be incomplete."
-    )
-    PROJECT_METADATA = {"key_files": {}}
-except Exception as e:
-    print(f"Error loading project_description.json: {e}")
-    PROJECT_METADATA = {"key_files": {}}
-
-KEY_FILES = list(PROJECT_METADATA["key_files"].keys())
-
-# Define the content to inject into the start of the conversation
-# Using a system role for project metadata is often better than a user role for context injection
-PROJECT_SUMMARY_MESSAGE = types.Content(
-    role="user",  # Changed to 'system' to align with modern best practices for context
-    parts=[
-        types.Part(text=f"Project Metadata: {json.dumps(PROJECT_METADATA, indent=2)}")
-    ],
-)
+# Startup only needs the standard library: the google-genai SDK, the agent
+# loop and the tool modules are imported on the first prompt (or by a
+# background thread while the user types), never at import time.
 
 # Agent Name for clear terminal output
 AGENT_NAME = "CodeCrafter"
+MODEL_NAME = "gemini-2.5-flash"
 
-
-def is_file_allowed(file_path: str) -> bool:
-    """Ensure file path is in project metadata key_files."""
-    # Check if the file_path matches any of the relative paths in KEY_FILES
-    return any(file_path == kf for kf in KEY_FILES)
+# Hardcoded working directory (Ensure this is correct and accessible!)
+WORKING_DIR = r"C:\Users\Muhammad Rameez\Documents\CodeCrafter\calculator"
+PROJECT_DESCRIPTION_PATH = os.path.join(WORKING_DIR, "project_description.json")
 
 
 # System prompt (The instruction set for the model) - Kept largely the same
@@ -97,7 +36,10 @@ Self-Correction: If a function's output (like a traceback from `run_python_file`
 Your operations are strictly limited to the following file system and execution primitives (all paths must be RELATIVE to the working directory):
 - **get_files_info**: Lists contents of a directory. Use primarily for quick confirmation of existence, not for discovering files (use metadata for that).
 - **get_file_content**: Fetches the code or data required for detailed analysis or modification.
-- **write_file**: Creates or overwrites code, configuration, or data files. (The primary action tool).
+- **get_symbols**: Outlines a Python file (classes, functions, methods with line ranges), or returns the source of one symbol such as `Calculator._evaluate_infix`. Prefer it over get_file_content when you need a single function.
+- **search_code**: Finds the lines matching a string or regex across the project (file:line snippets). Use it to locate a definition or usage instead of reading whole files.
+- **write_file**: Creates or overwrites code, configuration, or data files. Use it for new files or full rewrites.
+- **edit_file**: Changes part of an existing file with a unified diff or search/replace edits. (The primary action tool: prefer it over write_file for fixes, so you never resend a whole file).
 - **delete_file**: Safely removes a file from the working directory. Use with extreme caution and only when explicitly required by the user or your plan.
 - **run_python_file**: Runs a Python script to test, compile, or run logic, returning the stdout and stderr output.
 - **get_project_description**: Fetches the project metadata.
@@ -111,181 +53,296 @@ and locations in "debug\\_notes" to select the minimal set of files to read. Onl
 * dont use bold, italic or any other markdown in your responses
 """
 
-# Combine all function schemas into the Tool definition
-available_functions = types.Tool(
-    function_declarations=[
-        schema_get_files_info,
-        schema_get_file_content,
-        schema_write_file,
-        schema_run_python_file,
-        schema_delete_file,
-        schema_get_project_description,
-    ]
-)
-
-# Initialize chat history OUTSIDE the loop to maintain context
-messages = []
-
-# --- Main Agent Loop ---
-
-if verbose_mode:
-    print("\n--- Verbose Mode: DEBUGGING AND USAGE DATA ENABLED ---\n")
-
-while True:
-    user_prompt = input("\nRameez: ")
-    if user_prompt.lower() in ["e", "q", "exit", "quit"]:
-        break
-
-    # Improvement: Append the new user message to the existing history
-    messages.append(types.Content(role="user", parts=[types.Part(text=user_prompt)]))
-
-    # --- Inject Project Metadata on the FIRST turn only ---
-    if len(messages) == 1:
-        # Insert the PROJECT_SUMMARY_MESSAGE as a system message at the start (index 0)
-        messages.insert(0, PROJECT_SUMMARY_MESSAGE)
-        if verbose_mode:
-            print("Injected Project Metadata into chat history as system message.")
 
-    # --- Agentic Loop (max 20 steps) ---
-    for step in range(20):
-        if verbose_mode:
-            print(f"\n[Agentic Step {step + 1}] Calling model...")
+def flag_value(args, name, default=None):
+    """Returns the value of a "--name=value" CLI flag, or the default."""
+    for arg in args:
+        if arg.startswith(f"{name}="):
+            return arg.split("=", 1)[1]
+    return default
+
+
+def configure_run_limits(args):
+    """Applies --live-output and the --run-* limit flags to run_python_file."""
+    flags = ["--run-timeout", "--run-cpu", "--run-memory-mb", "--run-open-files"]
+    if "--live-output" not in args and not any(flag_value(args, f) for f in flags):
+        return
+    from functions.process_runner import run_limits
+
+    run_limits.live_output = "--live-output" in args
+    run_limits.timeout = int(flag_value(args, "--run-timeout", run_limits.timeout))
+    run_limits.cpu_seconds = int(flag_value(args, "--run-cpu", run_limits.cpu_seconds))
+    memory_mb = flag_value(args, "--run-memory-mb")
+    if memory_mb is not None:
+        run_limits.memory_bytes = int(memory_mb) * 1024 * 1024
+    run_limits.open_files = int(
+        flag_value(args, "--run-open-files", run_limits.open_files)
+    )
+
+
+class LazyClient:
+    """
+    Stands in for the model client and builds it (importing the SDK) on the
+    first attribute access, i.e. the first model call.
+    """
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._client = None
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = self._factory()
+        return getattr(self._client, name)
+
+
+def create_client(args):
+    """
+    The model backend for the CLI flags: --replay=FILE serves recorded
+    responses offline (no API key needed), --record=FILE saves every response
+    of a real session to FILE. Exits if a real client has no API key.
+    """
+    replay_path = flag_value(args, "--replay")
+    record_path = flag_value(args, "--record")
+
+    if replay_path:
+
+        def build_replay():
+            from agent.model_backend import ReplayBackend
+
+            return ReplayBackend(replay_path)
+
+        return LazyClient(build_replay)
+
+    # Load environment variables
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    api_key = os.environ.get("GEMINI_API_KEY")
+    if not api_key:
+        print(
+            "Error initializing Gemini client: GEMINI_API_KEY environment variable not found. Please set it in your .env file."
+        )
+        sys.exit(1)
+
+    def build_client():
+        from google import genai
+
+        client = genai.Client(api_key=api_key)
+        if record_path:
+            from agent.model_backend import RecordingBackend
+
+            client = RecordingBackend(client, record_path)
+        return client
+
+    return LazyClient(build_client)
+
+
+def prewarm():
+    """Imports the agent loop and builds the tool declarations ahead of the first prompt."""
+    try:
+        from agent.tools import get_available_functions
+
+        import agent.loop  # noqa: F401
+
+        get_available_functions()
+    except Exception:
+        pass  # The first prompt imports them again and reports any error
 
+
+def create_scheduler(args, requests_per_minute=None, notify=None):
+    """
+    The model-call scheduler: --rpm/--tpm client-side budget, --max-retries,
+    --hedge (adaptive) or --hedge-after=SECONDS (fixed hedge delay).
+    """
+    from agent.scheduler import DEFAULT_MAX_RETRIES, CallBudget, ModelScheduler
+
+    rpm = flag_value(args, "--rpm", requests_per_minute)
+    tpm = flag_value(args, "--tpm")
+    hedge_after = flag_value(args, "--hedge-after")
+    return ModelScheduler(
+        CallBudget(
+            requests_per_minute=float(rpm) if rpm else None,
+            tokens_per_minute=int(tpm) if tpm else None,
+        ),
+        max_retries=int(flag_value(args, "--max-retries", DEFAULT_MAX_RETRIES)),
+        hedge="--hedge" in args or hedge_after is not None,
+        hedge_after=float(hedge_after) if hedge_after is not None else None,
+        notify=notify,
+    )
+
+
+def open_session(args):
+    """
+    The session log for this run and the records to restore:
+    --resume=ID (or `--resume ID`) continues a saved session, plain --resume
+    the latest one; --no-session keeps nothing on disk.
+    Returns (SessionLog or None, records).
+    """
+    if "--no-session" in args:
+        return None, []
+    from agent.session import SessionLog, list_sessions, read_session
+
+    session_id = flag_value(args, "--resume")
+    if "--resume" in args:
+        position = args.index("--resume") + 1
+        if position < len(args) and not args[position].startswith("--"):
+            session_id = args[position]
+        else:
+            saved = list_sessions(WORKING_DIR)
+            session_id = saved[-1] if saved else None
+            if session_id is None:
+                print("No saved session to resume; starting a new one.")
+
+    records = []
+    if session_id:
+        started = time.perf_counter()
         try:
-            response = client.models.generate_content(
-                model="gemini-2.5-flash",
-                contents=messages,
-                config=types.GenerateContentConfig(
-                    tools=[available_functions], system_instruction=system_prompt
-                ),
-            )
-        except Exception as e:
-            print(f"Error generating content: {e}")
-            # Clean up history after a model error to allow a fresh start
-            messages.pop()  # Remove the last user message
-            if (
-                len(messages) > 0 and messages[0].role == "system"
-            ):  # Remove injected metadata if it's the only other thing
-                messages.pop(0)
-            break
+            records = read_session(WORKING_DIR, session_id)
+        except FileNotFoundError:
+            print(f"Error: no saved session {session_id!r} in {WORKING_DIR}.")
+            sys.exit(1)
+        prompts = sum(1 for kind, _ in records if kind == "prompt")
+        print(
+            f"Resumed session {session_id}: {prompts} prompts, {len(records)} records "
+            f"({(time.perf_counter() - started) * 1000:.1f} ms)"
+        )
+    return SessionLog(WORKING_DIR, session_id, {"model": MODEL_NAME}), records
+
+
+def run_batch_mode(client, args, tracer):
+    """
+    python main.py --batch=tasks.jsonl [--output=results.jsonl] [--concurrency=N] [--rpm=N]
+    Returns the process exit code.
+    """
+    import asyncio
+
+    from agent.batch import DEFAULT_CONCURRENCY, DEFAULT_REQUESTS_PER_MINUTE, run_batch
+
+    output_path = flag_value(args, "--output", "batch_results.jsonl")
+    succeeded, failed = asyncio.run(
+        run_batch(
+            client,
+            flag_value(args, "--batch"),
+            output_path,
+            model=MODEL_NAME,
+            system_instruction=system_prompt,
+            working_dir=WORKING_DIR,
+            concurrency=int(flag_value(args, "--concurrency", DEFAULT_CONCURRENCY)),
+            tracer=tracer,
+            scheduler=create_scheduler(args, DEFAULT_REQUESTS_PER_MINUTE),
+        )
+    )
+    print(f"Batch finished: {succeeded} succeeded, {failed} failed -> {output_path}")
+    return 1 if failed else 0
 
-        # 1. Add model's reasoning/thoughts (content) to history
-        if response.candidates and response.candidates[0].content:
-            messages.append(response.candidates[0].content)
-
-        # 2. Handle tool calls
-        if response.function_calls:
-            for fc in response.function_calls:
-                func_name = fc.name
-                func_args = dict(fc.args)
-
-                # --- File Access Control Logic ---
-                # Determine the path for access control checks
-                file_path = func_args.get("file_path")
-
-                # Check for file path access restriction on relevant functions
-                if (
-                    func_name
-                    in [
-                        "write_file",
-                        "get_file_content",
-                        "delete_file",
-                        "run_python_file",
-                    ]
-                    and file_path
-                ):
-                    if not is_file_allowed(file_path):
-                        result = f"SECURITY ERROR: Operation on file_path '{file_path}' is not permitted. File must be listed in 'key_files'."
-
-                        # Only show security error result in verbose mode, or if a security error occurs
-                        print(f"SECURITY VIOLATION on {func_name}({file_path})")
-                        if verbose_mode:
-                            print(f" - Function result: {result}")
-
-                        # Feedback to agent (so it knows tool outcome) - ALWAYS send the full result to the model
-                        messages.append(
-                            types.Content(
-                                role="user",
-                                parts=[
-                                    types.Part(text=f"Function call result: {result}")
-                                ],
-                            )
-                        )
-                        continue  # Move to the next function call or loop step
-                # --- End File Access Control Logic ---
-
-                # --- Clean UI for Function Call (Non-Verbose Mode) ---
-                if func_name == "write_file":
-                    # For write, only show the file path and that content is being written
-                    display_args = f"file_path='{file_path}', content='...' (writing {len(func_args.get('content', ''))} chars)"
-                elif func_name == "run_python_file":
-                    display_args = f"file_path='{file_path}'"
-                elif file_path:
-                    display_args = f"file_path='{file_path}'"
-                else:
-                    display_args = ", ".join(f"{k}='{v}'" for k, v in func_args.items())
-
-                # Show a glance of the action for the end user
-                # This is NOT recommended as it uses the old, fragile logic.
-                print(
-                    f"Calling {func_name} for {func_args.get('file_path', 'context').replace('file_path=', '')}"
-                )
-
-                # Show full arguments only in verbose mode
-                if verbose_mode:
-                    print(f" - Full Function Call: {func_name}({func_args})")
-
-                try:
-                    # Function execution logic
-                    if func_name == "get_files_info":
-                        result = get_files_info(WORKING_DIR, **func_args)
-                    elif func_name == "get_file_content":
-                        result = get_file_content(WORKING_DIR, **func_args)
-                    elif func_name == "write_file":
-                        result = write_file(WORKING_DIR, **func_args)
-                    elif func_name == "run_python_file":
-                        result = run_python_file(WORKING_DIR, **func_args)
-                    elif func_name == "delete_file":
-                        result = delete_file(WORKING_DIR, **func_args)
-                    elif func_name == "get_project_description":
-                        result = get_project_description(WORKING_DIR, **func_args)
-                    else:
-                        result = f"Error: Unknown function {func_name}"
-                except Exception as e:
-                    # Capture execution errors clearly for the model and user
-                    result = f"ERROR executing {func_name}: {e}"
-
-                # Print result to the user only in verbose mode
-                if verbose_mode:
-                    print(f" - Function result: {result}")
-
-                # 3. Feedback to agent (so it knows tool outcome) - ALWAYS send the result to the model
-                messages.append(
-                    types.Content(
-                        role="user",
-                        parts=[types.Part(text=f"Function call result: {result}")],
-                    )
-                )
-
-        # 4. If final text output exists, finish loop
-        elif response.text:
-            print(f"\n{AGENT_NAME}:\n", response.text)
-            break
 
-        # 5. Check for max steps
-        if step == 19:
-            print(
-                f"\n[{AGENT_NAME} reached max steps ({step + 1}) without providing a final response. Resetting conversation.]"
-            )
-            messages = []
+def main(argv=None):
+    """Console entry point: `codecrafter [flags]` or `python main.py [flags]`."""
+    # Parse CLI flags (usage is part of verbose)
+    args = sys.argv[1:] if argv is None else list(argv)
+    verbose_mode = "--verbose" in args
+    stream_mode = "--stream" in args  # Print model text as it is generated
+
+    client = create_client(args)
+
+    # Optional telemetry: --trace=trace.jsonl records per-step/model/tool spans
+    # (summarize with `python -m agent.tracing trace.jsonl`), --profile=out.prof
+    # runs cProfile over the agent loop.
+    from agent.tracing import Tracer, start_profile, stop_profile
+
+    tracer = Tracer(flag_value(args, "--trace"))
+    profile_path = flag_value(args, "--profile")
+
+    if verbose_mode:
+        print(f"Working Directory: {WORKING_DIR}")
+
+    # Optional: run Python files in forks of a pre-imported interpreter
+    if "--warm-python" in args:
+        from functions.warm_interpreter import warm_pool
+
+        if warm_pool.start(WORKING_DIR):
+            if verbose_mode:
+                print("Warm interpreter pool enabled for run_python_file.")
+        else:
+            print("Warning: --warm-python needs os.fork; using a new process per run.")
+
+    # Optional: limits and live output for run_python_file (rlimits are POSIX only)
+    configure_run_limits(args)
+
+    # --- Headless Batch Mode ---
+    if flag_value(args, "--batch"):
+        try:
+            return run_batch_mode(client, args, tracer)
+        finally:
+            tracer.close()
+
+    # --- Main Agent Loop ---
+
+    if verbose_mode:
+        print("\n--- Verbose Mode: DEBUGGING AND USAGE DATA ENABLED ---\n")
+
+    # Sessions are saved incrementally; --resume reloads one
+    session, resumed_records = open_session(args)
+
+    # The SDK and tools load while the user types the first prompt
+    threading.Thread(target=prewarm, daemon=True).start()
+    profiler = start_profile() if profile_path else None
+    agent = None
+
+    while True:
+        try:
+            user_prompt = input("\nRameez: ")
+        except EOFError:
+            break
+        if user_prompt.lower() in ["e", "q", "exit", "quit"]:
             break
 
-        # 6. Usage info each iteration if in verbose mode
-        if verbose_mode and hasattr(response, "usage_metadata"):
-            usage = response.usage_metadata
-            print("--- Usage Metadata ---")
-            print(f"Prompt Tokens: {usage.prompt_token_count}")
-            print(f"Response Tokens: {usage.candidates_token_count}")
-            print(
-                f"Total Tokens: {usage.prompt_token_count + usage.candidates_token_count}"
+        if agent is None:
+            from agent.history import DEFAULT_TOKEN_BUDGET
+            from agent.loop import AgentLoop
+
+            agent = AgentLoop(
+                client,
+                model=MODEL_NAME,
+                system_instruction=system_prompt,
+                working_dir=WORKING_DIR,
+                project_description_path=PROJECT_DESCRIPTION_PATH,
+                agent_name=AGENT_NAME,
+                history_budget=int(
+                    flag_value(args, "--history-budget", DEFAULT_TOKEN_BUDGET)
+                ),
+                # Recorded sessions have no server-side caches: send the prefix inline
+                context_cache=not (
+                    "--no-context-cache" in args or flag_value(args, "--replay")
+                ),
+                stream=stream_mode,
+                verbose=verbose_mode,
+                tracer=tracer,
+                scheduler=create_scheduler(args, notify=print),
+                session=session,
             )
+            if resumed_records:
+                from agent.session import restore_history
+
+                restore_history(agent.history, resumed_records)
+        agent.run_turn(user_prompt)
+
+    if agent is not None:
+        agent.close()
+    if session is not None and (session.records or resumed_records):
+        print(f"Session saved: resume with --resume={session.session_id}")
+    tracer.close()
+    if profiler:
+        top_functions = stop_profile(profiler, profile_path)
+        print(f"Profile saved to {profile_path}")
+        if verbose_mode:
+            print(top_functions)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+import os
+import tempfile
+import unittest
+
+from functions.cache import ToolCache, tool_cache
+from functions.edit_file import edit_file
+from functions.get_file_content import get_file_content
+from functions.write_file import write_file
+
+
+class TestToolCache(unittest.TestCase):
+
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.path = os.path.join(temp_dir.name, "a.txt")
+        self.write("one")
+        self.cache = ToolCache()
+        self.computed = 0
+
+    def write(self, text, mtime_ns=None):
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write(text)
+        if mtime_ns is not None:
+            os.utime(self.path, ns=(mtime_ns, mtime_ns))
+
+    def read(self):
+        def compute():
+            self.computed += 1
+            with open(self.path, encoding="utf-8") as f:
+                return f.read()
+
+        return self.cache.get_or_compute("content", self.path, compute)
+
+    def test_unchanged_file_is_served_from_the_cache(self):
+        self.assertEqual(self.read(), "one")
+        self.assertEqual(self.read(), "one")
+        self.assertEqual(self.computed, 1)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+    def test_size_change_recomputes(self):
+        mtime_ns = os.stat(self.path).st_mtime_ns
+        self.read()
+        self.write("three", mtime_ns)  # Same mtime, different size
+        self.assertEqual(self.read(), "three")
+        self.assertEqual(self.computed, 2)
+
+    def test_mtime_change_recomputes(self):
+        mtime_ns = os.stat(self.path).st_mtime_ns
+        self.read()
+        self.write("two", mtime_ns + 1_000_000_000)  # Same size, newer mtime
+        self.assertEqual(self.read(), "two")
+        self.assertEqual(self.computed, 2)
+
+    def test_invalidate_recomputes_even_with_the_same_signature(self):
+        mtime_ns = os.stat(self.path).st_mtime_ns
+        self.read()
+        self.write("two", mtime_ns)  # An edit the (mtime, size) check can't see
+        self.assertEqual(self.read(), "one")
+        self.cache.invalidate(os.path.dirname(self.path))  # Covers files under a directory
+        self.assertEqual(self.read(), "two")
+
+    def test_missing_file_is_not_cached(self):
+        os.remove(self.path)
+        self.assertEqual(self.cache.get_or_compute("content", self.path, lambda: "gone"), "gone")
+        self.assertEqual(self.cache.stats(), "hits: 0, misses: 1, entries: 0")
+
+    def test_lru_bound(self):
+        cache = ToolCache(max_entries=2)
+        for variant in range(3):
+            cache.get_or_compute("content", self.path, lambda: variant, variant)
+        self.assertEqual(len(cache._entries), 2)
+        self.assertNotIn(("content", self.path, 0), cache._entries)
+
+
+class TestToolInvalidation(unittest.TestCase):
+    """write_file/edit_file drop cached reads, even when (mtime, size) end up unchanged."""
+
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.working_dir = temp_dir.name
+        self.path = os.path.join(self.working_dir, "a.txt")
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write("alpha\n")
+        self.mtime_ns = os.stat(self.path).st_mtime_ns
+        self.addCleanup(tool_cache.invalidate, self.working_dir)
+
+    def restore_mtime(self):
+        os.utime(self.path, ns=(self.mtime_ns, self.mtime_ns))
+
+    def test_write_file_invalidates(self):
+        self.assertIn("alpha", get_file_content(self.working_dir, "a.txt"))
+        write_file(self.working_dir, "a.txt", "omega\n")
+        self.restore_mtime()
+        self.assertIn("omega", get_file_content(self.working_dir, "a.txt"))
+
+    def test_edit_file_invalidates(self):
+        self.assertIn("alpha", get_file_content(self.working_dir, "a.txt"))
+        edit_file(self.working_dir, "a.txt", edits=[{"search": "alpha", "replace": "gamma"}])
+        self.restore_mtime()
+        self.assertIn("gamma", get_file_content(self.working_dir, "a.txt"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+import os
+import tempfile
+import unittest
+
+from google.genai import types
+
+from agent.context_cache import PrefixCache
+
+
+class RecordingBackend:
+    """Keeps registered caches in memory instead of calling the API."""
+
+    def __init__(self):
+        self.caches = {}
+        self.created = 0
+
+    def create(self, model, contents, system_instruction, tools, ttl_seconds):
+        self.created += 1
+        name = f"cachedContents/test-{self.created}"
+        self.caches[name] = contents
+        return name
+
+    def delete(self, name):
+        self.caches.pop(name, None)
+
+
+class TestPrefixCache(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.watch_path = os.path.join(self.temp_dir.name, "project_description.json")
+        self.write_description("{}")
+        self.backend = RecordingBackend()
+
+    def write_description(self, text):
+        with open(self.watch_path, "w", encoding="utf-8") as f:
+            f.write(text)
+
+    def make_cache(self, **options):
+        def build_prefix():
+            with open(self.watch_path, encoding="utf-8") as f:
+                return [types.Content(role="user", parts=[types.Part(text=f.read())])]
+
+        options.setdefault("min_tokens", 1)
+        cache = PrefixCache(
+            self.backend, "model", "system", [], build_prefix, watch_path=self.watch_path, **options
+        )
+        self.addCleanup(cache.close)
+        return cache
+
+    def test_hit_reuses_registered_prefix(self):
+        cache = self.make_cache()
+        self.assertEqual(cache.cache_name, "cachedContents/test-1")
+        self.assertFalse(cache.refresh_if_changed())
+        self.assertEqual(self.backend.created, 1)
+        self.assertEqual(cache.config().cached_content, "cachedContents/test-1")
+        self.assertEqual(cache.contents(["message"]), ["message"])
+
+    def test_miss_when_watched_file_changes(self):
+        cache = self.make_cache()
+        self.write_description('{"project_name": "changed"}')
+        self.assertTrue(cache.refresh_if_changed())
+        self.assertEqual(cache.cache_name, "cachedContents/test-2")
+        self.assertEqual(list(self.backend.caches), ["cachedContents/test-2"])
+        self.assertIn("changed", cache.prefix[0].parts[0].text)
+
+    def test_expired_cache_is_registered_again(self):
+        cache = self.make_cache(ttl_seconds=60)  # Refreshed a minute early: expired at once
+        self.assertTrue(cache.refresh_if_changed())
+        self.assertEqual(cache.cache_name, "cachedContents/test-2")
+        self.assertEqual(len(self.backend.caches), 1)
+
+    def test_small_prefix_is_sent_inline(self):
+        cache = self.make_cache(min_tokens=10**6)
+        self.assertIsNone(cache.cache_name)
+        self.assertEqual(self.backend.created, 0)
+        self.assertEqual(cache.contents(["message"]), cache.prefix + ["message"])
+        self.assertIsNone(cache.config().cached_content)
+
+
+if __name__ == "__main__":
+    unittest.main()
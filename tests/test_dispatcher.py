@@ -0,0 +1,91 @@
+import threading
+import time
+import unittest
+
+from agent.dispatcher import ToolDispatcher, calls_conflict, dispatch_function_calls
+
+
+class TestCallsConflict(unittest.TestCase):
+
+    def test_read_only_calls_never_conflict(self):
+        read = ("get_file_content", {"file_path": "main.py"})
+        listing = ("get_files_info", {"directory": "."})
+        self.assertFalse(calls_conflict(read, read))
+        self.assertFalse(calls_conflict(read, listing))
+
+    def test_writes_conflict_with_calls_on_the_same_path(self):
+        write = ("write_file", {"file_path": "./pkg/a.py", "content": ""})
+        self.assertTrue(calls_conflict(write, ("get_file_content", {"file_path": "pkg/a.py"})))
+        self.assertTrue(calls_conflict(("edit_file", {"file_path": "pkg\\a.py"}), write))
+        self.assertFalse(calls_conflict(write, ("get_file_content", {"file_path": "pkg/b.py"})))
+
+    def test_wide_calls_conflict_with_any_write(self):
+        write = ("write_file", {"file_path": "pkg/a.py", "content": ""})
+        self.assertTrue(calls_conflict(write, ("search_code", {"pattern": "x"})))
+        self.assertTrue(calls_conflict(("run_python_file", {"file_path": "main.py"}), write))
+
+
+class TestToolDispatcher(unittest.TestCase):
+
+    def test_writes_to_the_same_path_keep_their_order(self):
+        order = []
+
+        def execute(func_name, func_args):
+            # The first write is slower, so running them out of order would show
+            time.sleep(func_args["delay"])
+            order.append(func_args["content"])
+            return func_args["content"]
+
+        calls = [
+            ("write_file", {"file_path": "a.txt", "content": "first", "delay": 0.05}),
+            ("write_file", {"file_path": "a.txt", "content": "second", "delay": 0}),
+        ]
+        self.assertEqual(dispatch_function_calls(calls, execute), ["first", "second"])
+        self.assertEqual(order, ["first", "second"])
+
+    def test_read_only_calls_run_concurrently(self):
+        barrier = threading.Barrier(3, timeout=1)
+
+        def execute(func_name, func_args):
+            barrier.wait()  # Breaks unless all three reads are running at once
+            return func_args["file_path"]
+
+        calls = [("get_file_content", {"file_path": f"{name}.py"}) for name in "abc"]
+        self.assertEqual(dispatch_function_calls(calls, execute), ["a.py", "b.py", "c.py"])
+
+    def test_failed_dependency_still_unblocks_later_calls(self):
+        def execute(func_name, func_args):
+            if func_name == "write_file":
+                raise OSError("disk full")
+            return "read"
+
+        with ToolDispatcher(execute) as dispatcher:
+            write = dispatcher.submit("write_file", {"file_path": "a.txt", "content": ""})
+            read = dispatcher.submit("get_file_content", {"file_path": "a.txt"})
+            self.assertEqual(read.result(timeout=1), "read")
+        self.assertIsInstance(write.exception(), OSError)
+
+    def test_later_call_waits_for_a_conflicting_submit(self):
+        started = threading.Event()
+        release = threading.Event()
+        events = []
+
+        def execute(func_name, func_args):
+            if func_name == "write_file":
+                started.set()
+                release.wait(1)
+            events.append(func_name)
+
+        with ToolDispatcher(execute) as dispatcher:
+            dispatcher.submit("write_file", {"file_path": "a.txt", "content": ""})
+            self.assertTrue(started.wait(1))
+            read = dispatcher.submit("get_file_content", {"file_path": "a.txt"})
+            time.sleep(0.02)
+            self.assertFalse(read.done())
+            release.set()
+            read.result(timeout=1)
+        self.assertEqual(events, ["write_file", "get_file_content"])
+
+
+if __name__ == "__main__":
+    unittest.main()
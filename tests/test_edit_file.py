@@ -0,0 +1,51 @@
+import unittest
+
+from functions.edit_file import apply_search_replace, apply_unified_diff
+
+
+class TestApplyUnifiedDiff(unittest.TestCase):
+
+    def test_pure_insertion_goes_after_the_named_line(self):
+        content, added, removed, _ = apply_unified_diff(
+            "a\nb\nc\nd\ne\n", "@@ -5,0 +6,1 @@\n+f\n"
+        )
+        self.assertEqual(content, "a\nb\nc\nd\ne\nf\n")
+        self.assertEqual((added, removed), (1, 0))
+
+    def test_insertion_at_the_top(self):
+        content, _, _, _ = apply_unified_diff("a\nb\n", "@@ -0,0 +1 @@\n+z\n")
+        self.assertEqual(content, "z\na\nb\n")
+
+    def test_insertion_after_an_earlier_hunk(self):
+        patch = "@@ -1 +1,2 @@\n a\n+a2\n@@ -3,0 +5 @@\n+c2\n"
+        content, _, _, count = apply_unified_diff("a\nb\nc\nd\n", patch)
+        self.assertEqual(content, "a\na2\nb\nc\nc2\nd\n")
+        self.assertEqual(count, 2)
+
+
+class TestApplySearchReplace(unittest.TestCase):
+
+    def test_one_line_replacement_counts_one_line(self):
+        content, added, removed, _ = apply_search_replace(
+            "x = 1\ny = 2\nz = 3\n", [{"search": "y = 2\n", "replace": "y = 20\n"}]
+        )
+        self.assertEqual(content, "x = 1\ny = 20\nz = 3\n")
+        self.assertEqual((added, removed), (1, 1))
+
+    def test_counts_only_changed_lines_of_a_block(self):
+        _, added, removed, _ = apply_search_replace(
+            "def f():\n    return 1\n",
+            [{"search": "def f():\n    return 1", "replace": "def f():\n    x = 1\n    return x"}],
+        )
+        self.assertEqual((added, removed), (2, 1))
+
+    def test_deleted_line(self):
+        content, added, removed, _ = apply_search_replace(
+            "x = 1\ny = 2\n", [{"search": "x = 1\n", "replace": ""}]
+        )
+        self.assertEqual(content, "y = 2\n")
+        self.assertEqual((added, removed), (0, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
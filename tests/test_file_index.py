@@ -0,0 +1,98 @@
+import os
+import tempfile
+import unittest
+
+from functions.file_index import FileIndex
+from functions.get_files_info import get_files_info
+
+
+class TestFileIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.path = os.path.join(self.temp_dir.name, "notes.txt")
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write("short\n")
+
+    def listing(self, index):
+        index.refresh()
+        paths = [path for path, _, _ in index.iter_files()]
+        return {path: (size, mtime_ns) for path, size, mtime_ns in index.restat(paths)}
+
+    def edit_in_place(self, text):
+        directory_mtime = os.stat(self.temp_dir.name).st_mtime_ns
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(text)
+        stats = os.stat(self.path)
+        os.utime(self.path, ns=(stats.st_atime_ns, stats.st_mtime_ns + 10**9))
+        # Appending to an existing file leaves its directory untouched
+        self.assertEqual(os.stat(self.temp_dir.name).st_mtime_ns, directory_mtime)
+
+    def test_in_place_edit_updates_size_and_mtime(self):
+        index = FileIndex(self.temp_dir.name)
+        self.listing(index)
+        self.edit_in_place("and a longer second line\n")
+        stats = os.stat(self.path)
+        self.assertEqual(
+            self.listing(index)["notes.txt"], (stats.st_size, stats.st_mtime_ns)
+        )
+
+    def test_refresh_does_not_stat_files_of_unchanged_directories(self):
+        index = FileIndex(self.temp_dir.name)
+        before = self.listing(index)["notes.txt"]
+        self.edit_in_place("more\n")
+        index.refresh()
+        # Only restat (of the files a caller returns) picks up the edit
+        self.assertEqual(index.dirs["."]["files"]["notes.txt"], list(before))
+
+    def test_restat_drops_deleted_files(self):
+        index = FileIndex(self.temp_dir.name)
+        self.listing(index)
+        os.remove(self.path)
+        self.assertEqual(index.restat(["notes.txt"]), [])
+        self.assertNotIn("notes.txt", index.dirs["."]["files"])
+
+    def test_saved_index_is_not_stale(self):
+        index = FileIndex(self.temp_dir.name)
+        self.listing(index)
+        index.save()  # Creates .codecrafter/, which changes the directory's mtime
+        self.listing(index)
+        index.save()
+        self.edit_in_place("more\n")
+        index.restat(["notes.txt"])
+        index.save()
+        stats = os.stat(self.path)
+        reloaded = FileIndex(self.temp_dir.name)
+        self.assertEqual(
+            reloaded.dirs["."]["files"]["notes.txt"], [stats.st_size, stats.st_mtime_ns]
+        )
+
+
+class TestGetFilesInfo(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        os.makedirs(os.path.join(self.temp_dir.name, "pkg"))
+        for name in ("top.txt", "pkg/inner.txt"):
+            with open(os.path.join(self.temp_dir.name, name), "w", encoding="utf-8") as f:
+                f.write("x\n")
+
+    def test_page_shows_in_place_edits(self):
+        get_files_info(self.temp_dir.name)
+        get_files_info(self.temp_dir.name)  # After the index file was first saved
+        path = os.path.join(self.temp_dir.name, "pkg", "inner.txt")
+        with open(path, "a", encoding="utf-8") as f:
+            f.write("y" * 2048)
+        files = {entry["path"]: entry for entry in get_files_info(self.temp_dir.name)["files"]}
+        self.assertEqual(files[os.path.join("pkg", "inner.txt")]["size_kb"], 2.0)
+
+    def test_max_depth_zero_is_not_unlimited(self):
+        result = get_files_info(self.temp_dir.name, max_depth=0)
+        self.assertEqual([entry["path"] for entry in result["files"]], ["top.txt"])
+        self.assertEqual(result["total"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+import os
+import tempfile
+import unittest
+
+from functions.config import MAX_CHARS
+from functions.get_file_content import get_file_content
+
+
+class TestGetFileContent(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+
+    def write(self, name, text):
+        with open(os.path.join(self.temp_dir.name, name), "w", encoding="utf-8", newline="") as f:
+            f.write(text)
+
+    def test_line_longer_than_cap_continues_by_offset(self):
+        self.write("long.txt", "short\n" + "x" * (MAX_CHARS + 50) + "\nend\n")
+        result = get_file_content(self.temp_dir.name, "long.txt", start_line=2)
+        self.assertIn(f"Continue with offset={6 + MAX_CHARS}.", result)
+        self.assertNotIn("start_line=2", result)
+        # Following the hint reads the rest of the line
+        rest = get_file_content(self.temp_dir.name, "long.txt", offset=6 + MAX_CHARS)
+        self.assertIn("x" * 50 + "\nend\n", rest)
+
+    def test_truncated_range_continues_after_last_whole_line(self):
+        line = "y" * 99 + "\n"
+        self.write("lines.txt", line * (MAX_CHARS // 100 + 10))
+        result = get_file_content(self.temp_dir.name, "lines.txt", start_line=1)
+        self.assertIn(f"[Lines 1-{MAX_CHARS // 100}]", result)
+        self.assertIn(f"Continue with start_line={MAX_CHARS // 100 + 1}.", result)
+
+    def test_default_length_read_notes_the_rest(self):
+        self.write("big.txt", "z" * (MAX_CHARS * 2))
+        result = get_file_content(self.temp_dir.name, "big.txt", offset=10)
+        self.assertIn(f"[Bytes 10-{10 + MAX_CHARS}]", result)
+        self.assertIn(f"Continue with offset={10 + MAX_CHARS}.", result)
+
+    def test_read_to_end_has_no_note(self):
+        self.write("small.txt", "abc\n")
+        result = get_file_content(self.temp_dir.name, "small.txt", offset=1)
+        self.assertNotIn("Continue", result)
+        result = get_file_content(self.temp_dir.name, "small.txt", offset=0, length=2)
+        self.assertNotIn("Continue", result)
+
+
+if __name__ == "__main__":
+    unittest.main()
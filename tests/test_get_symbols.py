@@ -0,0 +1,31 @@
+import os
+import tempfile
+import unittest
+
+from functions.get_symbols import get_symbols
+
+
+class TestGetSymbols(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+
+    def test_source_lines_ignore_form_feeds_and_separators(self):
+        source = (
+            '"""Module\x0cdocs with a form feed."""\n'
+            "\x0c\n"
+            "SEPARATOR = ' \x1c'\n"
+            "\n"
+            "def target():\n"
+            "    return 1\n"
+        )
+        with open(os.path.join(self.temp_dir.name, "module.py"), "w", encoding="utf-8") as f:
+            f.write(source)
+        result = get_symbols(self.temp_dir.name, "module.py", symbol="target")
+        self.assertIn("lines 5-6]", result)
+        self.assertTrue(result.endswith("def target():\n    return 1\n"), result)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+import unittest
+
+from agent.history import (
+    CHARS_PER_TOKEN,
+    MIN_RESULT_CHARS,
+    RESULT_PREFIX,
+    SUMMARY_CHARS,
+    ConversationHistory,
+)
+from functions.config import MAX_CHARS
+
+
+def result_text(entry):
+    return entry.content.parts[0].text[len(RESULT_PREFIX) :]
+
+
+class TestReadDedup(unittest.TestCase):
+
+    def test_newer_read_of_the_same_file_replaces_the_older(self):
+        history = ConversationHistory()
+        history.add_user_prompt("read it twice")
+        history.add_tool_result("get_file_content", {"file_path": "a.py"}, "old body")
+        history.add_tool_result("get_file_content", {"file_path": "a.py"}, "new body")
+
+        older, newer = history.entries[1:]
+        self.assertTrue(older.compacted)
+        self.assertIn("Earlier read of 'a.py' removed", result_text(older))
+        self.assertEqual(result_text(newer), "new body")
+
+    def test_different_ranges_and_files_are_kept(self):
+        history = ConversationHistory()
+        history.add_user_prompt("read parts")
+        history.add_tool_result("get_file_content", {"file_path": "a.py", "start_line": 1, "end_line": 10}, "head")
+        history.add_tool_result("get_file_content", {"file_path": "a.py", "start_line": 11, "end_line": 20}, "tail")
+        history.add_tool_result("get_file_content", {"file_path": "b.py"}, "other")
+
+        self.assertEqual([result_text(entry) for entry in history.entries[1:]], ["head", "tail", "other"])
+        self.assertEqual(history.entries[1].target, "a.py [start_line=1, end_line=10]")
+
+    def test_same_range_read_again_is_deduplicated(self):
+        history = ConversationHistory()
+        history.add_user_prompt("read a range twice")
+        args = {"file_path": "a.py", "start_line": 1, "end_line": 10}
+        history.add_tool_result("get_file_content", args, "first")
+        history.add_tool_result("get_file_content", dict(args), "second")
+        self.assertTrue(history.entries[1].compacted)
+
+
+class TestCompact(unittest.TestCase):
+
+    def fill(self, history, turns, result_chars):
+        for turn in range(turns):
+            history.add_user_prompt(f"prompt {turn}")
+            history.add_tool_result("run_python_file", {"file_path": "main.py"}, "x" * result_chars)
+
+    def test_under_budget_is_left_alone(self):
+        history = ConversationHistory(token_budget=10_000)
+        self.fill(history, 3, 400)
+        self.assertEqual(history.compact(), 0)
+        self.assertFalse(any(entry.compacted for entry in history.entries))
+
+    def test_over_budget_summarizes_old_results_and_keeps_recent_turns(self):
+        history = ConversationHistory(token_budget=1_500, keep_recent_turns=2)
+        self.fill(history, 4, 2_000)
+        before = history.estimated_tokens()
+
+        saved = history.compact()
+
+        self.assertGreater(saved, 0)
+        self.assertEqual(history.estimated_tokens(), before - saved)
+        self.assertLessEqual(history.estimated_tokens(), history.token_budget)
+        old_results = [entry for entry in history.entries if entry.kind == "tool_result" and entry.turn <= 2]
+        recent_results = [entry for entry in history.entries if entry.kind == "tool_result" and entry.turn > 2]
+        self.assertTrue(all(entry.compacted for entry in old_results))
+        self.assertIn("compacted", result_text(old_results[0]))
+        self.assertEqual(len(result_text(old_results[0]).split("\n")[0]), SUMMARY_CHARS)
+        self.assertFalse(any(entry.compacted for entry in recent_results))
+
+    def test_drops_whole_old_turns_as_a_last_resort(self):
+        history = ConversationHistory(token_budget=1_000, keep_recent_turns=1)
+        for turn in range(3):
+            # Prompts are never summarized, so only dropping their turn frees them
+            history.add_user_prompt(f"{turn} " + "p" * 2_000)
+        history.compact()
+        self.assertEqual({entry.turn for entry in history.entries}, {3})
+        self.assertEqual(history.entries[0].kind, "prompt")
+
+
+class TestResultLimit(unittest.TestCase):
+
+    def test_limit_is_clamped(self):
+        self.assertEqual(ConversationHistory(token_budget=1_000_000).result_limit(), MAX_CHARS)
+        self.assertEqual(ConversationHistory(token_budget=10).result_limit(), MIN_RESULT_CHARS)
+
+    def test_limit_shrinks_as_recent_turns_fill_the_budget(self):
+        history = ConversationHistory(token_budget=2_000)
+        empty_limit = history.result_limit()
+        history.add_user_prompt("y" * 1_000 * CHARS_PER_TOKEN)
+        self.assertLess(history.result_limit(), empty_limit)
+        self.assertGreaterEqual(history.result_limit(), MIN_RESULT_CHARS)
+
+    def test_new_results_are_cut_to_the_limit(self):
+        history = ConversationHistory(token_budget=10)
+        history.add_user_prompt("read a big file")
+        history.add_tool_result("get_file_content", {"file_path": "big.txt"}, "z" * 50_000)
+        self.assertLess(len(result_text(history.entries[-1])), MIN_RESULT_CHARS + 200)
+
+
+if __name__ == "__main__":
+    unittest.main()
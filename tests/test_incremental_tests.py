@@ -0,0 +1,113 @@
+import os
+import subprocess
+import sys
+import tempfile
+import textwrap
+import unittest
+
+RUNNER = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "functions",
+    "incremental_tests.py",
+)
+
+PROJECT = {
+    "helpers.py": "def prepare():\n    return 1\n",
+    "data.py": "LIMIT = 3\n",
+    "worker.py": "def compute():\n    return 2\n",
+    "spare.py": "def unused():\n    return 0\n",
+    "test_sample.py": textwrap.dedent(
+        """
+        import threading
+        import unittest
+
+        import data
+
+
+        class Fixture(unittest.TestCase):
+            @classmethod
+            def setUpClass(cls):
+                import helpers
+
+                cls.value = helpers.prepare()
+
+            def test_fixture(self):
+                self.assertEqual(self.value, 1)
+
+
+        class ModuleData(unittest.TestCase):
+            def test_limit(self):
+                self.assertEqual(data.LIMIT, 3)
+
+
+        class Threaded(unittest.TestCase):
+            def test_thread(self):
+                results = []
+
+                def work():
+                    import worker
+
+                    results.append(worker.compute())
+
+                thread = threading.Thread(target=work)
+                thread.start()
+                thread.join()
+                self.assertEqual(results, [2])
+        """
+    ),
+}
+
+
+class TestIncrementalTests(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.project = os.path.realpath(self.temp_dir.name)
+        for name, text in PROJECT.items():
+            self.write(name, text)
+
+    def write(self, name, text):
+        with open(os.path.join(self.project, name), "w", encoding="utf-8") as f:
+            f.write(text)
+
+    def run_tests(self):
+        """Runs the incremental runner; returns the ids of the tests that really ran."""
+        completed = subprocess.run(
+            [sys.executable, RUNNER, "test_sample.py", "-v"],
+            cwd=self.project,
+            capture_output=True,
+            text=True,
+            timeout=60,
+        )
+        self.assertEqual(completed.returncode, 0, completed.stderr)
+        return {
+            line.split(" ", 1)[0]
+            for line in completed.stderr.splitlines()
+            if line.startswith("test_") and line.endswith("... ok")
+        }
+
+    def test_unchanged_tests_are_cached(self):
+        self.assertEqual(self.run_tests(), {"test_fixture", "test_limit", "test_thread"})
+        self.assertEqual(self.run_tests(), set())
+        self.write("spare.py", "def unused():\n    return 1\n")
+        self.assertEqual(self.run_tests(), set())
+
+    def test_class_fixture_dependency(self):
+        self.run_tests()
+        self.write("helpers.py", "def prepare():\n    return 2 - 1\n")
+        self.assertIn("test_fixture", self.run_tests())
+
+    def test_module_level_data_dependency(self):
+        self.run_tests()
+        self.write("data.py", "LIMIT = 3  # unchanged value\n")
+        self.assertIn("test_limit", self.run_tests())
+
+    def test_thread_dependency(self):
+        self.run_tests()
+        self.write("worker.py", "def compute():\n    return 1 + 1\n")
+        self.assertIn("test_thread", self.run_tests())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+from types import SimpleNamespace
+
+from google.genai import types
+
+from agent.loop import AgentLoop
+
+
+def chunk(part=None, usage=None):
+    candidates = [types.Candidate(content=types.Content(role="model", parts=[part]))] if part else []
+    return types.GenerateContentResponse(candidates=candidates, usage_metadata=usage)
+
+
+class FakeModels:
+    """Answers each call with the next scripted chunk list; an exception in it is raised mid-stream."""
+
+    def __init__(self, script):
+        self.script = list(script)
+
+    def generate_content_stream(self, **kwargs):
+        for item in self.script.pop(0):
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+
+class TestAgentLoopStream(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.working_dir = tmp.name
+        with open(os.path.join(self.working_dir, "a.py"), "w") as f:
+            f.write("x = 1\n")
+        with open(os.path.join(self.working_dir, "project_description.json"), "w") as f:
+            f.write('{"key_files": {"a.py": "module"}}')
+
+    def make_agent(self, script, verbose=False):
+        agent = AgentLoop(
+            client=SimpleNamespace(models=FakeModels(script)),
+            model="test-model",
+            system_instruction="",
+            working_dir=self.working_dir,
+            project_description_path=os.path.join(self.working_dir, "project_description.json"),
+            agent_name="Agent",
+            context_cache=False,
+            stream=True,
+            verbose=verbose,
+            quiet=not verbose,
+        )
+        self.addCleanup(agent.close)
+        return agent
+
+    def test_failure_before_any_output_drops_the_prompt(self):
+        agent = self.make_agent([[ConnectionResetError("stream dropped")]])
+        agent.scheduler.max_retries = 0
+        result = agent.run_turn("list files")
+        self.assertIn("stream dropped", result["error"])
+        self.assertEqual(len(agent.history), 0)
+
+    def test_failure_after_dispatched_calls_keeps_their_results(self):
+        call = types.Part(function_call=types.FunctionCall(name="get_files_info", args={}))
+        agent = self.make_agent([[chunk(call), RuntimeError("stream dropped")]])
+        result = agent.run_turn("list files")
+
+        self.assertIn("stream dropped", result["error"])
+        kinds = [entry.kind for entry in agent.history.entries]
+        self.assertEqual(kinds, ["prompt", "model", "tool_result"])
+        self.assertEqual(agent.history.entries[1].content.parts[0].function_call.name, "get_files_info")
+        self.assertIn("a.py", agent.history.entries[2].content.parts[0].text)
+
+    def test_verbose_usage_with_missing_counts(self):
+        usage = types.GenerateContentResponseUsageMetadata(prompt_token_count=12)
+        call = types.Part(function_call=types.FunctionCall(name="get_files_info", args={}))
+        agent = self.make_agent(
+            [[chunk(call, usage)], [chunk(types.Part(text="done"), usage)]], verbose=True
+        )
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            result = agent.run_turn("list files")
+
+        self.assertIsNone(result["error"])
+        self.assertEqual(result["final_text"], "done")
+        self.assertIn("Total Tokens: 12", output.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
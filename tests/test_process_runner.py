@@ -0,0 +1,46 @@
+import os
+import tempfile
+import unittest
+
+from functions.process_runner import RunLimits, resource, run_bounded
+
+SCRIPT = """\
+import resource, sys
+print(resource.getrlimit(resource.RLIMIT_NOFILE)[0])
+print(resource.getrlimit(resource.RLIMIT_AS)[0])
+print(sys.argv[1:])
+"""
+
+
+@unittest.skipIf(resource is None, "rlimits need the resource module")
+class TestRunBounded(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        with open(os.path.join(self.temp_dir.name, "limits.py"), "w", encoding="utf-8") as f:
+            f.write(SCRIPT)
+
+    def run_script(self, limits):
+        stdout, stderr, returncode = run_bounded(
+            ["limits.py", "a", "b"], self.temp_dir.name, limits
+        )
+        self.assertEqual((stderr, returncode), ("", 0))
+        return stdout.splitlines()
+
+    def test_script_runs_under_the_rlimits(self):
+        limits = RunLimits()
+        limits.open_files = 64
+        limits.memory_bytes = 2 * 1024 * 1024 * 1024
+        open_files, memory, args = self.run_script(limits)
+        self.assertEqual(int(open_files), 64)
+        self.assertEqual(int(memory), 2 * 1024 * 1024 * 1024)
+        self.assertEqual(args, "['a', 'b']")
+
+    def test_address_space_is_not_limited_by_default(self):
+        _, memory, _ = self.run_script(RunLimits())
+        self.assertEqual(int(memory), resource.getrlimit(resource.RLIMIT_AS)[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,38 @@
+import unittest
+
+from agent.result_encoding import encode_result
+
+
+class TestEncodeResult(unittest.TestCase):
+
+    def test_cut_text_gives_a_lower_bound_and_where_to_continue(self):
+        # A ranged read the tool already cut: the encoder only sees part of the file
+        text = (
+            '[File "big.py": 900000 bytes, 30000 lines total]\n[Lines 1-200]\n'
+            + "".join(f"line {n}\n" for n in range(1, 201))
+            + "[...Range truncated at 10000 characters. Continue with start_line=201.]"
+        )
+        encoded = encode_result("get_file_content", {"file_path": "big.py", "start_line": 1}, text, 1000)
+        shown = encoded.split("\n")[2:-1]
+        self.assertEqual(shown[-1], f"line {len(shown)}")
+        self.assertTrue(encoded.endswith(
+            f"[... truncated; at least {201 - len(shown)} more lines not shown; "
+            f"continue with start_line={len(shown) + 1} ...]"
+        ))
+        self.assertNotIn("characters) not shown", encoded)
+
+    def test_over_long_first_line_is_not_continued_by_line(self):
+        text = '[File "min.js": 50000 bytes, 1 lines total]\n[Line 1, first 10000 bytes]\n' + "x" * 10000
+        encoded = encode_result("get_file_content", {"file_path": "min.js", "start_line": 1}, text, 1000)
+        self.assertIn("line 1 is too long; read it with offset/length", encoded)
+        self.assertNotIn("start_line=1", encoded)
+
+    def test_log_gap_is_a_lower_bound(self):
+        text = "".join(f"output {n}\n" for n in range(1000))
+        encoded = encode_result("run_python_file", {}, text, 1000)
+        self.assertRegex(encoded, r"\[\.\.\. at least \d+ lines omitted \.\.\.\]")
+        self.assertTrue(encoded.endswith("output 999\n"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+import threading
+import time
+import unittest
+from types import SimpleNamespace
+
+from agent.scheduler import CallBudget, ModelScheduler
+
+ESTIMATE = 100
+
+
+def response(tokens):
+    return SimpleNamespace(usage_metadata=SimpleNamespace(total_token_count=tokens))
+
+
+class TestHedgeBudget(unittest.TestCase):
+
+    def make_scheduler(self):
+        budget = CallBudget(tokens_per_minute=10_000)
+        scheduler = ModelScheduler(budget, hedge=True, hedge_after=0.01)
+        self.addCleanup(scheduler.close)
+        return budget, scheduler
+
+    def test_failed_hedge_releases_its_reservation(self):
+        budget, scheduler = self.make_scheduler()
+        calls = []
+        hedge_done = threading.Event()
+
+        def request():
+            calls.append(None)
+            if len(calls) == 1:
+                time.sleep(0.05)
+                return response(10)
+            try:
+                raise ConnectionError("hedge failed")
+            finally:
+                hedge_done.set()
+
+        scheduler.call(request, estimated_tokens=ESTIMATE)
+        self.assertTrue(hedge_done.wait(1))
+        self.assertEqual(scheduler.stats["hedged"], 1)
+        self.assertEqual(budget._tokens, 10)
+
+    def test_losing_hedge_is_settled_with_its_usage(self):
+        budget, scheduler = self.make_scheduler()
+        calls = []
+        release_hedge = threading.Event()
+
+        def request():
+            calls.append(None)
+            if len(calls) == 1:
+                time.sleep(0.05)
+                return response(10)
+            release_hedge.wait(1)
+            return response(30)
+
+        scheduler.call(request, estimated_tokens=ESTIMATE)
+        self.assertEqual(budget._tokens, 10 + ESTIMATE)  # The hedge is still running
+        release_hedge.set()
+        deadline = time.monotonic() + 1
+        while budget._tokens != 40 and time.monotonic() < deadline:
+            time.sleep(0.005)
+        self.assertEqual(budget._tokens, 40)
+
+
+if __name__ == "__main__":
+    unittest.main()
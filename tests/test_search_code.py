@@ -0,0 +1,32 @@
+import os
+import tempfile
+import unittest
+
+from functions.search_code import search_code
+
+
+class TestSearchCode(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.path = os.path.join(self.temp_dir.name, "module.py")
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write("def first_function():\n    pass\n")
+
+    def test_finds_text_added_by_an_in_place_edit(self):
+        self.assertIn("module.py:1:", search_code(self.temp_dir.name, "first_function"))
+        search_code(self.temp_dir.name, "first_function")  # After the index file was saved
+        directory_mtime = os.stat(self.temp_dir.name).st_mtime_ns
+
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("def second_function():\n    pass\n")
+        stats = os.stat(self.path)
+        os.utime(self.path, ns=(stats.st_atime_ns, stats.st_mtime_ns + 10**9))
+        self.assertEqual(os.stat(self.temp_dir.name).st_mtime_ns, directory_mtime)
+
+        self.assertIn("module.py:3:", search_code(self.temp_dir.name, "second_function"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import os
+import tempfile
+import unittest
+
+from agent.session import HEADER, RECORD_TYPES, SessionLog, read_session, session_path
+
+
+class TestSessionLog(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.root = self.temp_dir.name
+
+    def write_session(self, *prompts):
+        log = SessionLog(self.root, "s1")
+        for text in prompts:
+            log.append("prompt", {"text": text})
+        log.close()
+        return session_path(self.root, "s1")
+
+    def prompts(self):
+        return [payload["text"] for kind, payload in read_session(self.root, "s1") if kind == "prompt"]
+
+    def test_reopening_cuts_off_a_torn_record(self):
+        path = self.write_session("first")
+        size = os.path.getsize(path)
+        with open(path, "ab") as f:
+            f.write(HEADER.pack(100, RECORD_TYPES["prompt"]) + b'{"text": "cut')
+
+        self.write_session("second")
+        self.assertEqual(self.prompts(), ["first", "second"])
+        self.assertGreater(os.path.getsize(path), size)
+
+    def test_reading_stops_at_an_unreadable_record(self):
+        path = self.write_session("first")
+        payload = b'{"text": \xff broken}'
+        with open(path, "ab") as f:
+            f.write(HEADER.pack(len(payload), RECORD_TYPES["prompt"]) + payload)
+        self.assertEqual(self.prompts(), ["first"])
+
+        # Appending again drops the bad record instead of hiding the new one behind it
+        self.write_session("second")
+        self.assertEqual(self.prompts(), ["first", "second"])
+
+    def test_new_log_starts_with_metadata(self):
+        self.write_session("first")
+        records = read_session(self.root, "s1")
+        self.assertEqual([kind for kind, _ in records], ["meta", "prompt"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+import json
+import os
+import tempfile
+import unittest
+from types import SimpleNamespace
+
+from agent.tracing import Tracer, percentile, read_trace, record_usage, summarize, traced_execute
+
+
+class TestTracing(unittest.TestCase):
+
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.path = os.path.join(temp_dir.name, "trace.jsonl")
+
+    def write_trace(self):
+        tracer = Tracer(self.path, session_id="s1")
+        with tracer.span("step", turn=1, step=1) as step:
+            with tracer.span("model", "test-model", step) as model:
+                usage = SimpleNamespace(
+                    prompt_token_count=100,
+                    candidates_token_count=20,
+                    cached_content_token_count=None,
+                    total_token_count=120,
+                )
+                record_usage(model, SimpleNamespace(usage_metadata=usage, function_calls=[1, 2]))
+
+            def execute(func_name, func_args):
+                if func_name == "write_file":
+                    return "Error: not allowed"
+                return "x" * 10
+
+            run = traced_execute(tracer, execute, step, task="t1")
+            run("get_file_content", {"file_path": "./a.py"})
+            run("write_file", {"file_path": "b.py", "content": ""})
+        tracer.close()
+
+    def test_spans_are_written_as_jsonl(self):
+        self.write_trace()
+        records = list(read_trace([self.path]))
+        self.assertEqual([r["kind"] for r in records], ["model", "tool", "tool", "step"])
+        model, read, write, step = records
+        self.assertEqual(model["parent"], step["span"])
+        self.assertEqual((model["prompt_tokens"], model["cached_tokens"]), (100, 0))
+        self.assertEqual(model["function_calls"], 2)
+        self.assertEqual(read["target"], "a.py")
+        self.assertEqual(read["task"], "t1")
+        self.assertEqual(read["result_chars"], 10)
+        self.assertFalse(read["failed"])
+        self.assertTrue(write["failed"])
+        self.assertTrue(all(r["session"] == "s1" and r["duration_ms"] >= 0 for r in records))
+
+    def test_summary_rows_and_totals(self):
+        self.write_trace()
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("not json\n")  # A torn line is skipped
+        rows, totals = summarize(read_trace([self.path]))
+
+        by_span = {row["span"]: row for row in rows}
+        self.assertEqual(
+            [row["span"] for row in rows],
+            ["model", "step", "tool", "tool:get_file_content", "tool:write_file"],
+        )
+        self.assertEqual(by_span["tool"]["count"], 2)
+        self.assertEqual(by_span["tool:write_file"]["count"], 1)
+        for row in rows:
+            self.assertLessEqual(row["p50_ms"], row["p90_ms"])
+            self.assertLessEqual(row["p99_ms"], row["max_ms"])
+        self.assertEqual(
+            totals, {"prompt_tokens": 100, "response_tokens": 20, "cached_tokens": 0, "sessions": 1}
+        )
+
+    def test_disabled_tracer_writes_nothing(self):
+        tracer = Tracer()
+        execute = lambda func_name, func_args: "ok"
+        self.assertIs(traced_execute(tracer, execute), execute)
+        with tracer.span("step") as span:
+            self.assertIsNone(span.id)
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_span_error_is_recorded(self):
+        tracer = Tracer(self.path)
+        with self.assertRaises(ValueError):
+            with tracer.span("tool", "run_python_file"):
+                raise ValueError("boom")
+        tracer.close()
+        with open(self.path, encoding="utf-8") as f:
+            self.assertEqual(json.loads(f.readline())["error"], "ValueError: boom")
+
+    def test_percentile_is_nearest_rank(self):
+        values = list(range(1, 11))
+        self.assertEqual(percentile(values, 0.5), 5)
+        self.assertEqual(percentile(values, 0.9), 9)
+        self.assertEqual(percentile(values, 0.99), 10)
+        self.assertEqual(percentile([], 0.5), 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()